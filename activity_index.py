@@ -0,0 +1,84 @@
+import calendar
+from collections import defaultdict
+from datetime import datetime
+
+from constants import DEDUP_START_TOLERANCE_SEC, DEDUP_DURATION_TOLERANCE_SEC
+
+def _local_seconds(dt):
+    """현지 시각(naive datetime)을 비교용 초 단위 정수로 변환합니다."""
+    return calendar.timegm(dt.timetuple())
+
+def coros_activity_key(act):
+    """COROS 활동에서 (현지 시작 시각(초), 기록 시간(초))를 추출합니다. 실패하면 None."""
+    try:
+        start = datetime.strptime(str(act.get('date', '')), '%Y%m%d%H%M%S')
+        duration = int(act.get('duration', act.get('totalTime', 0)))
+    except (TypeError, ValueError):
+        return None
+    return _local_seconds(start), duration
+
+def garmin_activity_key(act):
+    """Garmin 활동에서 (현지 시작 시각(초), 기록 시간(초))를 추출합니다. 실패하면 None."""
+    try:
+        if 'startTimeInSeconds' in act:
+            start = int(act['startTimeInSeconds']) + int(act.get('startTimeOffsetInSeconds', 0))
+            duration = int(act['durationInSeconds'])
+        else:
+            start = _local_seconds(datetime.strptime(act['startTimeLocal'], '%Y-%m-%d %H:%M:%S'))
+            duration = int(float(act['duration']))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return start, duration
+
+def fit_activity_key(meta):
+    """FIT 파일 메타데이터에서 (현지 시작 시각(초), 기록 시간(초))를 추출합니다. 실패하면 None.
+
+    현지 시각을 알려면 activity 메시지의 UTC 오프셋이 필요합니다.
+    """
+    if not meta or meta.get('start_time') is None or meta.get('elapsed') is None or meta.get('utc_offset') is None:
+        return None
+    return meta['start_time'] + meta['utc_offset'], int(meta['elapsed'])
+
+class ActivityIndex:
+    """시작 시각 버킷으로 활동을 색인하여 오차범위 내 중복을 빠르게 찾습니다."""
+    def __init__(self, start_tolerance=DEDUP_START_TOLERANCE_SEC, duration_tolerance=DEDUP_DURATION_TOLERANCE_SEC):
+        self.start_tolerance = start_tolerance
+        self.duration_tolerance = duration_tolerance
+        # 버킷 크기를 시작 시각 허용 오차와 같게 두면 인접 버킷 3개만 확인하면 됩니다.
+        self.bucket_size = max(1, start_tolerance)
+        self._buckets = defaultdict(list)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, start, duration, item=None):
+        """(시작 시각, 기록 시간) 키로 활동을 색인에 추가합니다."""
+        self._buckets[start // self.bucket_size].append((start, duration, item))
+        self._count += 1
+
+    def find(self, start, duration):
+        """허용 오차 안에서 가장 가까운 활동을 반환합니다. 없으면 None."""
+        bucket = start // self.bucket_size
+        best, best_gap = None, None
+        for b in (bucket - 1, bucket, bucket + 1):
+            for c_start, c_duration, item in self._buckets.get(b, ()):
+                gap = abs(c_start - start)
+                if gap > self.start_tolerance or abs(c_duration - duration) >= self.duration_tolerance:
+                    continue
+                if best_gap is None or gap < best_gap:
+                    best, best_gap = (c_start, c_duration, item), gap
+        return best
+
+    def contains(self, start, duration):
+        return self.find(start, duration) is not None
+
+    @classmethod
+    def build(cls, activities, key_func, **kwargs):
+        """key_func로 키를 추출할 수 있는 활동만 모아 색인을 만듭니다."""
+        index = cls(**kwargs)
+        for act in activities:
+            key = key_func(act)
+            if key is not None:
+                index.add(key[0], key[1], act)
+        return index
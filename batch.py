@@ -0,0 +1,158 @@
+import os
+import re
+import copy
+import json
+import time
+import threading
+import concurrent.futures
+
+from utils import load_config
+from pipeline import FairPool, MemoryBudget
+from ratelimit import get_limiter
+from constants import BATCH_MAX_ACCOUNTS, BATCH_REPORT_FILENAME, DEFAULT_OUTPUT_DIR
+
+ACCOUNT_KEYS = ('COROS_EMAIL', 'COROS_PASSWORD', 'GARMIN_USERNAME', 'GARMIN_PASSWORD')
+ACCOUNT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+def load_accounts(path):
+    """계정 목록 JSON 파일을 읽어 검증된 계정 목록을 반환합니다.
+
+    형식: [{"name": "athlete1", "COROS_EMAIL": "...", "COROS_PASSWORD": "...",
+            "GARMIN_USERNAME": "...", "GARMIN_PASSWORD": "...", "mode": "coros2garmin"(선택)}, ...]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        accounts = json.load(f)
+    if not isinstance(accounts, list) or not accounts:
+        raise ValueError("계정 목록은 하나 이상의 항목을 가진 JSON 배열이어야 합니다.")
+    names = set()
+    for i, account in enumerate(accounts, 1):
+        name = account.get('name')
+        if not name or not ACCOUNT_NAME_PATTERN.match(name):
+            raise ValueError(f"{i}번째 계정의 name은 영문/숫자/_.- 로만 지정해야 합니다: {name!r}")
+        if name in names:
+            raise ValueError(f"계정 이름이 중복되었습니다: {name}")
+        names.add(name)
+        missing = [key for key in ACCOUNT_KEYS if not account.get(key)]
+        if missing:
+            raise ValueError(f"계정 {name}에 {', '.join(missing)} 값이 없습니다.")
+        if account.get('mode') not in (None, 'coros2garmin', 'garmin2coros'):
+            raise ValueError(f"계정 {name}의 mode 값을 알 수 없습니다: {account['mode']}")
+    return accounts
+
+class BatchRunner:
+    """여러 계정 쌍의 마이그레이션을 한 프로세스에서 동시에 실행합니다.
+
+    모든 계정이 고정 크기의 다운로드/업로드 FairPool을 함께 쓰므로 전체 동시 작업 수는
+    계정 수와 관계없이 풀 크기로 제한되고, 계정마다 돌아가며 작업을 배정받습니다.
+    플랫폼별 요청 속도는 프로세스 전체가 공유하는 제한기(ratelimit.get_limiter)가 조절합니다.
+    계정별 원장/FIT 파일은 OUTPUT_DIR/<계정 이름> 아래에 따로 보관합니다.
+    in_memory이면 모든 계정이 하나의 메모리 한도(MEMORY_BUDGET_MB)를 나눠 씁니다.
+    """
+    def __init__(self, accounts, default_mode, storage=None, workers=None, max_accounts=BATCH_MAX_ACCOUNTS,
+                 in_memory=False):
+        self.accounts = accounts
+        self.default_mode = default_mode
+        self.storage = storage
+        self.base_config = load_config()
+        self.workers = workers or max(get_limiter('coros').max_concurrency, get_limiter('garmin').max_concurrency)
+        self.max_accounts = max(1, max_accounts)
+        self.output_root = self.base_config.get('OUTPUT_DIR') or DEFAULT_OUTPUT_DIR
+        self.in_memory = in_memory
+        self.memory_budget = None
+        self._print_lock = threading.Lock()
+
+    def _create_migrator(self, account, mode):
+        from coros_to_garmin import CorosToGarmin
+        from garmin_to_coros import GarminToCoros
+        config = dict(self.base_config, **{key: account[key] for key in ACCOUNT_KEYS})
+        output_dir = account.get('OUTPUT_DIR') or os.path.join(self.output_root, account['name'])
+        cls = CorosToGarmin if mode == 'coros2garmin' else GarminToCoros
+        migrator = cls(output_dir=output_dir, storage=self.storage, config=config, in_memory=self.in_memory)
+        if self.in_memory:
+            migrator.memory_budget = self.memory_budget
+        return migrator
+
+    def _run_account(self, account, args, pools):
+        mode = account.get('mode') or self.default_mode
+        result = {'account': account['name'], 'mode': mode, 'status': 'ok', 'error': None}
+        started = time.monotonic()
+        migrator = None
+        with self._print_lock:
+            print(f"👤 [{account['name']}] {mode} 연동을 시작합니다.")
+        try:
+            migrator = self._create_migrator(account, mode)
+            migrator.pools = pools
+            migrator.account_name = account['name']
+            migrator.run(copy.copy(args))
+            if migrator.failures:
+                result['status'] = 'partial'
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+            with self._print_lock:
+                print(f"❌ [{account['name']}] 연동 실패: {e}")
+        finally:
+            if migrator is not None:
+                migrator.ledger.close()
+                migrator.store.close()
+        result['elapsed_sec'] = round(time.monotonic() - started, 3)
+        if migrator is not None:
+            stats = migrator.stats
+            result.update({
+                'listed': stats['listed'], 'skipped': stats['skipped'], 'downloaded': stats['downloaded'],
+                'uploaded': stats['uploaded'], 'duplicate': stats['duplicate'],
+                'failed': stats['download_failed'] + stats['upload_failed'] + stats['validate_failed'],
+                'failures': [{'stage': stage, 'item': name, 'error': error} for stage, name, error in migrator.failures],
+            })
+        return result
+
+    def run(self, args):
+        """모든 계정을 실행하고 계정별 결과 목록을 반환합니다."""
+        pools = (FairPool(self.workers, "download"), FairPool(self.workers, "upload"))
+        if self.in_memory:
+            from constants import MEMORY_BUDGET_MB
+            try:
+                limit_mb = max(1, int(self.base_config.get('MEMORY_BUDGET_MB') or MEMORY_BUDGET_MB))
+            except ValueError:
+                limit_mb = MEMORY_BUDGET_MB
+            self.memory_budget = MemoryBudget(limit_mb * 1024 * 1024)
+        print(f"👥 계정 {len(self.accounts)}개를 동시 {min(self.max_accounts, len(self.accounts))}개씩, "
+              f"공유 작업자 {self.workers}개로 연동합니다.")
+        started = time.monotonic()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_accounts) as executor:
+                results = list(executor.map(lambda account: self._run_account(account, args, pools), self.accounts))
+        finally:
+            for pool in pools:
+                pool.shutdown()
+        elapsed = time.monotonic() - started
+        self.print_report(results, elapsed)
+        self.save_report(results, elapsed)
+        return results
+
+    @staticmethod
+    def print_report(results, elapsed):
+        print(f"📋 계정별 결과 (전체 {elapsed:.1f}초)")
+        labels = {'ok': '✅', 'partial': '⚠️', 'error': '❌'}
+        for r in results:
+            if r['status'] == 'error' and 'listed' not in r:
+                print(f"   {labels['error']} {r['account']} ({r['mode']}): {r['error']}")
+                continue
+            line = (f"   {labels[r['status']]} {r['account']} ({r['mode']}): 조회 {r['listed']} / 다운로드 {r['downloaded']} / "
+                    f"업로드 {r['uploaded']} / 중복 {r['duplicate']} / 실패 {r['failed']} ({r['elapsed_sec']:.1f}초)")
+            if r['error']:
+                line += f" - {r['error']}"
+            print(line)
+
+    def save_report(self, results, elapsed):
+        """계정별 결과를 OUTPUT_DIR/batch_report.json에 저장합니다."""
+        path = os.path.join(self.output_root, BATCH_REPORT_FILENAME)
+        report = {'finished_at': time.time(), 'elapsed_sec': round(elapsed, 3), 'workers': self.workers,
+                  'accounts': results}
+        try:
+            os.makedirs(self.output_root, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"📝 결과 보고서 저장: {path}")
+        except OSError as e:
+            print(f"⚠️ 결과 보고서 저장 실패: {e}")
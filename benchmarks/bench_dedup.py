@@ -0,0 +1,86 @@
+# benchmarks/bench_dedup.py
+# COROS→Garmin 중복 검사 마이크로 벤치마크
+# 실행: python benchmarks/bench_dedup.py --count 20000
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key
+
+def make_activities(count, seed=42):
+    """COROS 활동과, 그 중 절반이 오차범위 내로 겹치는 Garmin 활동을 생성합니다."""
+    rng = random.Random(seed)
+    base = datetime(2012, 1, 1, 6, 0, 0)
+    coros, garmin = [], []
+    for i in range(count):
+        start = base + timedelta(hours=6 * i, seconds=rng.randint(0, 3600))
+        duration = rng.randint(600, 10800)
+        coros.append({"labelId": str(400000000 + i), "date": start.strftime('%Y%m%d%H%M%S'), "duration": duration})
+        if i % 2 == 0:
+            # Garmin 쪽은 분 경계를 넘나드는 ±40초, 기록 시간 ±10초 오차를 둡니다.
+            g_start = start + timedelta(seconds=rng.randint(-40, 40))
+            garmin.append({
+                "activityId": 900000000 + i,
+                "startTimeLocal": g_start.strftime('%Y-%m-%d %H:%M:%S'),
+                "duration": float(duration + rng.randint(-10, 10)),
+            })
+    fit_files = [os.path.join("exports", "coros", f"{act['date'][:8]}_{act['labelId']}.fit") for act in coros]
+    return coros, garmin, fit_files
+
+def linear_check(fit_files, coros, garmin):
+    """기존 방식: 파일마다 COROS/Garmin 목록을 선형 탐색합니다."""
+    garmin_keys = [garmin_activity_key(g) for g in garmin]
+    duplicates = 0
+    for fit_file in fit_files:
+        label_id = os.path.basename(fit_file).split('_')[1].split('.')[0]
+        c_act = next((act for act in coros if str(act.get('labelId')) == label_id), None)
+        c_key = coros_activity_key(c_act)
+        for g_key in garmin_keys:
+            if abs(g_key[0] - c_key[0]) <= 60 and abs(g_key[1] - c_key[1]) < 15:
+                duplicates += 1
+                break
+    return duplicates
+
+def indexed_check(fit_files, coros, garmin):
+    """색인 방식: labelId 딕셔너리 + 시작 시각 버킷 색인을 사용합니다."""
+    index = ActivityIndex.build(garmin, garmin_activity_key)
+    by_label = {str(act.get('labelId')): act for act in coros}
+    duplicates = 0
+    for fit_file in fit_files:
+        label_id = os.path.basename(fit_file).split('_')[1].split('.')[0]
+        if index.contains(*coros_activity_key(by_label[label_id])):
+            duplicates += 1
+    return duplicates
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='중복 검사 마이크로 벤치마크')
+    parser.add_argument('--count', type=int, default=10000, help='COROS 활동 수 (기본 10000)')
+    parser.add_argument('--skip-linear', action='store_true', help='선형 탐색 측정 생략 (대규모 측정용)')
+    args = parser.parse_args()
+
+    coros, garmin, fit_files = make_activities(args.count)
+    print(f"COROS 활동 {len(coros)}개, Garmin 활동 {len(garmin)}개")
+
+    dup_indexed, t_indexed = timed(indexed_check, fit_files, coros, garmin)
+    print(f"색인 방식 : {t_indexed * 1000:9.1f} ms  (중복 {dup_indexed}개, 파일당 {t_indexed / len(fit_files) * 1e6:.2f} µs)")
+
+    if not args.skip_linear:
+        dup_linear, t_linear = timed(linear_check, fit_files, coros, garmin)
+        print(f"선형 탐색 : {t_linear * 1000:9.1f} ms  (중복 {dup_linear}개, 파일당 {t_linear / len(fit_files) * 1e6:.2f} µs)")
+        print(f"속도 향상 : {t_linear / t_indexed:.0f}배")
+        if dup_linear != dup_indexed:
+            print("[오류] 두 방식의 중복 판정 결과가 다릅니다.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
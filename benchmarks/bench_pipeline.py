@@ -0,0 +1,244 @@
+# benchmarks/bench_pipeline.py
+# 모의 서버(mock_server.py)를 상대로 CorosToGarmin/GarminToCoros 전체 과정을 실행하는 처리량 벤치마크
+# 실행: python benchmarks/bench_pipeline.py --activities 200 --latency-ms 50
+# 기준 저장: python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+# 회귀 검사: python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json --max-regression 0.2
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+import subprocess
+import contextlib
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DIRECTIONS = ('coros2garmin', 'garmin2coros')
+
+class LatencyRecorder:
+    """requests.Session 요청마다 걸린 시간을 플랫폼별로 기록합니다."""
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, session, platform):
+        original = session.request
+
+        def timed_request(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples.setdefault(platform, []).append(time.perf_counter() - started)
+        session.request = timed_request
+
+    @staticmethod
+    def percentile(values, pct):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def summary(self):
+        return {
+            platform: {
+                "calls": len(values),
+                "p50_ms": self.percentile(values, 50) * 1000,
+                "p99_ms": self.percentile(values, 99) * 1000,
+            }
+            for platform, values in self.samples.items()
+        }
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 메모리 사용량(MB). 측정할 수 없는 환경이면 None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위입니다.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_direction(direction, url, options):
+    """한 방향의 마이그레이션을 실행하고 측정 결과를 반환합니다. (자식 프로세스에서 실행)"""
+    from client import CorosClient, GarminClient
+    from ratelimit import AdaptiveLimiter
+    from constants import RATE_LIMITS
+    from coros_to_garmin import CorosToGarmin
+    from garmin_to_coros import GarminToCoros
+    from mock_server import MockGarmin
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    recorder = LatencyRecorder()
+    log = sys.stdout if options.verbose else open(os.devnull, 'w')
+    try:
+        with contextlib.redirect_stdout(log):
+            cls = CorosToGarmin if direction == 'coros2garmin' else GarminToCoros
+            migrator = cls(output_dir=work_dir, storage=options.storage)
+            limiters = {}
+            if options.rate_limits == 'off':
+                # 파이프라인 자체의 처리량을 보기 위해 속도 제한만 풀고 동시 요청 한도는 그대로 둡니다.
+                limiters = {name: AdaptiveLimiter(name, **dict(RATE_LIMITS[name], rate=1e6, burst=1e6))
+                            for name in RATE_LIMITS}
+            migrator.coros_client = CorosClient(
+                "bench@example.com", "bench", limiter=limiters.get('coros'),
+                retry_budget=migrator.retry_budget, base_url=url
+            )
+            migrator.garmin_client = GarminClient(
+                "bench", "bench", limiter=limiters.get('garmin'),
+                retry_budget=migrator.retry_budget, client_factory=MockGarmin.factory(url)
+            )
+            recorder.wrap(migrator.coros_client.session, 'coros')
+            original_factory = migrator.garmin_client.client_factory
+
+            def recorded_factory(username, password):
+                client = original_factory(username, password)
+                recorder.wrap(client.session, 'garmin')
+                return client
+            migrator.garmin_client.client_factory = recorded_factory
+
+            args = SimpleNamespace(mode=direction, day=None, month=None, all=True, upload_only=False,
+                                   download_only=False, file=None, resume=False)
+            started = time.perf_counter()
+            migrator.run(args)
+            elapsed = time.perf_counter() - started
+            migrator.ledger.close()
+    finally:
+        if log is not sys.stdout:
+            log.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    stats = migrator.stats
+    return {
+        "direction": direction,
+        "elapsed_sec": elapsed,
+        "activities": stats['listed'],
+        "activities_per_sec": stats['listed'] / elapsed if elapsed else 0.0,
+        "downloaded": stats['downloaded'],
+        "uploaded": stats['uploaded'],
+        "duplicate": stats['duplicate'],
+        "failed": stats['download_failed'] + stats['upload_failed'],
+        "retries": migrator.retry_budget.used,
+        "latency": recorder.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def start_mock_server(options):
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+        "--port", "0", "--activities", str(options.activities), "--overlap", str(options.overlap),
+        "--payload-kb", str(options.payload_kb), "--latency-ms", str(options.latency_ms),
+        "--error-rate", str(options.error_rate),
+    ]
+    if options.page_size:
+        command += ["--page-size", str(options.page_size)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = process.stdout.readline().strip()
+    if not url.startswith("http"):
+        process.kill()
+        raise RuntimeError("모의 서버를 시작하지 못했습니다.")
+    return process, url
+
+def run_child(direction, url, options):
+    """방향마다 새 프로세스에서 실행해 제한기 상태와 최대 메모리 사용량이 섞이지 않게 합니다."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", direction, "--url", url,
+               "--rate-limits", options.rate_limits]
+    if options.storage:
+        command += ["--storage", options.storage]
+    if options.verbose:
+        command.append("--verbose")
+    output = subprocess.run(command, stdout=subprocess.PIPE, text=True, check=True).stdout
+    if options.verbose:
+        print(output.rsplit("\n", 2)[0])
+    return json.loads(output.strip().splitlines()[-1])
+
+def print_result(result):
+    print(f"[{result['direction']}] 활동 {result['activities']}개 / {result['elapsed_sec']:.2f}초 "
+          f"= {result['activities_per_sec']:.1f} 활동/초 "
+          f"(다운로드 {result['downloaded']}, 업로드 {result['uploaded']}, 중복 {result['duplicate']}, "
+          f"실패 {result['failed']}, 재시도 {result['retries']})")
+    for platform, latency in sorted(result['latency'].items()):
+        print(f"    {platform:6s} 호출 {latency['calls']:5d}회  p50 {latency['p50_ms']:8.1f} ms  p99 {latency['p99_ms']:8.1f} ms")
+    if result['peak_rss_mb'] is not None:
+        print(f"    최대 메모리(RSS) {result['peak_rss_mb']:.1f} MB")
+
+def check_regression(results, baseline, tolerance):
+    """기준 결과와 비교해 처리량 감소/지연 시간·메모리 증가가 허용 범위를 넘은 항목을 반환합니다."""
+    problems = []
+    for result in results:
+        base = baseline.get(result['direction'])
+        if not base:
+            continue
+        if result['activities_per_sec'] < base['activities_per_sec'] * (1 - tolerance):
+            problems.append(f"{result['direction']} 처리량 {result['activities_per_sec']:.1f} < 기준 {base['activities_per_sec']:.1f} 활동/초")
+        for platform, latency in result['latency'].items():
+            base_latency = base['latency'].get(platform)
+            if base_latency and latency['p99_ms'] > base_latency['p99_ms'] * (1 + tolerance):
+                problems.append(f"{result['direction']} {platform} p99 {latency['p99_ms']:.1f} > 기준 {base_latency['p99_ms']:.1f} ms")
+        if result['peak_rss_mb'] and base.get('peak_rss_mb') and result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            problems.append(f"{result['direction']} 최대 메모리 {result['peak_rss_mb']:.1f} > 기준 {base['peak_rss_mb']:.1f} MB")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='모의 서버 기반 전체 파이프라인 벤치마크')
+    parser.add_argument('--activities', type=int, default=200, help='활동 수 (기본 200)')
+    parser.add_argument('--overlap', type=float, default=0.5, help='Garmin에 이미 있는 COROS 활동 비율 (기본 0.5)')
+    parser.add_argument('--payload-kb', type=int, default=64, help='FIT 파일 크기(KB) (기본 64)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='요청당 평균 지연 시간(ms) (기본 50)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 응답 비율 (0~1, 기본 0)')
+    parser.add_argument('--page-size', type=int, help='COROS 활동 조회 페이지 크기 상한')
+    parser.add_argument('--direction', choices=DIRECTIONS, help='한 방향만 측정')
+    parser.add_argument('--rate-limits', choices=['off', 'real'], default='off',
+                        help='off: 초당 요청 수 제한 해제(기본), real: constants.RATE_LIMITS 그대로 사용')
+    parser.add_argument('--storage', choices=['files', 'archive'], help='FIT 파일 저장 방식')
+    parser.add_argument('--json', help='측정 결과를 저장할 JSON 파일 경로')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON 파일 (회귀 검사)')
+    parser.add_argument('--save-baseline', help='측정 결과를 기준 파일로 저장')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='허용 성능 저하 비율 (기본 0.2 = 20%%)')
+    parser.add_argument('--verbose', action='store_true', help='마이그레이션 로그 출력')
+    parser.add_argument('--child', choices=DIRECTIONS, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        result = run_direction(options.child, options.url, options)
+        print(json.dumps(result))
+        return
+
+    server, url = start_mock_server(options)
+    try:
+        print(f"모의 서버 {url} (활동 {options.activities}개, 지연 {options.latency_ms}ms, "
+              f"FIT {options.payload_kb}KB, 오류율 {options.error_rate:.0%}, 속도 제한 {options.rate_limits})")
+        results = [run_child(direction, url, options) for direction in ([options.direction] if options.direction else DIRECTIONS)]
+    finally:
+        server.terminate()
+        server.wait()
+
+    for result in results:
+        print_result(result)
+
+    by_direction = {result['direction']: result for result in results}
+    for path in (options.json, options.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(by_direction, f, ensure_ascii=False, indent=2)
+            print(f"결과 저장: {path}")
+
+    if options.baseline:
+        with open(options.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = check_regression(results, baseline, options.max_regression)
+        if problems:
+            print(f"[오류] 기준 대비 성능 저하가 허용 범위({options.max_regression:.0%})를 넘었습니다:")
+            for problem in problems:
+                print(f"   - {problem}")
+            sys.exit(1)
+        print(f"✅ 기준 대비 성능 저하 없음 (허용 범위 {options.max_regression:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/import_profile.py
+# 진입점 모듈의 import 시간을 `python -X importtime`으로 측정해 느린 모듈을 보고합니다.
+# 실행: python benchmarks/import_profile.py --top 20
+# 빌드 시 pyinstaller.spec이 build/import_profile.txt로 보고서를 남깁니다.
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_MODULES = ('main', 'gui', 'coros_to_garmin', 'garmin_to_coros')
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+def profile_module(module):
+    """새 인터프리터에서 module을 import하고 (모듈별 측정값 목록, 오류 메시지)를 반환합니다.
+
+    측정값은 {'name', 'self_ms', 'cumulative_ms', 'depth'} 딕셔너리입니다.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    entries, errors = [], []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                'name': name.strip(),
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'depth': (len(indent) - 1) // 2,
+            })
+        elif not line.startswith("import time:"):
+            errors.append(line)
+    error = "\n".join(errors[-3:]) if result.returncode != 0 else None
+    return entries, error
+
+def time_command(args, repeat=3):
+    """명령을 여러 번 실행해 가장 짧은 실행 시간(초)을 반환합니다."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def build_report(modules, top):
+    lines = []
+    for module in modules:
+        entries, error = profile_module(module)
+        if error:
+            lines.append(f"[{module}] import 실패: {error}")
+            continue
+        # importtime은 하위 모듈을 먼저 출력하므로, 대상 모듈 줄에서 거슬러 올라가며
+        # 인터프리터 시작 시 불러온 모듈을 빼고 대상 모듈이 끌어온 모듈만 남깁니다.
+        end = max(i for i, e in enumerate(entries) if e['name'] == module and e['depth'] == 0)
+        start = end
+        while start > 0 and entries[start - 1]['depth'] > 0:
+            start -= 1
+        total = entries[end]['cumulative_ms']
+        entries = entries[start:end + 1]
+        lines.append(f"[{module}] 전체 {total:.1f} ms (모듈 {len(entries)}개)")
+        # 최상위(직접 import한) 패키지의 누적 시간과 자체 시간이 큰 모듈을 함께 보여줍니다.
+        direct = sorted((e for e in entries if e['depth'] == 1), key=lambda e: e['cumulative_ms'], reverse=True)
+        lines.append("    직접 import (누적):")
+        for e in direct[:top]:
+            lines.append(f"      {e['cumulative_ms']:9.1f} ms  {e['name']}")
+        slowest = sorted(entries, key=lambda e: e['self_ms'], reverse=True)
+        lines.append("    자체 시간 상위:")
+        for e in slowest[:top]:
+            lines.append(f"      {e['self_ms']:9.1f} ms  {e['name']}")
+    help_sec = time_command(["main.py", "--help"])
+    lines.append(f"[main.py --help] {help_sec * 1000:.1f} ms (3회 중 최소)")
+    return "\n".join(lines) + "\n"
+
+def main():
+    parser = argparse.ArgumentParser(description='진입점 모듈 import 시간 프로파일')
+    parser.add_argument('modules', nargs='*', default=list(DEFAULT_MODULES), help='측정할 모듈 (기본: main, gui, 마이그레이터)')
+    parser.add_argument('--top', type=int, default=15, help='모듈별로 보여줄 상위 항목 수 (기본 15)')
+    parser.add_argument('--output', help='보고서를 저장할 파일 경로')
+    args = parser.parse_args()
+
+    report = build_report(args.modules, args.top)
+    print(report, end="")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"보고서 저장: {args.output}")
+
+if __name__ == "__main__":
+    main()
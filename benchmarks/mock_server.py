@@ -0,0 +1,259 @@
+# benchmarks/mock_server.py
+# 실제 계정 없이 처리량을 측정하기 위한 COROS/Garmin 모의 서버
+# 실행: python benchmarks/mock_server.py --port 8765 --activities 200 --latency-ms 50 --error-rate 0.01
+import io
+import os
+import sys
+import json
+import time
+import random
+import struct
+import zipfile
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fit import FIT_EPOCH_OFFSET, fit_crc
+from constants import (
+    COROS_SUCCESS_CODE,
+    COROS_LOGIN_PATH,
+    COROS_ACTIVITY_QUERY_PATH,
+    COROS_DOWNLOAD_PATH,
+    COROS_UPLOAD_PATH,
+)
+
+GARMIN_PREFIX = "/garmin"
+FIT_PATH_PREFIX = "/fit/"
+
+def make_fit_payload(start_utc, duration, utc_offset, size_kb, serial=1, file_type=4):
+    """시작 시각/기록 시간이 담긴 올바른 FIT 파일을 대략 size_kb 크기로 생성합니다. (file_type 4: activity)"""
+    def definition(local_type, global_num, fields):
+        body = struct.pack('<BBBHB', 0x40 | local_type, 0, 0, global_num, len(fields))
+        return body + b''.join(struct.pack('<BBB', *field) for field in fields)
+
+    start = start_utc - FIT_EPOCH_OFFSET
+    parts = [
+        definition(0, 0, [(0, 1, 0x00), (3, 4, 0x8C), (4, 4, 0x86)]),
+        struct.pack('<BBII', 0, file_type, serial, start),
+        # record 메시지: timestamp, heart_rate, cadence, distance, speed
+        definition(1, 20, [(253, 4, 0x86), (3, 1, 0x02), (4, 1, 0x02), (5, 4, 0x86), (6, 2, 0x84)]),
+    ]
+    records = max(1, size_kb * 1024 // 13)
+    step = max(1, duration // records)
+    parts.extend(struct.pack('<BIBBIH', 1, start + i * step, 140, 85, i * 3, 3000) for i in range(records))
+    end = start + duration
+    parts += [
+        definition(2, 18, [(253, 4, 0x86), (2, 4, 0x86), (5, 1, 0x00), (7, 4, 0x86), (8, 4, 0x86)]),
+        struct.pack('<BIIBII', 2, end, start, 1, duration * 1000, duration * 1000),
+        definition(3, 34, [(253, 4, 0x86), (0, 4, 0x86), (5, 4, 0x86)]),
+        struct.pack('<BIII', 3, end, duration * 1000, end + utc_offset),
+    ]
+    data = b''.join(parts)
+    header = struct.pack('<BBHI4sH', 14, 0x20, 2132, len(data), b'.FIT', 0)
+    body = header + data
+    return body + struct.pack('<H', fit_crc(body))
+
+class MockDataset:
+    """COROS 활동과, 그 중 일부가 오차범위 내로 겹치는 Garmin 활동을 생성합니다."""
+    def __init__(self, count, overlap=0.5, payload_kb=64, start=datetime(2024, 1, 1), utc_offset=9 * 3600, seed=42):
+        rng = random.Random(seed)
+        self.payload_kb = payload_kb
+        self.utc_offset = utc_offset
+        self.coros, self.garmin = [], []
+        self._fit_params = {}
+        for i in range(count):
+            local_start = start + timedelta(days=i // 2, hours=6 + 10 * (i % 2), seconds=rng.randint(0, 3600))
+            duration = rng.randint(1200, 7200)
+            label_id = str(500000000 + i)
+            self.coros.append({"labelId": label_id, "sportType": 100,
+                               "date": local_start.strftime('%Y%m%d%H%M%S'), "duration": duration})
+            self._fit_params[label_id] = (local_start, duration)
+            # 겹치지 않는 Garmin 활동은 COROS 활동과 몇 시간 떨어진 시각에 둡니다.
+            g_start = local_start + timedelta(seconds=rng.randint(-20, 20) if rng.random() < overlap else 3 * 3600)
+            activity_id = 800000000 + i
+            self.garmin.append({"activityId": activity_id, "startTimeLocal": g_start.strftime('%Y-%m-%d %H:%M:%S'),
+                                "duration": float(duration)})
+            self._fit_params[str(activity_id)] = (g_start, duration)
+
+    def fit_payload(self, activity_id):
+        local_start, duration = self._fit_params[str(activity_id)]
+        start_utc = int((local_start - datetime(1970, 1, 1)).total_seconds()) - self.utc_offset
+        return make_fit_payload(start_utc, duration, self.utc_offset, self.payload_kb, serial=int(activity_id) % 100000)
+
+    def coros_between(self, start_day, end_day):
+        return [act for act in self.coros if start_day <= act['date'][:8] <= end_day]
+
+    def garmin_between(self, start_date, end_date):
+        return [act for act in self.garmin if start_date <= act['startTimeLocal'][:10] <= end_date]
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay_or_fail(self):
+        """설정된 지연 시간만큼 기다리고, 오류 비율에 따라 503을 반환합니다."""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(503, b'{"message": "mock overload"}')
+            return True
+        return False
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data):
+        self._send(200, json.dumps(data).encode())
+
+    def _drain_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        while length > 0:
+            chunk = self.rfile.read(min(length, 1024 * 1024))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        self._drain_body()
+        if path == COROS_LOGIN_PATH:
+            return self._json({"result": COROS_SUCCESS_CODE, "data": {"accessToken": "mock-token"}})
+        if self._delay_or_fail():
+            return
+        if path == COROS_UPLOAD_PATH:
+            self.server.count("coros_upload")
+            return self._json({"result": COROS_SUCCESS_CODE, "message": "OK"})
+        if path == GARMIN_PREFIX + "/upload":
+            self.server.count("garmin_upload")
+            return self._json({"detailedImportResult": {"successes": [{}], "failures": []}})
+        self._send(404, b'{}')
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        dataset = self.server.dataset
+        if self._delay_or_fail():
+            return
+        if parts.path == COROS_ACTIVITY_QUERY_PATH:
+            acts = dataset.coros_between(query["startDay"], query["endDay"])
+            size, page = int(query.get("size", 50)), int(query.get("pageNumber", 1))
+            if self.server.page_size:
+                # 페이지 크기를 줄여 페이지 수가 많은 조회를 재현합니다.
+                size = min(size, self.server.page_size)
+            return self._json({"result": COROS_SUCCESS_CODE, "data": {
+                "dataList": acts[(page - 1) * size:page * size], "count": len(acts),
+                "totalPage": -(-len(acts) // size),
+            }})
+        if parts.path == COROS_DOWNLOAD_PATH:
+            file_url = f"http://{self.headers.get('Host')}{FIT_PATH_PREFIX}{query['labelId']}.fit"
+            return self._json({"result": COROS_SUCCESS_CODE, "data": {"fileUrl": file_url}})
+        if parts.path.startswith(FIT_PATH_PREFIX):
+            return self._send(200, dataset.fit_payload(parts.path[len(FIT_PATH_PREFIX):-4]), "application/octet-stream")
+        if parts.path == GARMIN_PREFIX + "/activities":
+            return self._json(dataset.garmin_between(query["startDate"], query["endDate"]))
+        if parts.path.startswith(GARMIN_PREFIX + "/download/"):
+            # 실제 Garmin ORIGINAL 다운로드처럼 FIT 파일을 zip으로 묶어 보냅니다.
+            activity_id = parts.path.rsplit('/', 1)[1]
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(f"{activity_id}_ACTIVITY.fit", dataset.fit_payload(activity_id))
+            return self._send(200, buffer.getvalue(), "application/zip")
+        self._send(404, b'{}')
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dataset, latency=0.0, error_rate=0.0, page_size=None):
+        super().__init__(address, MockHandler)
+        self.dataset = dataset
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+
+    def count(self, key):
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+class MockGarmin:
+    """garminconnect.Garmin 대신 모의 서버의 /garmin 엔드포인트를 호출하는 클라이언트
+
+    GarminClient(client_factory=MockGarmin.factory(url))로 주입해 사용합니다.
+    """
+    garmin_connect_upload = GARMIN_PREFIX + "/upload"
+
+    def __init__(self, base_url, username=None, password=None):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        # garminconnect의 인증 객체(client.client)처럼 토큰 저장/업로드 요청을 처리합니다.
+        self.client = self
+
+    @classmethod
+    def factory(cls, base_url):
+        return lambda username, password: cls(base_url, username, password)
+
+    def login(self, tokenstore=None):
+        return None, None
+
+    def dump(self, path):
+        pass
+
+    def _get(self, path, **params):
+        res = self.session.get(self.base_url + path, params=params, timeout=60)
+        res.raise_for_status()
+        return res
+
+    def get_activities_by_date(self, startdate, enddate=None, activitytype=None):
+        return self._get(GARMIN_PREFIX + "/activities", startDate=startdate, endDate=enddate or startdate).json()
+
+    def download_activity(self, activity_id, dl_fmt=None):
+        return self._get(f"{GARMIN_PREFIX}/download/{activity_id}").content
+
+    def post(self, domain, url, files=None, api=False):
+        res = self.session.post(self.base_url + url, files=files, timeout=60)
+        res.raise_for_status()
+        return res.json()
+
+    def upload_activity(self, activity_path):
+        with open(activity_path, 'rb') as f:
+            return self.post("connectapi", self.garmin_connect_upload,
+                             files={"file": (os.path.basename(activity_path), f)}, api=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='COROS/Garmin 모의 서버')
+    parser.add_argument('--port', type=int, default=8765, help='포트 (0이면 빈 포트 자동 선택)')
+    parser.add_argument('--activities', type=int, default=200, help='활동 수 (기본 200)')
+    parser.add_argument('--overlap', type=float, default=0.5, help='Garmin에 이미 있는 COROS 활동 비율 (기본 0.5)')
+    parser.add_argument('--payload-kb', type=int, default=64, help='FIT 파일 크기(KB) (기본 64)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='요청당 평균 지연 시간(ms) (기본 50)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 응답 비율 (0~1, 기본 0)')
+    parser.add_argument('--page-size', type=int, help='COROS 활동 조회 페이지 크기 상한 (페이지 수 조절용)')
+    args = parser.parse_args()
+
+    dataset = MockDataset(args.activities, overlap=args.overlap, payload_kb=args.payload_kb)
+    server = MockServer(("127.0.0.1", args.port), dataset, latency=args.latency_ms / 1000, error_rate=args.error_rate, page_size=args.page_size)
+    # 벤치마크 실행기가 주소를 읽을 수 있도록 첫 줄에 출력합니다.
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
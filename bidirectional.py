@@ -0,0 +1,138 @@
+import concurrent.futures
+
+from migrator import BaseMigrator
+from coros_to_garmin import CorosToGarmin
+from garmin_to_coros import GarminToCoros
+from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key
+from constants import LEDGER_STATUS_DUPLICATE
+from ledger import DONE_STATUSES
+
+class BidirectionalSync:
+    """COROS와 Garmin 목록을 한 번씩만 조회해 양쪽에 없는 활동만 서로 옮깁니다.
+
+    두 목록을 시작 시각/기록 시간 오차범위로 맞춰 본 뒤, 짝이 없는 COROS 활동은
+    CorosToGarmin으로, 짝이 없는 Garmin 활동은 GarminToCoros로 동시에 전송합니다.
+    두 방향은 로그인한 클라이언트, 원장, FIT 저장소, 지표를 함께 쓰며, 한 방향으로 보낸
+    파일과 내용이 같은 파일은 원장 해시로 걸러 반대 방향으로 되돌려 보내지 않습니다.
+    """
+    DIRECTION = "bidirectional"
+
+    def __init__(self, output_dir=None, storage=None, config=None, in_memory=False):
+        self.to_garmin = CorosToGarmin(output_dir, storage, config, in_memory)
+        # 같은 계정/파일을 다루므로 클라이언트(로그인 세션), 원장, 저장소, 지표를 하나로 함께 씁니다.
+        self.to_coros = GarminToCoros(share_with=self.to_garmin)
+        a, b = self.to_garmin, self.to_coros
+        a.reverse_direction, b.reverse_direction = b.DIRECTION, a.DIRECTION
+        self.metrics = a.metrics
+        self.ledger = a.ledger
+        self.paired = 0
+
+    @staticmethod
+    def _list(migrator, start_date, end_date):
+        """소스 플랫폼에 로그인하고 기간 내 활동 목록 전체를 반환합니다."""
+        migrator._ensure_login('source')
+        return list(migrator.metrics.timed_iter('listing', migrator._list_activities(start_date, end_date)))
+
+    def _mark_paired(self, migrator, entries, activity):
+        """반대편에 이미 있는 활동을 원장에 중복으로 기록해 한 방향 실행에서도 다시 확인하지 않게 합니다."""
+        entry = entries.get(migrator._activity_id(activity))
+        if not entry or entry['status'] not in DONE_STATUSES:
+            self.ledger.mark(migrator.DIRECTION, migrator._activity_id(activity), LEDGER_STATUS_DUPLICATE)
+
+    def _join(self, coros_activities, garmin_activities):
+        """두 목록을 맞춰 보고 (Garmin에 없는 COROS 활동, COROS에 없는 Garmin 활동)을 반환합니다."""
+        garmin_index = ActivityIndex.build(garmin_activities, garmin_activity_key)
+        coros_index = ActivityIndex.build(coros_activities, coros_activity_key)
+        to_garmin_entries = self.ledger.entries(self.to_garmin.DIRECTION)
+        to_coros_entries = self.ledger.entries(self.to_coros.DIRECTION)
+
+        missing_on_garmin, matched_garmin = [], set()
+        for act in coros_activities:
+            key = coros_activity_key(act)
+            match = garmin_index.find(*key) if key else None
+            if match is None:
+                missing_on_garmin.append(act)
+                continue
+            self.paired += 1
+            matched_garmin.add(self.to_coros._activity_id(match[2]))
+            self._mark_paired(self.to_garmin, to_garmin_entries, act)
+            self._mark_paired(self.to_coros, to_coros_entries, match[2])
+
+        missing_on_coros = []
+        for act in garmin_activities:
+            if self.to_coros._activity_id(act) in matched_garmin:
+                continue
+            key = garmin_activity_key(act)
+            match = coros_index.find(*key) if key else None
+            if match is None:
+                missing_on_coros.append(act)
+                continue
+            # 오차범위 안에서 한 COROS 활동에 Garmin 활동 여러 개가 가까운 경우입니다.
+            self.paired += 1
+            self._mark_paired(self.to_coros, to_coros_entries, act)
+        # 중복 검사용 대상 목록을 다시 조회하지 않도록 이미 받은 목록의 색인을 넘겨 줍니다.
+        self.to_garmin.garmin_index = garmin_index
+        self.to_coros.coros_index = coros_index
+        return missing_on_garmin, missing_on_coros
+
+    def run(self, args):
+        """양방향 연동을 실행하는 메인 메서드"""
+        self.metrics.reset()
+        try:
+            self._run(args)
+        finally:
+            for migrator in (self.to_garmin, self.to_coros):
+                migrator.validator.shutdown()
+            self.metrics.finish()
+            self._export_metrics()
+
+    def _run(self, args):
+        for migrator in (self.to_garmin, self.to_coros):
+            migrator.stats.clear()
+            migrator.failures = []
+        self.to_garmin.retry_budget.reset()
+        self.paired = 0
+        self.to_garmin._cleanup_partial_files()
+        self.to_coros._cleanup_partial_files()
+
+        start_date, end_date = BaseMigrator._resolve_range(args)
+        print(f"🔍 {start_date:%Y-%m-%d} ~ {end_date:%Y-%m-%d} COROS/Garmin 활동을 한 번씩 조회합니다.")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            coros_future = executor.submit(self._list, self.to_garmin, start_date, end_date)
+            garmin_future = executor.submit(self._list, self.to_coros, start_date, end_date)
+            coros_activities, garmin_activities = coros_future.result(), garmin_future.result()
+        # 목록 조회로 두 플랫폼 모두 로그인했으므로 업로드 쪽 로그인은 생략합니다.
+        for migrator in (self.to_garmin, self.to_coros):
+            migrator._sessions.update(('source', 'destination'))
+
+        with self.metrics.phase('dedup'):
+            missing_on_garmin, missing_on_coros = self._join(coros_activities, garmin_activities)
+        print(f"🔗 COROS {len(coros_activities)}개 / Garmin {len(garmin_activities)}개 조회: "
+              f"양쪽에 있음 {self.paired}개, Garmin에 없음 {len(missing_on_garmin)}개, COROS에 없음 {len(missing_on_coros)}개")
+
+        # 두 방향을 동시에 전송합니다. 플랫폼별 제한기가 같은 플랫폼의 다운로드와 업로드를 함께 조절합니다.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(migrator._transfer, migrator._filter_with_ledger(missing), prepare=False)
+                for migrator, missing in ((self.to_garmin, missing_on_garmin), (self.to_coros, missing_on_coros))
+            ]
+            for future in futures:
+                future.result()
+
+        for migrator in (self.to_garmin, self.to_coros):
+            if migrator.stats['listed'] and migrator.stats['listed'] != migrator.stats['skipped']:
+                print(f"[{migrator.SOURCE_NAME} → {migrator.DEST_NAME}]")
+                migrator._print_summary()
+        if all(m.stats['listed'] == m.stats['skipped'] for m in (self.to_garmin, self.to_coros)):
+            print("✅ 두 플랫폼의 활동이 이미 모두 맞춰져 있습니다.")
+
+    def _export_metrics(self):
+        """두 방향의 지표를 하나로 묶어 저장합니다."""
+        counters = {'paired': self.paired}
+        for migrator in (self.to_garmin, self.to_coros):
+            counters.update({f"{migrator.DIRECTION}_{key}": value for key, value in migrator.stats.items()})
+        self.to_garmin._export_metrics(self.DIRECTION, counters)
+
+    def close(self):
+        self.ledger.close()
+        self.to_garmin.store.close()
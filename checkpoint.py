@@ -0,0 +1,81 @@
+import os
+import json
+import threading
+
+class CheckpointJournal:
+    """실행 진행 상황(실행 인자, 조회 결과, 다운로드/업로드 완료)을 JSON Lines 파일에 기록합니다.
+
+    한 줄에 한 이벤트를 덧붙이는 방식이라 실행이 도중에 끊겨도 그 직전까지의 기록이 남고,
+    마지막 줄이 잘려 있으면 읽을 때 무시합니다. 실행이 정상 종료되면 파일을 삭제합니다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """기록된 진행 상황을 반환합니다. 파일이 없으면 None."""
+        if not os.path.exists(self.path):
+            return None
+        state = {"args": None, "activities": {}, "listing_done": False, "downloaded": {}, "uploaded": set()}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                kind = event.get("type")
+                if kind == "run":
+                    state["args"] = event["args"]
+                elif kind == "activity":
+                    state["activities"][event["id"]] = event["data"]
+                elif kind == "listing_done":
+                    state["listing_done"] = True
+                elif kind == "download":
+                    state["downloaded"][event["id"]] = event["path"]
+                elif kind == "upload":
+                    state["uploaded"].add(event["id"])
+        return state if state["args"] is not None else None
+
+    def start(self, run_args):
+        """새 실행을 시작합니다. 이전 기록은 지웁니다."""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({"type": "run", "args": run_args})
+
+    def resume(self):
+        """기존 기록에 이어서 씁니다."""
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _write(self, event):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def record_listing(self, activities, id_func):
+        """조회되는 활동을 기록하면서 그대로 흘려보내고, 조회가 끝나면 완료를 기록합니다."""
+        for act in activities:
+            self._write({"type": "activity", "id": id_func(act), "data": act})
+            yield act
+        self._write({"type": "listing_done"})
+
+    def record_download(self, activity_id, file_path):
+        self._write({"type": "download", "id": activity_id, "path": file_path})
+
+    def record_upload(self, activity_id):
+        self._write({"type": "upload", "id": activity_id})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """실행이 끝까지 완료되었으므로 기록을 삭제합니다."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
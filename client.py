@@ -1,129 +1,449 @@
 import requests
+from requests.adapters import HTTPAdapter
+import io
 import hashlib
 import os
-from garminconnect import Garmin
+import tempfile
+import threading
+import functools
+import concurrent.futures
+from datetime import datetime
+from urllib.parse import urlsplit
 
 from constants import (
-    COROS_LOGIN_URL,
-    COROS_ACTIVITY_QUERY_URL,
-    COROS_DOWNLOAD_URL,
-    COROS_UPLOAD_URL,
-    COROS_SUCCESS_CODE
+    COROS_API_URL,
+    COROS_LOGIN_PATH,
+    COROS_ACTIVITY_QUERY_PATH,
+    COROS_DOWNLOAD_PATH,
+    COROS_UPLOAD_PATH,
+    COROS_SUCCESS_CODE,
+    COROS_SESSION_EXPIRED_CODE,
+    LISTING_WORKERS,
+    GARMIN_LONG_RANGE_SHARD_MONTHS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    FIT_CHUNK_SIZE
 )
+from utils import atomic_write_chunks, month_shards
+from ratelimit import get_limiter
+from retry import call_with_retry, RetryPolicy, RetryBudget
+from metrics import Metrics
+from fit import unpack_fit_payload
+
+def _garminconnect():
+    """garminconnect는 가져오는 데 시간이 오래 걸리므로 Garmin에 처음 접근할 때 불러옵니다."""
+    import garminconnect
+    return garminconnect
+
+def _default_garmin_factory(username, password):
+    return _garminconnect().Garmin(username, password)
+
+def _garminconnect_symbols():
+    """(인증 만료 예외, 원본 다운로드 형식)을 반환합니다. garminconnect가 없으면 ((), None)이며,
+    이 경우 로그인할 때 기본 팩토리가 ImportError를 알립니다."""
+    try:
+        garminconnect = _garminconnect()
+    except ImportError:
+        return (), None
+    return garminconnect.GarminConnectAuthenticationError, garminconnect.Garmin.ActivityDownloadFormat.ORIGINAL
 
 class CorosClient:
     """COROS API와 통신을 담당하는 클라이언트"""
-    def __init__(self, email, password):
+    def __init__(self, email, password, pool_size=None, timeout=None, token_cache=None, limiter=None, retry_budget=None,
+                 base_url=None, metrics=None):
         self.email = email
         self.password = password
+        self.base_url = (base_url or COROS_API_URL).rstrip('/')
+        # 엔드포인트별 요청 수/바이트/지연 시간을 기록합니다.
+        self.metrics = metrics or Metrics()
         self.token = None
+        self.token_cache = token_cache
+        self._login_lock = threading.Lock()
+        # 일시적 오류(네트워크/429/5xx)는 지수 백오프로 재시도합니다.
+        self.retry_policy = RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget()
+        # 모든 API 요청은 COROS 전용 제한기(속도 + 적응형 동시 요청 수)를 거칩니다.
+        self.limiter = limiter or get_limiter("coros")
+        # 요청마다 TCP/TLS 연결을 새로 맺지 않도록 keep-alive 연결 풀을 가진 세션을 재사용합니다.
+        # 풀 크기는 제한기가 허용하는 최대 동시 요청 수에 맞춥니다.
+        self.pool_size = pool_size or self.limiter.max_concurrency
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.session = requests.Session()
+        # API 서버와 FIT 파일 서버(fileUrl) 두 호스트의 연결을 함께 유지합니다.
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        """연결 풀을 정리합니다."""
+        self.session.close()
+
+    def login(self, force=False):
+        """COROS API에 로그인하여 토큰을 발급받습니다. 저장된 토큰이 있으면 재사용합니다."""
+        if not force and self.token_cache:
+            cached = self.token_cache.load("coros", self.email)
+            if cached and cached.get("accessToken"):
+                self.token = cached["accessToken"]
+                print("🔑 COROS 저장된 세션 사용")
+                return self.token
 
-    def login(self):
-        """COROS API에 로그인하여 토큰을 발급받습니다."""
         md5_pwd = hashlib.md5(self.password.encode('utf-8')).hexdigest()
         payload = {"account": self.email, "accountType": 2, "pwd": md5_pwd}
         headers = {"Content-Type": "application/json"}
         try:
-            res = requests.post(COROS_LOGIN_URL, json=payload, headers=headers)
-            res.raise_for_status()
+            with self.metrics.request("coros", COROS_LOGIN_PATH) as record:
+                res = self.session.post(self.base_url + COROS_LOGIN_PATH, json=payload, headers=headers, timeout=self.timeout)
+                record['received'] = len(res.content)
+                res.raise_for_status()
             res_json = res.json()
             if res_json.get("result") != COROS_SUCCESS_CODE:
                 raise Exception(f"COROS 로그인 실패: {res_json.get('message')}")
             self.token = res_json["data"]["accessToken"]
+            if self.token_cache:
+                self.token_cache.save("coros", self.email, {"accessToken": self.token})
             print("🔑 COROS 로그인 성공")
             return self.token
         except requests.exceptions.RequestException as e:
             raise Exception(f"COROS API 요청 실패: {e}")
 
-    def get_activities(self, start_day, end_day, size=50):
-        """지정된 기간의 활동 목록을 가져옵니다."""
+    def _relogin(self, stale_token):
+        """만료된 토큰으로 실패한 요청을 위해 한 번만 다시 로그인합니다."""
+        with self._login_lock:
+            # 다른 스레드가 이미 새 토큰을 받아 왔다면 그대로 사용합니다.
+            if self.token == stale_token:
+                print("🔄 COROS 세션이 만료되어 다시 로그인합니다.")
+                if self.token_cache:
+                    self.token_cache.clear("coros", self.email)
+                self.login(force=True)
+
+    def _api_request(self, method, url, headers=None, **kwargs):
+        """토큰을 붙여 API를 호출하고 JSON 응답을 반환합니다.
+
+        세션 만료 코드(COROS_SESSION_EXPIRED_CODE)가 오면 재로그인 후 한 번 더 시도합니다.
+        """
         if not self.token:
             raise Exception("COROS 클라이언트가 로그인되지 않았습니다.")
-        
-        activities = []
-        page_number = 1
-        while True:
-            url = f"{COROS_ACTIVITY_QUERY_URL}?size={size}&pageNumber={page_number}&startDay={start_day}&endDay={end_day}&modeList="
-            headers = {"accesstoken": self.token, "Content-Type": "application/json"}
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-            res_json = res.json()
-            data = res_json.get("data", {}).get("dataList", [])
-            if not data:
-                break
-            activities.extend(data)
-            page_number += 1
-        return activities
-
-    def download_fit_file(self, label_id, sport_type, output_dir):
-        """특정 활동의 FIT 파일을 다운로드합니다."""
+        def rewind_files():
+            # 업로드 파일은 처음부터 다시 전송합니다.
+            for file_tuple in (kwargs.get("files") or {}).values():
+                file_tuple[1].seek(0)
+
+        endpoint = urlsplit(url).path
+        for attempt in range(2):
+            token = self.token
+            req_headers = dict(headers or {})
+            req_headers["accesstoken"] = token
+
+            def send():
+                with self.metrics.request("coros", endpoint) as record:
+                    res = self.session.request(method, url, headers=req_headers, timeout=self.timeout, **kwargs)
+                    body = res.request.body
+                    record['sent'] = len(body) if isinstance(body, (bytes, str)) else 0
+                    record['received'] = len(res.content)
+                    res.raise_for_status()
+                    return res.json()
+
+            res_json = call_with_retry(
+                self.limiter.call, send, policy=self.retry_policy, budget=self.retry_budget,
+                description=f"COROS {endpoint}", before_retry=rewind_files
+            )
+            if res_json.get("result") != COROS_SESSION_EXPIRED_CODE or attempt == 1:
+                return res_json
+            self._relogin(token)
+            rewind_files()
+
+    def _query_page(self, start_day, end_day, size, page_number):
+        """활동 목록의 한 페이지를 조회하여 응답의 data 부분을 반환합니다."""
+        url = f"{self.base_url}{COROS_ACTIVITY_QUERY_PATH}?size={size}&pageNumber={page_number}&startDay={start_day}&endDay={end_day}&modeList="
+        res_json = self._api_request("GET", url, headers={"Content-Type": "application/json"})
+        return res_json.get("data", {}) or {}
+
+    def iter_activities(self, start_day, end_day, size=50, max_workers=LISTING_WORKERS):
+        """지정된 기간의 활동을 페이지 순서대로 하나씩 반환하는 제너레이터.
+
+        첫 페이지 응답의 전체 페이지 수(totalPage 또는 count)를 보고 나머지 페이지를
+        동시에 요청하므로, 호출 측은 뒤 페이지가 로딩되는 동안 첫 페이지부터 처리할 수 있습니다.
+        """
         if not self.token:
             raise Exception("COROS 클라이언트가 로그인되지 않았습니다.")
 
-        url = f"{COROS_DOWNLOAD_URL}?labelId={label_id}&sportType={sport_type}&fileType=4"
-        headers = {"accessToken": self.token}
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
-        res_json = res.json()
+        first = self._query_page(start_day, end_day, size, 1)
+        data = first.get("dataList", [])
+        if not data:
+            return
 
+        total_pages = first.get("totalPage")
+        if total_pages is None and first.get("count") is not None:
+            total_pages = -(-int(first["count"]) // size)
+
+        if total_pages is None:
+            # 페이지 정보가 없는 응답이면 빈 페이지가 나올 때까지 순차 조회합니다.
+            yield from data
+            page_number = 2
+            while True:
+                data = self._query_page(start_day, end_day, size, page_number).get("dataList", [])
+                if not data:
+                    break
+                yield from data
+                page_number += 1
+            return
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [executor.submit(self._query_page, start_day, end_day, size, page)
+                       for page in range(2, int(total_pages) + 1)]
+            yield from data
+            for future in futures:
+                yield from future.result().get("dataList", [])
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_activities(self, start_day, end_day, size=50):
+        """지정된 기간의 활동 목록을 가져옵니다."""
+        return list(self.iter_activities(start_day, end_day, size))
+
+    def _fit_file_url(self, label_id, sport_type):
+        """활동 FIT 파일의 다운로드 URL을 조회합니다. 없으면 None."""
+        url = f"{self.base_url}{COROS_DOWNLOAD_PATH}?labelId={label_id}&sportType={sport_type}&fileType=4"
+        res_json = self._api_request("GET", url)
         if res_json.get("result") == COROS_SUCCESS_CODE and "fileUrl" in res_json.get("data", {}):
-            file_url = res_json["data"]["fileUrl"]
-            fit_res = requests.get(file_url)
-            fit_res.raise_for_status()
-            return fit_res.content
+            return res_json["data"]["fileUrl"]
         return None
 
+    def download_fit_file(self, label_id, sport_type, dest_path):
+        """특정 활동의 FIT 파일을 dest_path로 스트리밍 다운로드합니다.
+
+        청크 단위로 임시 파일에 기록한 뒤 원자적으로 이름을 바꾸며,
+        (바이트 수, SHA-256 해시)를 반환합니다. 파일 URL이 없으면 None.
+        """
+        file_url = self._fit_file_url(label_id, sport_type)
+        if file_url:
+            def fetch_file():
+                # 스트리밍 도중 연결이 끊기면 임시 파일을 버리고 처음부터 다시 받습니다.
+                with self.metrics.request("coros", "fileUrl") as record, \
+                        self.session.get(file_url, timeout=self.timeout, stream=True) as fit_res:
+                    fit_res.raise_for_status()
+                    result = atomic_write_chunks(dest_path, fit_res.iter_content(chunk_size=FIT_CHUNK_SIZE))
+                    record['received'] = result[0]
+                    return result
+
+            return call_with_retry(self.limiter.call, fetch_file, policy=self.retry_policy,
+                                   budget=self.retry_budget, description=f"COROS FIT {label_id}")
+        return None
+
+    def download_fit_data(self, label_id, sport_type):
+        """특정 활동의 FIT 파일을 디스크에 쓰지 않고 메모리로 받아 바이트로 반환합니다. 파일 URL이 없으면 None."""
+        file_url = self._fit_file_url(label_id, sport_type)
+        if not file_url:
+            return None
+
+        def fetch_data():
+            with self.metrics.request("coros", "fileUrl") as record:
+                fit_res = self.session.get(file_url, timeout=self.timeout)
+                fit_res.raise_for_status()
+                record['received'] = len(fit_res.content)
+                return fit_res.content
+
+        return call_with_retry(self.limiter.call, fetch_data, policy=self.retry_policy,
+                               budget=self.retry_budget, description=f"COROS FIT {label_id}")
+
+    def _upload(self, file_name, file_obj):
+        files = {"file": (file_name, file_obj, "application/octet-stream")}
+        res_json = self._api_request("POST", self.base_url + COROS_UPLOAD_PATH, files=files)
+        if res_json.get("result") == COROS_SUCCESS_CODE:
+            return True, res_json.get('message', '성공')
+        else:
+            return False, res_json.get('message', '알 수 없는 오류')
+
     def upload_activity(self, file_path):
         """FIT 파일을 COROS에 업로드합니다."""
-        if not self.token:
-            raise Exception("COROS 클라이언트가 로그인되지 않았습니다.")
-
-        url = COROS_UPLOAD_URL
-        headers = {"accesstoken": self.token}
         with open(file_path, 'rb') as f:
-            files = {"file": (os.path.basename(file_path), f, "application/octet-stream")}
-            res = requests.post(url, headers=headers, files=files)
-            res.raise_for_status()
-            res_json = res.json()
-            if res_json.get("result") == COROS_SUCCESS_CODE:
-                return True, res_json.get('message', '성공')
-            else:
-                return False, res_json.get('message', '알 수 없는 오류')
+            return self._upload(os.path.basename(file_path), f)
+
+    def upload_activity_data(self, file_name, data):
+        """메모리에 있는 FIT 데이터를 임시 파일 없이 COROS에 업로드합니다."""
+        return self._upload(file_name, io.BytesIO(data))
 
 class GarminClient:
     """Garmin Connect API와 통신을 담당하는 클라이언트"""
-    def __init__(self, username, password):
+    def __init__(self, username, password, token_cache=None, limiter=None, retry_budget=None, client_factory=None,
+                 metrics=None):
         self.username = username
         self.password = password
         self.client = None
+        self.metrics = metrics or Metrics()
+        # garminconnect.Garmin 대신 같은 메서드를 가진 객체(예: 벤치마크용 모의 클라이언트)를 만들 수 있습니다.
+        self.client_factory = client_factory or _default_garmin_factory
+        # 인증 만료 예외와 원본 다운로드 형식은 garminconnect를 쓸 때만 한 번 불러 둡니다.
+        # 다른 팩토리를 쓰면 garminconnect를 불러오지 않으므로 설치되어 있지 않아도 됩니다.
+        self._auth_errors, self._original_format = (), None
+        if client_factory is None:
+            self._auth_errors, self._original_format = _garminconnect_symbols()
+        self.token_cache = token_cache
+        self._login_lock = threading.Lock()
+        self.retry_policy = RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget()
+        # garminconnect 호출은 Garmin 전용 제한기를 거쳐 COROS와 별도의 예산을 사용합니다.
+        self.limiter = limiter or get_limiter("garmin")
+
+    def _auth_store(self, client=None):
+        """garminconnect 버전에 따라 토큰을 보관하는 인증 객체(garth)를 반환합니다."""
+        client = client or self.client
+        return getattr(client, 'garth', None) or client.client
 
-    def login(self):
-        """Garmin Connect에 로그인합니다."""
+    def login(self, force=False):
+        """Garmin Connect에 로그인합니다. 저장된 토큰이 있으면 SSO 로그인을 생략합니다."""
+        token_dir = self.token_cache.token_dir("garmin", self.username) if self.token_cache else None
+        if not force and token_dir and os.listdir(token_dir):
+            try:
+                self.client = self.client_factory(self.username, self.password)
+                with self.metrics.request("garmin", "login"):
+                    self.client.login(token_dir)
+                print("🔑 Garmin 저장된 세션 사용")
+                return True
+            except Exception:
+                # 토큰이 만료되었거나 손상된 경우 계정 정보로 다시 로그인합니다.
+                self.client = None
         try:
-            self.client = Garmin(self.username, self.password)
-            self.client.login()
+            self.client = self.client_factory(self.username, self.password)
+            with self.metrics.request("garmin", "login"):
+                self.client.login()
+            if token_dir:
+                self._auth_store().dump(token_dir)
             print("🔑 Garmin 로그인 성공")
             return True
         except Exception as e:
             self.client = None
             raise Exception(f"Garmin 로그인 실패: {e}")
 
+    def _call(self, method_name, *args, sent_bytes=0, **kwargs):
+        """garminconnect 메서드를 호출하고, 인증 만료 시 한 번 다시 로그인한 뒤 재시도합니다.
+
+        sent_bytes는 지표에 기록할 전송 바이트 수(업로드 파일 크기)입니다.
+        """
+        if not self.client:
+            raise Exception("Garmin 클라이언트가 로그인되지 않았습니다.")
+        client = self.client
+        try:
+            return self._call_with_retry(client, method_name, *args, sent_bytes=sent_bytes, **kwargs)
+        except self._auth_errors:
+            with self._login_lock:
+                # 다른 스레드가 이미 다시 로그인했다면 새 클라이언트를 그대로 사용합니다.
+                if self.client is client:
+                    print("🔄 Garmin 세션이 만료되어 다시 로그인합니다.")
+                    self.login(force=True)
+            return self._call_with_retry(self.client, method_name, *args, sent_bytes=sent_bytes, **kwargs)
+
+    def _call_with_retry(self, client, method_name, *args, sent_bytes=0, **kwargs):
+        # 메서드 이름 대신 함수를 넘기면 첫 인자로 garminconnect 클라이언트를 받아 호출합니다.
+        if callable(method_name):
+            func, description = functools.partial(method_name, client), method_name.__name__
+        else:
+            func, description = getattr(client, method_name), method_name
+
+        def tracked(*call_args, **call_kwargs):
+            with self.metrics.request("garmin", description, sent=sent_bytes) as record:
+                result = func(*call_args, **call_kwargs)
+                if isinstance(result, (bytes, bytearray)):
+                    record['received'] = len(result)
+                return result
+
+        return call_with_retry(
+            self.limiter.call, tracked, *args,
+            policy=self.retry_policy, budget=self.retry_budget, description=f"Garmin {description}", **kwargs
+        )
+
     def get_activities_by_date(self, start_date, end_date):
         """지정된 기간의 활동 목록을 가져옵니다."""
+        return self._call('get_activities_by_date', start_date, end_date)
+
+    def iter_activities_by_date(self, start_date, end_date, shard_months=None, max_workers=LISTING_WORKERS):
+        """기간을 월/분기 단위 구간으로 나눠 동시에 조회하고, 구간이 끝나는 대로 활동을 반환하는 제너레이터.
+
+        구간 간 순서는 보장하지 않습니다. shard_months를 지정하지 않으면
+        1년 이하의 기간은 월 단위, 그보다 긴 기간은 분기 단위로 나눕니다.
+        """
         if not self.client:
             raise Exception("Garmin 클라이언트가 로그인되지 않았습니다.")
-        return self.client.get_activities_by_date(start_date, end_date)
+
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        if shard_months is None:
+            span_months = (end.year - start.year) * 12 + (end.month - start.month) + 1
+            shard_months = 1 if span_months <= 12 else GARMIN_LONG_RANGE_SHARD_MONTHS
+        shards = list(month_shards(start, end, shard_months))
+        if len(shards) == 1:
+            yield from self.get_activities_by_date(start_date, end_date)
+            return
+
+        seen = set()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                executor.submit(self.get_activities_by_date, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'))
+                for s, e in shards
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                for act in future.result() or []:
+                    # 구간 경계에 걸친 활동이 두 번 반환되는 경우를 대비합니다.
+                    if act.get('activityId') in seen:
+                        continue
+                    seen.add(act.get('activityId'))
+                    yield act
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def download_activity(self, activity_id):
-        """특정 활동을 FIT 파일로 다운로드합니다."""
-        if not self.client:
-            raise Exception("Garmin 클라이언트가 로그인되지 않았습니다.")
-        return self.client.download_activity(
-            activity_id, dl_fmt=self.client.ActivityDownloadFormat.ORIGINAL
-        )
+        """특정 활동의 원본 파일을 다운로드합니다. Garmin은 원본을 zip으로 묶어 보냅니다."""
+        if self._original_format is None:
+            return self._call('download_activity', activity_id)
+        return self._call('download_activity', activity_id, dl_fmt=self._original_format)
+
+    def download_fit_data(self, activity_id):
+        """특정 활동의 원본을 받아 zip을 메모리에서 풀고 헤더를 확인한 활동 FIT 데이터를 반환합니다. 파일이 없으면 None.
+
+        zip 안에 FIT 파일이 여러 개면 활동 파일 하나만 고릅니다 (fit.unpack_fit_payload).
+        FIT 파일이 아니거나 손상된 경우 fit.FitError가, FIT 파일이 없는 원본이면 fit.NoFitFileError가 발생합니다.
+        """
+        payload = self.download_activity(activity_id)
+        if not payload:
+            return None
+        return unpack_fit_payload(payload)
+
+    def download_fit_file(self, activity_id, dest_path):
+        """특정 활동을 dest_path에 원자적으로 저장하고 (바이트 수, SHA-256 해시)를 반환합니다."""
+        data = self.download_fit_data(activity_id)
+        if not data:
+            return None
+        return atomic_write_chunks(dest_path, [data])
 
     def upload_activity(self, file_path):
         """FIT 파일을 Garmin Connect에 업로드합니다."""
+        return self._call('upload_activity', file_path, sent_bytes=os.path.getsize(file_path))
+
+    def upload_activity_data(self, file_name, data):
+        """메모리에 있는 FIT 데이터를 임시 파일 없이 Garmin Connect에 업로드합니다.
+
+        garminconnect의 내부 업로드 요청(인증 객체의 post, garmin_connect_upload)을 쓸 수 없는
+        버전이면 임시 파일에 쓴 뒤 공개 API인 upload_activity로 업로드합니다.
+        """
         if not self.client:
             raise Exception("Garmin 클라이언트가 로그인되지 않았습니다.")
-        return self.client.upload_activity(file_path)
+        if not self._supports_data_upload(self.client):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                file_path = os.path.join(tmp_dir, os.path.basename(file_name))
+                with open(file_path, 'wb') as f:
+                    f.write(data)
+                return self.upload_activity(file_path)
+
+        def upload_fit_data(client):
+            # garminconnect의 upload_activity와 같은 요청이지만 파일 대신 메모리 버퍼를 보냅니다.
+            files = {"file": (file_name, io.BytesIO(data))}
+            return self._auth_store(client).post("connectapi", client.garmin_connect_upload, files=files, api=True)
+        return self._call(upload_fit_data, sent_bytes=len(data))
+
+    @staticmethod
+    def _supports_data_upload(client):
+        """메모리 버퍼 업로드에 필요한 garminconnect 내부 속성이 있는지 확인합니다."""
+        auth = getattr(client, 'garth', None) or getattr(client, 'client', None)
+        return callable(getattr(auth, 'post', None)) and bool(getattr(client, 'garmin_connect_upload', None))
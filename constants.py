@@ -1,11 +1,11 @@
 # constants.py
 
-# COROS API Endpoints
+# COROS API Endpoints (기본 주소는 config.py의 COROS_API_URL로 바꿀 수 있음, 예: 벤치마크용 모의 서버)
 COROS_API_URL = "https://teamapi.coros.com"
-COROS_LOGIN_URL = f"{COROS_API_URL}/account/login"
-COROS_ACTIVITY_QUERY_URL = f"{COROS_API_URL}/activity/query"
-COROS_DOWNLOAD_URL = f"{COROS_API_URL}/activity/detail/download"
-COROS_UPLOAD_URL = f"{COROS_API_URL}/activity/import"
+COROS_LOGIN_PATH = "/account/login"
+COROS_ACTIVITY_QUERY_PATH = "/activity/query"
+COROS_DOWNLOAD_PATH = "/activity/detail/download"
+COROS_UPLOAD_PATH = "/activity/import"
 
 # COROS API Status Codes
 COROS_SUCCESS_CODE = "0000"
@@ -15,3 +15,73 @@ COROS_SESSION_EXPIRED_CODE = "1000" # 예시, 실제 코드에 따라 조정 필
 DEFAULT_OUTPUT_DIR = "./exports"
 COROS_DIR_NAME = "coros"
 GARMIN_DIR_NAME = "garmin"
+
+# Sync Ledger
+LEDGER_FILENAME = "sync_ledger.db"
+LEDGER_STATUS_DOWNLOADED = "downloaded"
+LEDGER_STATUS_UPLOADED = "uploaded"
+LEDGER_STATUS_DUPLICATE = "duplicate"
+LEDGER_STATUS_FAILED = "failed"
+
+# Checkpoint (중단된 실행 이어하기, 방향별 출력 폴더에 저장)
+CHECKPOINT_FILENAME = ".checkpoint.jsonl"
+
+# Watch Mode (--watch, 인증을 유지한 채 주기적으로 새 활동만 조회)
+WATCH_INTERVAL_SEC = 300           # 기본 확인 주기 (초)
+WATCH_MAX_INTERVAL_SEC = 3600      # 새 활동이 없을 때 늘어나는 확인 주기의 상한 (초)
+WATCH_BACKOFF_FACTOR = 2           # 새 활동이 없을 때마다 확인 주기를 늘리는 배수
+WATCH_JITTER = 0.2                 # 확인 주기 무작위 편차 (±20%, 여러 실행이 같은 시각에 몰리지 않도록)
+WATCH_INITIAL_DAYS = 1             # 커서가 없을 때 처음 조회할 기간 (일)
+WATCH_OVERLAP_DAYS = 1             # 늦게 동기화된 활동을 놓치지 않도록 커서보다 앞서 다시 조회할 기간 (일)
+WATCH_MAX_ATTEMPTS = 3             # 이 횟수만큼 실패한 활동은 건너뛰고 커서를 옮깁니다 (계속 실패하는 활동이 커서를 막지 않도록)
+
+# Batch Mode (--batch, 여러 계정 쌍을 한 프로세스에서 공유 작업자 풀로 연동)
+BATCH_MAX_ACCOUNTS = 8             # 동시에 진행하는 계정 수 (로그인/목록 조회 단계)
+BATCH_REPORT_FILENAME = "batch_report.json"  # OUTPUT_DIR 아래 계정별 결과 보고서
+
+# Content-addressed FIT Store (OUTPUT_DIR 아래, 내용 해시 이름의 원본 파일 보관)
+FIT_STORE_DIRNAME = ".fitstore"
+FIT_STORAGE_FILES = "files"      # 파일별 저장 (폴더의 파일은 저장소 객체의 하드 링크)
+FIT_STORAGE_ARCHIVE = "archive"  # 월별 압축 보관 파일에 모아 저장
+
+# FIT Validation (업로드 전 헤더/데이터 크기/CRC 검사, 손상된 파일은 방향별 출력 폴더 아래에 격리)
+QUARANTINE_DIRNAME = "quarantine"
+QUARANTINE_REPORT_FILENAME = "report.jsonl"
+VALIDATION_CHUNK_SIZE = 16         # 업로드 전용 일괄 검사 시 작업 프로세스에 한 번에 넘기는 파일 수
+
+# Metrics (실행이 끝날 때 OUTPUT_DIR/metrics 또는 config.py의 METRICS_DIR에 기록)
+METRICS_DIR_NAME = "metrics"
+METRICS_PREFIX = "coros_garmin_sync"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # 요청 지연 시간 히스토그램 버킷 상한(초)
+
+# Duplicate Detection
+DEDUP_START_TOLERANCE_SEC = 60     # 시작 시각 허용 오차 (±1분)
+DEDUP_DURATION_TOLERANCE_SEC = 15  # 기록 시간 허용 오차
+
+# Concurrency / HTTP
+# 플랫폼별 요청 예산: 초당 요청 수(rate/burst)와 동시 요청 수 범위.
+# 동시 요청 수는 응답 상태에 따라 min~max 사이에서 자동 조절되며,
+# 다운로드/업로드 스레드 수는 해당 플랫폼의 max_concurrency를 따릅니다.
+RATE_LIMITS = {
+    "coros": {"rate": 10, "burst": 10, "min_concurrency": 1, "max_concurrency": 8, "initial_concurrency": 4},
+    "garmin": {"rate": 3, "burst": 5, "min_concurrency": 1, "max_concurrency": 6, "initial_concurrency": 3},
+}
+SLOW_RESPONSE_SEC = 15             # 이보다 느린 응답은 과부하 신호로 간주
+THROTTLE_COOLDOWN_SEC = 5          # 429/5xx 응답 후 새 요청을 멈추는 시간 (초)
+LISTING_WORKERS = 4                # 목록 페이지 동시 조회 수
+GARMIN_LONG_RANGE_SHARD_MONTHS = 3 # 1년을 넘는 Garmin 목록 조회 시 구간 크기 (개월)
+HTTP_CONNECT_TIMEOUT = 10          # 연결 타임아웃 (초)
+HTTP_READ_TIMEOUT = 60             # 응답 대기 타임아웃 (초)
+FIT_CHUNK_SIZE = 64 * 1024         # FIT 파일 스트리밍 단위 (바이트)
+PIPELINE_QUEUE_SIZE = 10            # 다운로드→업로드 대기열 최대 길이
+MEMORY_BUDGET_MB = 64              # --in-memory 모드에서 업로드 대기 중인 FIT 데이터 총량 상한 (MB)
+MEMORY_ESTIMATE_BYTES = 256 * 1024 # 크기를 모르는 다운로드에 미리 예약하는 메모리 (첫 다운로드 전 추정치)
+
+# Token Cache
+TOKEN_CACHE_DIR = "~/.coros_garmin_sync/tokens"  # 로그인 토큰 보관 폴더 (소유자 전용 권한)
+
+# Retry
+RETRY_MAX_ATTEMPTS = 4             # 호출당 최대 시도 횟수 (첫 시도 포함)
+RETRY_BASE_DELAY = 1.0             # 첫 재시도 대기 상한 (초), 이후 2배씩 증가
+RETRY_MAX_DELAY = 30.0             # 재시도 대기 상한 (초)
+RETRY_GLOBAL_BUDGET = 100          # 한 번의 실행에서 허용하는 전체 재시도 횟수
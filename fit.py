@@ -0,0 +1,260 @@
+import io
+import os
+import mmap
+import struct
+import zipfile
+
+# FIT 타임스탬프 기준 시각(1989-12-31 00:00:00 UTC)의 Unix 시간
+FIT_EPOCH_OFFSET = 631065600
+
+# file_id 메시지의 파일 종류 (activity)
+FIT_FILE_TYPE_ACTIVITY = 4
+
+# 전역 메시지 번호
+MESG_FILE_ID = 0
+MESG_SESSION = 18
+MESG_ACTIVITY = 34
+
+# 메시지별로 읽을 필드 번호 → 이름. 그 밖의 필드와 메시지는 크기만 보고 건너뜁니다.
+_WANTED_FIELDS = {
+    MESG_FILE_ID: {0: 'file_type', 1: 'manufacturer', 2: 'product', 3: 'serial_number', 4: 'time_created'},
+    MESG_SESSION: {2: 'start_time', 5: 'sport', 7: 'total_elapsed_time', 8: 'total_timer_time', 253: 'timestamp'},
+    MESG_ACTIVITY: {0: 'total_timer_time', 5: 'local_timestamp', 253: 'timestamp'},
+}
+
+# zip 파일 시그니처 (Garmin ORIGINAL 다운로드는 원본 파일을 zip으로 묶어 보냅니다)
+ZIP_MAGIC = b'PK\x03\x04'
+
+# 크기별 부호 없는 정수 형식과 무효값
+_UINT_FORMATS = {1: ('B', 0xFF), 2: ('H', 0xFFFF), 4: ('I', 0xFFFFFFFF)}
+
+class FitError(Exception):
+    """FIT 파일 구조가 올바르지 않을 때 발생합니다."""
+    pass
+
+class NoFitFileError(FitError):
+    """원본에 FIT 파일이 없을 때(GPX/TCX로 기록된 활동 등) 발생합니다. 다시 받아도 결과가 같습니다."""
+    pass
+
+def _parse_header(buf):
+    """파일 헤더를 읽어 (헤더 크기, 데이터 크기)를 반환합니다."""
+    if len(buf) < 12:
+        raise FitError("파일이 FIT 헤더보다 짧습니다.")
+    header_size = buf[0]
+    if header_size not in (12, 14) or bytes(buf[8:12]) != b'.FIT':
+        raise FitError("FIT 헤더가 아닙니다.")
+    data_size = struct.unpack_from('<I', buf, 4)[0]
+    if len(buf) < header_size + data_size:
+        raise FitError("FIT 파일이 헤더에 기록된 크기보다 짧습니다 (잘린 파일).")
+    return header_size, data_size
+
+def _parse_records(buf, header_size, data_size):
+    """레코드를 순회하며 관심 메시지의 필드만 디코딩해 {전역 메시지 번호: [필드 dict]}로 반환합니다."""
+    end = header_size + data_size
+    pos = header_size
+    # 로컬 메시지 타입(0~15)별 데이터 크기와 디코딩 정보. 대부분을 차지하는 record 메시지는
+    # 크기만 보고 건너뛰므로 반복문을 최대한 가볍게 유지합니다.
+    sizes = [None] * 16
+    decoders = [None] * 16
+    messages = {MESG_FILE_ID: [], MESG_SESSION: [], MESG_ACTIVITY: []}
+    while pos < end:
+        record_header = buf[pos]
+        if record_header & 0x80:
+            # 압축 타임스탬프 헤더: 로컬 타입 2비트, 정의된 데이터 메시지가 뒤따릅니다.
+            local_type = (record_header >> 5) & 0x03
+        elif record_header & 0x40:
+            pos = _parse_definition(buf, pos, end, sizes, decoders)
+            continue
+        else:
+            local_type = record_header & 0x0F
+
+        size = sizes[local_type]
+        if size is None:
+            raise FitError(f"정의되지 않은 로컬 메시지 타입: {local_type}")
+        decoder = decoders[local_type]
+        if decoder is not None and pos + 1 + size <= end:
+            global_num, fields = decoder
+            values = {}
+            for fmt, invalid, offset, name in fields:
+                value = struct.unpack_from(fmt, buf, pos + 1 + offset)[0]
+                if value != invalid and not (name == 'serial_number' and value == 0):
+                    values[name] = value
+            messages[global_num].append(values)
+        pos += 1 + size
+    return messages
+
+def _parse_definition(buf, pos, end, sizes, decoders):
+    """정의 메시지를 읽어 로컬 타입의 크기/디코딩 정보를 갱신하고 다음 레코드 위치를 반환합니다."""
+    record_header = buf[pos]
+    local_type = record_header & 0x0F
+    if pos + 6 > end:
+        raise FitError("정의 메시지가 잘렸습니다.")
+    endian = '>' if buf[pos + 2] else '<'
+    global_num = struct.unpack_from(endian + 'H', buf, pos + 3)[0]
+    num_fields = buf[pos + 5]
+    pos += 6
+    wanted = _WANTED_FIELDS.get(global_num)
+    fields, offset = [], 0
+    for i in range(num_fields):
+        field_num, size = buf[pos + 3 * i], buf[pos + 3 * i + 1]
+        if wanted and field_num in wanted and size in _UINT_FORMATS:
+            fmt, invalid = _UINT_FORMATS[size]
+            fields.append((endian + fmt, invalid, offset, wanted[field_num]))
+        offset += size
+    pos += 3 * num_fields
+    if record_header & 0x20:
+        # 개발자 데이터 필드는 크기만 더합니다.
+        num_dev = buf[pos]
+        offset += sum(buf[pos + 3 * i + 2] for i in range(num_dev))
+        pos += 1 + 3 * num_dev
+    sizes[local_type] = offset
+    decoders[local_type] = (global_num, fields) if wanted else None
+    return pos
+
+def _summarize(messages):
+    """디코딩한 메시지에서 중복 검사에 필요한 메타데이터를 정리합니다."""
+    sessions = [m for m in messages[MESG_SESSION] if 'start_time' in m]
+    file_id = messages[MESG_FILE_ID][0] if messages[MESG_FILE_ID] else {}
+    activity = messages[MESG_ACTIVITY][0] if messages[MESG_ACTIVITY] else {}
+
+    meta = {
+        'start_time': None,      # 시작 시각 (Unix 초, UTC)
+        'elapsed': None,         # 총 경과 시간 (초)
+        'sport': None,           # FIT sport 열거값
+        'serial_number': file_id.get('serial_number'),
+        'manufacturer': file_id.get('manufacturer'),
+        'product': file_id.get('product'),
+        'file_type': file_id.get('file_type'),  # FIT 파일 종류 (4: activity)
+        'utc_offset': None,      # 현지 시각 - UTC (초)
+    }
+    if sessions:
+        # 멀티스포츠는 여러 세션으로 기록되므로 첫 시작 시각과 경과 시간 합계를 사용합니다.
+        meta['start_time'] = min(s['start_time'] for s in sessions) + FIT_EPOCH_OFFSET
+        elapsed = [s.get('total_elapsed_time', s.get('total_timer_time')) for s in sessions]
+        if all(e is not None for e in elapsed):
+            meta['elapsed'] = sum(elapsed) / 1000.0
+        meta['sport'] = sessions[0].get('sport')
+    elif 'time_created' in file_id:
+        meta['start_time'] = file_id['time_created'] + FIT_EPOCH_OFFSET
+    if 'local_timestamp' in activity and 'timestamp' in activity:
+        meta['utc_offset'] = activity['local_timestamp'] - activity['timestamp']
+    return meta
+
+def parse_fit_metadata(data):
+    """FIT 바이트(bytes/memoryview/mmap)에서 시작 시각, 경과 시간, 종목, 시리얼 번호를 추출합니다."""
+    header_size, data_size = _parse_header(data)
+    return _summarize(_parse_records(data, header_size, data_size))
+
+def unpack_fit_payload(data):
+    """다운로드한 데이터에서 업로드할 활동 FIT 파일 하나를 꺼내 반환합니다.
+
+    zip이면 디스크에 풀지 않고 메모리에서 안의 .fit 파일을 꺼내고, 아니면 데이터 그대로를 FIT 파일로 봅니다.
+    zip 안에 FIT 파일이 여러 개면 _pick_activity_fit으로 활동 파일 하나만 고릅니다.
+    FIT 헤더와 데이터 크기를 확인해 올바르지 않으면 FitError를, zip 안에 FIT 파일이
+    아예 없으면(GPX/TCX 원본 등) NoFitFileError를 발생시킵니다.
+    """
+    if bytes(data[:4]) != ZIP_MAGIC:
+        _parse_header(data)
+        return data
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            fits = [archive.read(info) for info in members if info.filename.lower().endswith('.fit')]
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, EOFError) as e:
+        raise FitError(f"zip 파일을 풀 수 없습니다: {e}")
+    if not fits:
+        names = ", ".join(info.filename for info in members) or "빈 zip"
+        raise NoFitFileError(f"zip 안에 FIT 파일이 없습니다 ({names}).")
+    for fit in fits:
+        _parse_header(fit)
+    return _pick_activity_fit(fits)
+
+def _pick_activity_fit(fits):
+    """FIT 파일 중 활동 파일(file_id 종류가 activity)을 고릅니다.
+
+    COROS 가져오기는 활동 하나에 FIT 파일 하나를 받으므로 여러 파일을 이어 붙이지 않습니다.
+    활동 파일이 여럿이거나 종류를 알 수 없으면 기록이 가장 많은(가장 큰) 파일을 사용합니다.
+    """
+    if len(fits) == 1:
+        return fits[0]
+    activities = [fit for fit in fits
+                  if (read_fit_metadata_bytes(fit) or {}).get('file_type') == FIT_FILE_TYPE_ACTIVITY]
+    return max(activities or fits, key=len)
+
+def _build_crc_table():
+    # FIT 규격의 CRC-16 (다항식 0xA001, 초기값 0)을 바이트 단위로 계산하기 위한 표
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+_CRC_TABLE = _build_crc_table()
+
+def fit_crc(data, crc=0):
+    """FIT 규격의 CRC-16을 계산합니다."""
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+def check_fit_integrity(data):
+    """FIT 헤더, 헤더에 기록된 데이터 크기, 헤더/파일 CRC를 확인합니다. 손상되었으면 FitError.
+
+    FIT 파일 여러 개를 이어 붙인 연결(chained) 파일은 각 파일을 차례로 확인합니다.
+    """
+    view = memoryview(data)
+    pos = 0
+    while pos < len(view):
+        header_size, data_size = _parse_header(view[pos:])
+        if header_size == 14:
+            header_crc = struct.unpack_from('<H', view, pos + 12)[0]
+            # 헤더 CRC 0은 "계산하지 않음"을 뜻합니다.
+            if header_crc and header_crc != fit_crc(view[pos:pos + 12]):
+                raise FitError("FIT 헤더 CRC가 일치하지 않습니다.")
+        end = pos + header_size + data_size
+        if end + 2 > len(view):
+            raise FitError("FIT 파일 끝의 CRC가 없습니다 (잘린 파일).")
+        if struct.unpack_from('<H', view, end)[0] != fit_crc(view[pos:end]):
+            raise FitError("FIT 파일 CRC가 일치하지 않습니다 (손상된 파일).")
+        pos = end + 2
+
+def validate_fit_data(data):
+    """FIT 데이터의 무결성 오류 메시지를 반환합니다. 정상이면 None. (프로세스 풀 작업 함수)"""
+    try:
+        check_fit_integrity(data)
+    except (FitError, struct.error) as e:
+        return str(e)
+    return None
+
+def validate_fit_file(file_path):
+    """FIT 파일의 무결성 오류 메시지를 반환합니다. 정상이면 None. (프로세스 풀 작업 함수)"""
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 12:
+                return "파일이 FIT 헤더보다 짧습니다."
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return validate_fit_data(buf)
+    except OSError as e:
+        return f"파일을 읽을 수 없습니다: {e}"
+
+def read_fit_metadata_bytes(data):
+    """메모리에 있는 FIT 데이터의 메타데이터를 읽습니다. FIT 데이터가 아니거나 손상되었으면 None."""
+    try:
+        return parse_fit_metadata(data)
+    except (ValueError, FitError, struct.error, IndexError):
+        return None
+
+def read_fit_metadata(file_path):
+    """FIT 파일의 메타데이터를 읽습니다. FIT 파일이 아니거나 손상되었으면 None."""
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 12:
+                return None
+            # 파일 전체를 읽어 들이지 않고 메모리 매핑으로 필요한 부분만 접근합니다.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return parse_fit_metadata(buf)
+    except (OSError, ValueError, FitError, struct.error, IndexError):
+        return None
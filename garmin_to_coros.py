@@ -1,75 +1,75 @@
 import os
-import concurrent.futures
-from datetime import datetime, timedelta
 
 from migrator import BaseMigrator
+from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key, fit_activity_key
 from constants import GARMIN_DIR_NAME
 
 class GarminToCoros(BaseMigrator):
     """Garmin에서 COROS로 활동을 이전합니다."""
-    def __init__(self, output_dir=None):
-        super().__init__(GARMIN_DIR_NAME, output_dir)
+    DIRECTION = "garmin2coros"
+    SOURCE_NAME = "Garmin"
+    DEST_NAME = "COROS"
+    # COROS 목록 조회가 가벼우므로 먼저 조회해 두고, 이미 있는 활동은 Garmin에서 받지도 않습니다.
+    DEDUP_BEFORE_DOWNLOAD = True
 
-    def _download_activities(self, args):
-        """Garmin API에서 활동을 다운로드합니다."""
+    def __init__(self, output_dir=None, storage=None, config=None, in_memory=False, share_with=None):
+        super().__init__(GARMIN_DIR_NAME, output_dir, storage, config, in_memory, share_with)
+        self.coros_index = None
+
+    def _login_source(self):
         self.garmin_client.login()
 
-        if args.day:
-            start_date = end_date = datetime.strptime(args.day, '%Y%m%d').strftime('%Y-%m-%d')
-        elif args.month:
-            year, month = int(args.month[:4]), int(args.month[4:6])
-            start_date = datetime(year, month, 1).strftime('%Y-%m-%d')
-            next_month = datetime(year, month, 1).replace(day=28) + timedelta(days=4)
-            end_date = (next_month - timedelta(days=next_month.day)).strftime('%Y-%m-%d')
-        elif args.all:
-            start_date = "2010-01-01"
-            end_date = datetime.now().strftime('%Y-%m-%d')
-        else:
-            start_date = end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    def _login_destination(self):
+        self.coros_client.login()
 
-        print(f"🔍 {start_date} ~ {end_date} Garmin 활동을 조회합니다.")
-        activities = self.garmin_client.get_activities_by_date(start_date, end_date)
+    def _list_activities(self, start_date, end_date):
+        """Garmin API에서 기간을 나눠 활동 목록을 조회합니다. 구간별 조회가 끝나는 대로 다운로드가 시작됩니다."""
+        return self.garmin_client.iter_activities_by_date(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
 
-        if not activities:
-            print("⚠️ 해당 기간에 다운로드할 활동이 없습니다.")
-            return [], None
+    def _activity_id(self, activity):
+        return str(activity['activityId'])
 
-        print(f"🚀 총 {len(activities)}개 활동 다운로드 시작")
-        fit_files = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_map = {executor.submit(self.garmin_client.download_activity, act['activityId']): act for act in activities}
-            for future in concurrent.futures.as_completed(future_map):
-                activity = future_map[future]
-                try:
-                    fit_content = future.result()
-                    if fit_content:
-                        date_label = activity["startTimeLocal"].split(" ")[0].replace("-", "")
-                        filename = os.path.join(self.output_dir, f"{date_label}_{activity['activityId']}.fit")
-                        with open(filename, 'wb') as f:
-                            f.write(fit_content)
-                        fit_files.append(filename)
-                        print(f"⬇️ 다운로드 완료: {os.path.basename(filename)}")
-                except Exception as e:
-                    print(f"❌ 다운로드 실패 (ID: {activity['activityId']}): {e}")
-        
-        # COROS 업로드 시에는 특별한 context가 필요 없으므로 빈 dict 반환
-        return fit_files, {}
+    def _activity_date_label(self, activity):
+        return activity["startTimeLocal"].split(" ")[0].replace("-", "")
 
-    def _upload_activities(self, fit_files, **kwargs):
-        """다운로드된 FIT 파일을 COROS에 업로드합니다."""
-        self.coros_client.login()
+    def _activity_start(self, activity):
+        key = garmin_activity_key(activity)
+        return key[0] if key else None
+
+    def _download_activity(self, activity, dest_path):
+        return self.garmin_client.download_fit_file(activity['activityId'], dest_path)
 
-        # COROS는 중복 체크 기능이 API에 내장되어 있으므로 별도 로직은 생략합니다.
-        print(f"⬆️ {len(fit_files)}개 활동 COROS 업로드 진행 중...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            future_map = {executor.submit(self.coros_client.upload_activity, file): file for file in fit_files}
-            for future in concurrent.futures.as_completed(future_map):
-                filename = future_map[future]
-                try:
-                    success, message = future.result()
-                    if success:
-                        print(f"⬆️ 업로드 성공: {os.path.basename(filename)}")
-                    else:
-                        print(f"❌ 업로드 실패 ({os.path.basename(filename)}): {message}")
-                except Exception as e:
-                    print(f"❌ 업로드 실패 ({os.path.basename(filename)}): {e}")
+    def _download_activity_data(self, activity):
+        return self.garmin_client.download_fit_data(activity['activityId'])
+
+    def _prepare_duplicate_check(self, date_range):
+        # COROS 가져오기 API도 중복을 거르지만, 파일 전체를 보낸 뒤에야 알 수 있으므로 미리 목록과 비교합니다.
+        self.coros_index = None
+        if date_range is None:
+            print("⚠️ FIT 파일에서 활동 기간을 알 수 없어 중복 체크를 건너뜁니다.")
+            return
+        start_day, end_day = (d.strftime('%Y%m%d') for d in date_range)
+        try:
+            print(f"🔍 {start_day} ~ {end_day} COROS 활동을 조회하여 중복을 확인합니다.")
+            coros_activities = list(self.coros_client.iter_activities(start_day, end_day))
+        except Exception as e:
+            print(f"⚠️ COROS 활동 조회 실패, 중복 체크를 건너뜁니다: {e}")
+            return
+        self.coros_index = ActivityIndex.build(coros_activities, coros_activity_key)
+
+    def _is_duplicate(self, fit_file, activity):
+        if self.coros_index is None:
+            return False
+        g_key = garmin_activity_key(activity) if activity is not None else None
+        if g_key is None and fit_file is not None:
+            g_key = fit_activity_key(self._fit_metadata(fit_file))
+        if g_key is None:
+            return False
+        return self.coros_index.contains(*g_key)
+
+    def _upload_activity(self, fit_file):
+        """다운로드된 FIT 파일을 COROS에 업로드합니다."""
+        if self.store.is_member(fit_file):
+            # 압축 보관된 파일은 풀지 않고 메모리에서 바로 업로드합니다.
+            return self.coros_client.upload_activity_data(os.path.basename(fit_file), self.store.read(fit_file))
+        return self.coros_client.upload_activity(fit_file)
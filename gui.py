@@ -2,29 +2,36 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from ttkbootstrap.widgets import DateEntry
 import threading
+import queue
+import multiprocessing
 import os
 import sys
 from datetime import datetime, timedelta
 import ttkbootstrap as tb
-from PIL import Image, ImageTk # Added this line
 
 # Refactored imports
 from utils import resource_path, load_config
-from coros_to_garmin import CorosToGarmin
-from garmin_to_coros import GarminToCoros
+# 마이그레이터(requests, garminconnect 포함)는 창을 띄우는 데 필요 없으므로 실행 시점에 불러옵니다.
 
 LOG_FILENAME = "activity_sync.log"
+LOG_FLUSH_INTERVAL_MS = 100  # 로그 큐를 위젯에 반영하는 주기
+LOG_MAX_BATCH = 1000         # 한 번에 반영할 최대 메시지 수 (이벤트 루프가 오래 막히지 않도록)
+LOG_MAX_LINES = 2000         # 화면에 남길 최대 줄 수 (전체 기록은 로그 파일에 남음)
 
 class Logger:
-    """stdout/stderr를 tkinter 위젯과 로그 파일 모두에 리디렉션하는 클래스"""
+    """stdout/stderr를 tkinter 위젯과 로그 파일 모두에 리디렉션하는 클래스
+
+    작업 스레드에서는 위젯을 직접 건드리지 않고 스레드 안전한 큐에 넣기만 하며,
+    GUI 스레드가 일정 주기로 모아서 반영합니다.
+    """
     def __init__(self, widget, log_file, tag="stdout"):
         self.widget = widget
         self.log_file = log_file
         self.tag = tag
 
     def write(self, msg):
-        if self.widget and self.widget.root.winfo_exists():
-            self.widget.root.after(0, self.widget.append_log, msg, self.tag)
+        if self.widget:
+            self.widget.append_log(msg, self.tag)
         if self.log_file:
             self.log_file.write(msg)
 
@@ -50,6 +57,7 @@ class ConfigDialog(tk.Toplevel):
 
     def _load_config_to_ui(self):
         config = load_config(self.config_path)
+        self.loaded_config = config
         self.coros_email.set(config.get('COROS_EMAIL', ''))
         self.coros_password.set(config.get('COROS_PASSWORD', ''))
         self.garmin_username.set(config.get('GARMIN_USERNAME', ''))
@@ -83,6 +91,11 @@ GARMIN_USERNAME = "{self.garmin_username.get()}"
 GARMIN_PASSWORD = "{self.garmin_password.get()}"
 OUTPUT_DIR = "{self.output_dir.get()}"
 """
+        # 대화상자에 없는 추가 설정(HTTP_TIMEOUT 등)은 기존 값을 그대로 보존합니다.
+        ui_keys = {'COROS_EMAIL', 'COROS_PASSWORD', 'GARMIN_USERNAME', 'GARMIN_PASSWORD', 'OUTPUT_DIR'}
+        for key, value in self.loaded_config.items():
+            if key not in ui_keys and value:
+                content += f'{key} = "{value}"\n'
         try:
             with open(self.config_path, "w", encoding="utf-8") as f:
                 f.write(content.strip())
@@ -100,7 +113,9 @@ class SyncGUI:
         self.action_mode = tk.StringVar(value="both")
         self.date_type = tk.StringVar(value="day")
         self.selected_month = tk.StringVar()
+        self.resume = tk.BooleanVar(value=False)
         self.file_list = []
+        self.log_queue = queue.Queue()
 
         self.config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py")
         if not os.path.exists(self.config_path):
@@ -108,19 +123,33 @@ class SyncGUI:
 
         self.create_widgets()
 
-        # Load and set the application icon
+        # 아이콘은 창이 먼저 그려진 뒤 이벤트 루프가 한가할 때 불러옵니다.
+        self.tk_icon = None
+        self.root.after_idle(self.load_icon)
+        # 첫 실행 버튼을 눌렀을 때 기다리지 않도록 창이 뜬 뒤 백그라운드에서 마이그레이터를 미리 불러옵니다.
+        self.root.after(500, lambda: threading.Thread(target=self.preload_migrators, daemon=True).start())
+
+    def load_icon(self):
+        """앱 아이콘을 설정합니다. Tk 기본 PNG 디코더를 먼저 쓰고, 실패하면 Pillow로 읽습니다."""
         icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icon.png')
         try:
-            # Open the image using Pillow
-            img = Image.open(icon_path)
-            # Convert the image to a Tkinter-compatible format
-            self.tk_icon = ImageTk.PhotoImage(img)
-            # Set the icon
+            try:
+                self.tk_icon = tk.PhotoImage(file=icon_path)
+            except tk.TclError:
+                # PNG를 지원하지 않는 오래된 Tk(8.5 이하)에서만 Pillow를 불러옵니다.
+                from PIL import Image, ImageTk
+                self.tk_icon = ImageTk.PhotoImage(Image.open(icon_path))
             self.root.iconphoto(False, self.tk_icon)
         except Exception as e:
             print(f"Error loading icon: {e}")
-            # Optionally, set a default icon or handle the error gracefully
-            pass # Continue without an icon if loading fails
+            # Continue without an icon if loading fails
+
+    def preload_migrators(self):
+        try:
+            import coros_to_garmin, garmin_to_coros  # noqa: F401
+        except Exception:
+            # 실제 실행 시 다시 불러오며 그때 오류를 보여줍니다.
+            pass
 
     def create_widgets(self):
         self.frm = ttk.Frame(self.root, padding=10)
@@ -162,6 +191,9 @@ class SyncGUI:
 
         self.all_radio = ttk.Radiobutton(self.scope_frame, text="전체", variable=self.date_type, value="all", command=self.update_date_widgets)
         self.all_radio.grid(row=2, column=0, sticky='w')
+
+        self.resume_check = ttk.Checkbutton(self.scope_frame, text="중단된 작업 이어하기 (이전 실행 범위 사용)", variable=self.resume)
+        self.resume_check.grid(row=3, column=0, columnspan=2, sticky='w', pady=(5, 0))
         
         self.file_picker_frame = ttk.LabelFrame(self.frm, text="파일 선택", padding=5)
         self.file_picker_frame.grid(row=4, column=0, columnspan=4, sticky="ew", pady=5)
@@ -189,6 +221,7 @@ class SyncGUI:
 
         self.update_ui_visibility()
         self.update_date_widgets()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
     def update_ui_visibility(self):
         if self.action_mode.get() == "upload":
@@ -216,14 +249,38 @@ class SyncGUI:
             self.file_label.config(text="(선택 안함)")
 
     def append_log(self, msg, tag="stdout"):
+        """로그 메시지를 큐에 넣습니다. 어느 스레드에서 호출해도 안전합니다."""
         msg = msg.strip()
         if not msg: return
-        self.log_box.config(state="normal")
-        self.log_box.insert(tk.END, msg + "\n", tag)
-        self.log_box.see(tk.END)
-        self.log_box.config(state="disabled")
+        self.log_queue.put((msg, tag))
+
+    def flush_log_queue(self):
+        """큐에 쌓인 로그를 한 번에 위젯에 반영하고, 오래된 줄은 잘라 화면 버퍼 크기를 유지합니다."""
+        batch = []
+        try:
+            while len(batch) < LOG_MAX_BATCH:
+                batch.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self.log_box.config(state="normal")
+            for msg, tag in batch:
+                self.log_box.insert(tk.END, msg + "\n", tag)
+            # 마지막 빈 줄을 포함하므로 실제 줄 수는 index - 1입니다.
+            excess = int(self.log_box.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_box.delete("1.0", f"{excess + 1}.0")
+            self.log_box.see(tk.END)
+            self.log_box.config(state="disabled")
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
     def run_action(self):
+        # 이전 실행에서 아직 반영되지 않은 로그도 함께 지웁니다.
+        try:
+            while True:
+                self.log_queue.get_nowait()
+        except queue.Empty:
+            pass
         self.log_box.config(state="normal")
         self.log_box.delete(1.0, tk.END)
         self.log_box.config(state="disabled")
@@ -231,7 +288,11 @@ class SyncGUI:
         args = self.build_args()
         if not args: return
 
-        target_migrator = CorosToGarmin() if args.mode == 'coros2garmin' else GarminToCoros()
+        if args.mode == 'coros2garmin':
+            from coros_to_garmin import CorosToGarmin as migrator_class
+        else:
+            from garmin_to_coros import GarminToCoros as migrator_class
+        target_migrator = migrator_class()
         
         try:
             log_file = open(LOG_FILENAME, "w", encoding="utf-8", buffering=1)
@@ -277,12 +338,14 @@ class SyncGUI:
                 return None
             args.file = self.file_list
             args.day = args.month = args.all = None
+            args.resume = False
         else:
             date_type = self.date_type.get()
             args.file = None
             args.day = None
             args.month = None
             args.all = False
+            args.resume = self.resume.get()
 
             if date_type == 'day':
                 try:
@@ -307,6 +370,8 @@ class SyncGUI:
         ConfigDialog(self.root, self.config_path)
 
 if __name__ == "__main__":
+    # 실행 파일(PyInstaller)에서 FIT 검사용 작업 프로세스가 GUI를 다시 띄우지 않도록 합니다.
+    multiprocessing.freeze_support()
     root = tb.Window(themename="flatly")
     app = SyncGUI(root)
     root.mainloop()
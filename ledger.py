@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from constants import (
+    LEDGER_STATUS_DOWNLOADED,
+    LEDGER_STATUS_UPLOADED,
+    LEDGER_STATUS_DUPLICATE,
+    LEDGER_STATUS_FAILED,
+)
+
+# 이미 대상 플랫폼에 존재하는 것으로 확인된 상태 (다시 전송할 필요 없음)
+DONE_STATUSES = (LEDGER_STATUS_UPLOADED, LEDGER_STATUS_DUPLICATE)
+
+class SyncLedger:
+    """마이그레이션 이력을 로컬 SQLite 파일에 기록하는 원장"""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # 다운로드/업로드 워커 스레드에서 함께 사용하므로 하나의 연결을 잠금으로 보호합니다.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_ledger (
+                    direction    TEXT NOT NULL,
+                    source_id    TEXT NOT NULL,
+                    content_hash TEXT,
+                    file_path    TEXT,
+                    file_size    INTEGER,
+                    status       TEXT NOT NULL,
+                    updated_at   TEXT NOT NULL,
+                    PRIMARY KEY (direction, source_id)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sync_ledger_hash ON sync_ledger (direction, content_hash)"
+            )
+            # 실패 횟수와 영구 실패 여부 (이전 버전 원장에는 없는 열이므로 필요하면 추가합니다)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(sync_ledger)")}
+            for column in ('attempts', 'permanent'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE sync_ledger ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            # 워치 모드에서 방향별로 어디까지 반영했는지(최고 수위선) 기록합니다.
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_cursor (
+                    direction    TEXT PRIMARY KEY,
+                    start_time   INTEGER NOT NULL,
+                    source_id    TEXT NOT NULL,
+                    updated_at   TEXT NOT NULL
+                )
+            """)
+
+    def _now(self):
+        return datetime.now().isoformat(timespec='seconds')
+
+    def get(self, direction, source_id):
+        """원장에 기록된 항목을 딕셔너리로 반환합니다. 없으면 None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sync_ledger WHERE direction = ? AND source_id = ?",
+                (direction, str(source_id))
+            ).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, direction):
+        """해당 방향의 모든 항목을 {source_id: 항목} 형태로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM sync_ledger WHERE direction = ?", (direction,)
+            ).fetchall()
+        return {row['source_id']: dict(row) for row in rows}
+
+    def is_done(self, direction, source_id):
+        """대상 플랫폼에 이미 반영된 활동인지 확인합니다."""
+        entry = self.get(direction, source_id)
+        return bool(entry) and entry['status'] in DONE_STATUSES
+
+    def has_done_hash(self, direction, content_hash):
+        """같은 내용의 파일이 이미 반영되었는지 확인합니다."""
+        if not content_hash:
+            return False
+        placeholders = ",".join("?" for _ in DONE_STATUSES)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM sync_ledger WHERE direction = ? AND content_hash = ? AND status IN ({placeholders}) LIMIT 1",
+                (direction, content_hash, *DONE_STATUSES)
+            ).fetchone()
+        return row is not None
+
+    def record_download(self, direction, source_id, content_hash, file_path, file_size):
+        """다운로드 결과를 기록합니다. 이미 반영된 항목의 상태는 유지합니다."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO sync_ledger (direction, source_id, content_hash, file_path, file_size, status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (direction, source_id) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    file_path    = excluded.file_path,
+                    file_size    = excluded.file_size,
+                    status       = CASE WHEN sync_ledger.status IN (?, ?)
+                                        THEN sync_ledger.status ELSE excluded.status END,
+                    updated_at   = excluded.updated_at
+            """, (direction, str(source_id), content_hash, file_path, file_size,
+                  LEDGER_STATUS_DOWNLOADED, self._now(), *DONE_STATUSES))
+
+    def mark(self, direction, source_id, status, content_hash=None, file_path=None):
+        """업로드 결과 등 대상 플랫폼의 상태를 기록합니다. 실패(failed)로 기록할 때마다 실패 횟수가 늘어납니다."""
+        failed = 1 if status == LEDGER_STATUS_FAILED else 0
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO sync_ledger (direction, source_id, content_hash, file_path, status, updated_at, attempts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (direction, source_id) DO UPDATE SET
+                    content_hash = COALESCE(excluded.content_hash, sync_ledger.content_hash),
+                    file_path    = COALESCE(excluded.file_path, sync_ledger.file_path),
+                    status       = excluded.status,
+                    updated_at   = excluded.updated_at,
+                    attempts     = sync_ledger.attempts + excluded.attempts
+            """, (direction, str(source_id), content_hash, file_path, status, self._now(), failed))
+
+    def record_failure(self, direction, source_id, clear_file=False, permanent=False):
+        """다운로드/검사 실패를 기록하고 실패 횟수를 늘립니다. 이미 반영된 항목은 그대로 둡니다.
+
+        clear_file이면 손상된 파일을 다시 쓰지 않도록 기록된 파일 경로/해시/크기를 지웁니다.
+        permanent이면 다시 시도해도 결과가 같은 실패(FIT 파일이 없는 원본 등)로 기록해 이후 실행에서 건너뜁니다.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO sync_ledger (direction, source_id, status, updated_at, attempts, permanent)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT (direction, source_id) DO UPDATE SET
+                    content_hash = CASE WHEN ? THEN NULL ELSE sync_ledger.content_hash END,
+                    file_path    = CASE WHEN ? THEN NULL ELSE sync_ledger.file_path END,
+                    file_size    = CASE WHEN ? THEN NULL ELSE sync_ledger.file_size END,
+                    status       = excluded.status,
+                    updated_at   = excluded.updated_at,
+                    attempts     = sync_ledger.attempts + 1,
+                    permanent    = excluded.permanent
+                WHERE sync_ledger.status NOT IN (?, ?)
+            """, (direction, str(source_id), LEDGER_STATUS_FAILED, self._now(), int(permanent),
+                  clear_file, clear_file, clear_file, *DONE_STATUSES))
+
+    @staticmethod
+    def is_permanent_failure(entry):
+        """다시 시도하지 않을 영구 실패 항목인지 확인합니다."""
+        return bool(entry) and entry['status'] == LEDGER_STATUS_FAILED and bool(entry.get('permanent'))
+
+    def get_cursor(self, direction):
+        """마지막으로 반영된 활동의 (현지 시작 시각(초), 원본 ID)를 반환합니다. 없으면 None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_time, source_id FROM sync_cursor WHERE direction = ?", (direction,)
+            ).fetchone()
+        return (row['start_time'], row['source_id']) if row else None
+
+    def set_cursor(self, direction, start_time, source_id):
+        """커서를 갱신합니다. 이전 커서보다 뒤로 돌아가지 않습니다."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO sync_cursor (direction, start_time, source_id, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (direction) DO UPDATE SET
+                    start_time = excluded.start_time,
+                    source_id  = excluded.source_id,
+                    updated_at = excluded.updated_at
+                WHERE excluded.start_time > sync_cursor.start_time
+                   OR (excluded.start_time = sync_cursor.start_time AND excluded.source_id > sync_cursor.source_id)
+            """, (direction, int(start_time), str(source_id), self._now()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
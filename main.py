@@ -1,8 +1,6 @@
 # main.py
 import argparse
 
-from coros_to_garmin import CorosToGarmin
-from garmin_to_coros import GarminToCoros
 # try:
 #     from gooey import Gooey
 # except ImportError:
@@ -11,14 +9,42 @@ from garmin_to_coros import GarminToCoros
 # @Gooey(program_name="COROS ↔ Garmin 데이터 연동")
 def main():
     parser = argparse.ArgumentParser(description='COROS <-> Garmin 데이터 연동')
-    parser.add_argument('--mode', choices=['coros2garmin', 'garmin2coros'], required=True, help='동작 모드')
+    parser.add_argument('--mode', choices=['coros2garmin', 'garmin2coros', 'bidirectional'], required=True,
+                        help='동작 모드 (bidirectional: 양쪽 목록을 한 번씩 조회해 서로 없는 활동만 전송)')
     parser.add_argument('-d', '--day', type=str, help='연동할 날짜 지정 (yyyymmdd)')
     parser.add_argument('-m', '--month', type=str, help='연동할 월 지정 (yyyymm)')
     parser.add_argument('-all', '--all', action='store_true', help='전체 데이터 연동')
     parser.add_argument('-u', '--upload-only', action='store_true', help='다운로드된 FIT 파일만 업로드')
+    parser.add_argument('--download-only', action='store_true', help='FIT 파일을 다운로드만 하고 업로드하지 않음')
     parser.add_argument('-f', '--file', type=str, nargs='*', help='특정 FIT 파일(들)만 업로드')
+    parser.add_argument('--storage', choices=['files', 'archive'], help='FIT 파일 저장 방식 (기본: config.py의 FIT_STORAGE, 없으면 files)')
+    parser.add_argument('-r', '--resume', action='store_true', help='중단된 이전 실행을 이어서 진행 (날짜/월/전체 인자는 체크포인트 값 사용)')
+    parser.add_argument('-w', '--watch', action='store_true', help='종료하지 않고 주기적으로 새 활동만 확인해 연동 (Ctrl+C로 종료)')
+    parser.add_argument('--interval', type=int, help='워치 모드 확인 주기(초) (기본: config.py의 WATCH_INTERVAL, 없으면 300)')
+    parser.add_argument('--batch', type=str, metavar='ACCOUNTS_JSON', help='계정 목록 JSON 파일의 모든 계정 쌍을 동시에 연동 (accounts.json.example 참고)')
+    parser.add_argument('--workers', type=int, help='일괄 연동 시 모든 계정이 공유하는 다운로드/업로드 작업자 수')
+    parser.add_argument('--in-memory', action='store_true', help='FIT 파일을 디스크에 저장하지 않고 메모리 한도(config.py의 MEMORY_BUDGET_MB) 안에서 바로 업로드')
     args = parser.parse_args()
 
+    if args.upload_only and args.download_only:
+        print("[오류] 업로드만(-u)과 다운로드만(--download-only) 인자는 함께 사용할 수 없습니다.")
+        return
+    if args.mode == 'bidirectional' and (args.watch or args.upload_only or args.download_only or args.resume or args.batch):
+        print("[오류] 양방향 연동은 워치(-w)/업로드만(-u)/다운로드만(--download-only)/이어하기(-r)/일괄 연동(--batch) 인자와 함께 사용할 수 없습니다.")
+        return
+    if args.batch and (args.watch or args.upload_only or args.resume):
+        print("[오류] 일괄 연동(--batch)은 워치(-w)/업로드만(-u)/이어하기(-r) 인자와 함께 사용할 수 없습니다.")
+        return
+
+    if args.watch:
+        if args.upload_only or args.download_only or args.resume:
+            print("[오류] 워치 모드는 업로드만(-u)/다운로드만(--download-only)/이어하기(-r) 인자와 함께 사용할 수 없습니다.")
+            return
+        if args.day or args.month or args.all or args.file:
+            print("[안내] 워치 모드에서는 마지막으로 반영한 활동 이후만 조회하므로 날짜/월/전체/파일 인자는 무시됩니다.")
+        run_watch(args)
+        return
+
     # 인자 유효성 체크 및 안내
     if args.upload_only:
         # 업로드 온리: 파일 인자 필수, 날짜/월/전체 인자 무시
@@ -28,19 +54,75 @@ def main():
         # 날짜/월/전체 인자 무시 안내
         if args.day or args.month or args.all:
             print("[안내] 업로드만 모드에서는 날짜/월/전체 인자는 무시됩니다.")
+        if args.resume:
+            print("[안내] 업로드만 모드에서는 --resume 인자는 무시됩니다.")
+            args.resume = False
+        if args.in_memory:
+            print("[안내] 업로드만 모드에서는 --in-memory 인자는 무시됩니다.")
+            args.in_memory = False
     else:
         # 다운로드/다운로드+업로드: 날짜/월/전체 인자 필요, 파일 인자 무시
-        if not (args.day or args.month or args.all):
+        if not (args.day or args.month or args.all or args.resume):
             from datetime import datetime, timedelta
             args.day = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
             print(f"[안내] 날짜/월/전체 인자가 없어 기본값({args.day})이 사용됩니다.")
         if args.file:
             print("[안내] 다운로드/다운로드+업로드 모드에서는 파일 인자는 무시됩니다.")
+        if args.download_only and args.in_memory:
+            print("[안내] 다운로드만 모드에서는 파일을 저장해야 하므로 --in-memory 인자는 무시됩니다.")
+            args.in_memory = False
 
+    if args.batch:
+        run_batch(args)
+        return
+    create_migrator(args).run(args)
+
+def run_batch(args):
+    """계정 목록의 모든 계정 쌍을 공유 작업자 풀로 동시에 연동합니다."""
+    from batch import BatchRunner, load_accounts
+    try:
+        accounts = load_accounts(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"[오류] 계정 목록을 읽을 수 없습니다: {e}")
+        return
+    results = BatchRunner(accounts, args.mode, storage=args.storage, workers=args.workers, in_memory=args.in_memory).run(args)
+    failed = [r['account'] for r in results if r['status'] == 'error']
+    if failed:
+        # cron 등에서 실패를 알 수 있도록 0이 아닌 종료 코드로 끝냅니다.
+        print(f"[오류] 연동에 실패한 계정: {', '.join(failed)}")
+        raise SystemExit(1)
+
+def create_migrator(args):
+    # 마이그레이터는 requests/garminconnect 등을 불러오므로 --help나 인자 오류 때는 가져오지 않습니다.
     if args.mode == 'coros2garmin':
-        CorosToGarmin().run(args)
-    elif args.mode == 'garmin2coros':
-        GarminToCoros().run(args)
+        from coros_to_garmin import CorosToGarmin
+        return CorosToGarmin(storage=args.storage, in_memory=args.in_memory)
+    if args.mode == 'bidirectional':
+        from bidirectional import BidirectionalSync
+        return BidirectionalSync(storage=args.storage, in_memory=args.in_memory)
+    from garmin_to_coros import GarminToCoros
+    return GarminToCoros(storage=args.storage, in_memory=args.in_memory)
+
+def run_watch(args):
+    """로그인한 클라이언트를 유지하며 새 활동을 주기적으로 연동합니다."""
+    from watcher import Watcher
+    from constants import WATCH_INTERVAL_SEC
+    migrator = create_migrator(args)
+    interval = args.interval
+    if interval is None:
+        try:
+            interval = int(migrator.config.get('WATCH_INTERVAL') or WATCH_INTERVAL_SEC)
+        except ValueError:
+            print(f"[안내] WATCH_INTERVAL 값이 올바르지 않아 기본값({WATCH_INTERVAL_SEC}초)을 사용합니다.")
+            interval = WATCH_INTERVAL_SEC
+    watcher = Watcher(migrator, interval=max(1, interval))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n👋 워치 모드를 종료합니다.")
+    finally:
+        migrator.validator.shutdown()
+        migrator.ledger.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,255 @@
+import time
+import json
+import threading
+from contextlib import contextmanager
+
+from utils import atomic_write_chunks
+from constants import METRICS_PREFIX, LATENCY_BUCKETS
+
+def request_status(exc):
+    """요청 실패 원인을 지표 라벨로 변환합니다 (HTTP 상태 코드 또는 예외 이름)."""
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return str(status) if status is not None else type(exc).__name__
+
+class Histogram:
+    """누적 버킷 방식(Prometheus histogram)의 지연 시간 분포"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(상한, 누적 개수) 목록을 반환합니다. 마지막 상한은 '+Inf'."""
+        total, result = 0, []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """버킷 상한으로 근사한 분위수(초). 관측값이 없으면 None."""
+        if not self.count:
+            return None
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound if bound != '+Inf' else self.buckets[-1]
+        return self.buckets[-1]
+
+class Metrics:
+    """한 번의 실행 동안 요청/단계/큐/작업자 지표를 모아 JSON과 Prometheus 텍스트 파일로 내보냅니다.
+
+    여러 스레드에서 동시에 기록하므로 모든 갱신은 하나의 잠금으로 보호합니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._started_monotonic = time.monotonic()
+            self.elapsed = None
+            # (플랫폼, 엔드포인트) → {'requests': {상태: 개수}, 'sent': 바이트, 'received': 바이트, 'latency': Histogram}
+            self.endpoints = {}
+            # 단계 → {'seconds': 누적 시간(스레드 합), 'count': 횟수}
+            self.phases = {}
+            # 큐 → {'max': 최대 길이, 'sum': 길이 합, 'samples': 표본 수}
+            self.queues = {}
+            # 작업 단계 → {'workers': 작업자 수, 'busy': 작업 시간 합, 'wall': 실행 시간}
+            self.workers = {}
+
+    # ----- 기록 -----
+
+    def observe_request(self, platform, endpoint, status, seconds, sent=0, received=0):
+        """API 요청 한 번(재시도 포함 각 시도)의 결과를 기록합니다."""
+        with self._lock:
+            entry = self.endpoints.get((platform, endpoint))
+            if entry is None:
+                entry = self.endpoints[(platform, endpoint)] = {
+                    'requests': {}, 'sent': 0, 'received': 0, 'latency': Histogram()
+                }
+            entry['requests'][status] = entry['requests'].get(status, 0) + 1
+            entry['sent'] += sent or 0
+            entry['received'] += received or 0
+            entry['latency'].observe(seconds)
+
+    @contextmanager
+    def request(self, platform, endpoint, sent=0):
+        """블록을 요청 한 번으로 측정합니다. 블록 안에서 record['sent'/'received']에 바이트 수를 적습니다."""
+        record = {'sent': sent, 'received': 0}
+        started = time.monotonic()
+        status = 'ok'
+        try:
+            yield record
+        except Exception as e:
+            status = request_status(e)
+            raise
+        finally:
+            self.observe_request(platform, endpoint, status, time.monotonic() - started,
+                                 record['sent'], record['received'])
+
+    def add_phase_time(self, phase, seconds):
+        with self._lock:
+            entry = self.phases.setdefault(phase, {'seconds': 0.0, 'count': 0})
+            entry['seconds'] += seconds
+            entry['count'] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """블록 실행 시간을 단계 시간에 더합니다. 여러 스레드의 시간은 합산됩니다."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.monotonic() - started)
+
+    def timed_iter(self, phase, iterable):
+        """다음 항목을 기다리는 시간만 단계 시간으로 기록하며 항목을 그대로 흘려보냅니다."""
+        iterator = iter(iterable)
+        while True:
+            started = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_phase_time(phase, time.monotonic() - started)
+                return
+            self.add_phase_time(phase, time.monotonic() - started)
+            yield item
+
+    def observe_queue(self, name, depth):
+        with self._lock:
+            entry = self.queues.setdefault(name, {'max': 0, 'sum': 0, 'samples': 0})
+            entry['max'] = max(entry['max'], depth)
+            entry['sum'] += depth
+            entry['samples'] += 1
+
+    def add_worker_time(self, stage, busy_seconds):
+        with self._lock:
+            entry = self.workers.setdefault(stage, {'workers': 0, 'busy': 0.0, 'wall': 0.0})
+            entry['busy'] += busy_seconds
+
+    def set_workers(self, stage, workers, wall_seconds):
+        """작업 단계의 작업자 수와 실행 시간을 기록합니다 (가동률 = 작업 시간 / (작업자 수 × 실행 시간))."""
+        with self._lock:
+            entry = self.workers.setdefault(stage, {'workers': 0, 'busy': 0.0, 'wall': 0.0})
+            entry['workers'] = max(entry['workers'], workers)
+            entry['wall'] += wall_seconds
+
+    def finish(self):
+        with self._lock:
+            self.elapsed = time.monotonic() - self._started_monotonic
+
+    # ----- 내보내기 -----
+
+    def summary(self, labels=None, counters=None):
+        """지표를 JSON으로 직렬화할 수 있는 딕셔너리로 반환합니다."""
+        with self._lock:
+            endpoints = []
+            for (platform, endpoint), entry in sorted(self.endpoints.items()):
+                latency = entry['latency']
+                endpoints.append({
+                    'platform': platform,
+                    'endpoint': endpoint,
+                    'requests': dict(entry['requests']),
+                    'bytes_sent': entry['sent'],
+                    'bytes_received': entry['received'],
+                    'latency_sec': {
+                        'count': latency.count,
+                        'sum': round(latency.sum, 6),
+                        'mean': round(latency.sum / latency.count, 6) if latency.count else None,
+                        'p50': latency.quantile(0.5),
+                        'p99': latency.quantile(0.99),
+                        'buckets': {str(bound): total for bound, total in latency.cumulative()},
+                    },
+                })
+            return {
+                'labels': dict(labels or {}),
+                'started_at': self.started,
+                'elapsed_sec': self.elapsed,
+                'counters': dict(counters or {}),
+                'endpoints': endpoints,
+                'phases': {name: dict(entry) for name, entry in self.phases.items()},
+                'queues': {
+                    name: {'max': entry['max'], 'mean': entry['sum'] / entry['samples'] if entry['samples'] else 0}
+                    for name, entry in self.queues.items()
+                },
+                'workers': {
+                    stage: dict(entry, utilization=(entry['busy'] / (entry['workers'] * entry['wall'])
+                                                    if entry['workers'] and entry['wall'] else None))
+                    for stage, entry in self.workers.items()
+                },
+            }
+
+    @staticmethod
+    def _format_labels(labels):
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}" if labels else ""
+
+    def to_prometheus(self, labels=None, counters=None):
+        """node_exporter textfile collector 형식의 텍스트를 반환합니다."""
+        summary = self.summary(labels, counters)
+        base = summary['labels']
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            full_name = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for suffix, extra, value in samples:
+                lines.append(f"{full_name}{suffix}{self._format_labels(dict(base, **extra))} {value}")
+
+        metric('requests_total', 'counter', 'API requests by endpoint and result', [
+            ('', {'platform': e['platform'], 'endpoint': e['endpoint'], 'status': status}, count)
+            for e in summary['endpoints'] for status, count in sorted(e['requests'].items())
+        ])
+        metric('request_bytes_total', 'counter', 'Bytes transferred by endpoint', [
+            ('', {'platform': e['platform'], 'endpoint': e['endpoint'], 'flow': flow}, e[f'bytes_{flow}'])
+            for e in summary['endpoints'] for flow in ('sent', 'received')
+        ])
+        histogram_samples = []
+        for e in summary['endpoints']:
+            endpoint_labels = {'platform': e['platform'], 'endpoint': e['endpoint']}
+            for bound, total in e['latency_sec']['buckets'].items():
+                histogram_samples.append(('_bucket', dict(endpoint_labels, le=bound), total))
+            histogram_samples.append(('_sum', endpoint_labels, e['latency_sec']['sum']))
+            histogram_samples.append(('_count', endpoint_labels, e['latency_sec']['count']))
+        metric('request_duration_seconds', 'histogram', 'API request latency', histogram_samples)
+        metric('phase_seconds', 'gauge', 'Time spent in each phase (summed over threads)', [
+            ('', {'phase': phase}, round(entry['seconds'], 6)) for phase, entry in sorted(summary['phases'].items())
+        ])
+        metric('queue_depth_max', 'gauge', 'Maximum pipeline queue depth', [
+            ('', {'queue': name}, entry['max']) for name, entry in sorted(summary['queues'].items())
+        ])
+        metric('worker_utilization_ratio', 'gauge', 'Busy time divided by workers x wall time', [
+            ('', {'stage': stage}, round(entry['utilization'], 6))
+            for stage, entry in sorted(summary['workers'].items()) if entry['utilization'] is not None
+        ])
+        metric('activities_total', 'gauge', 'Activities by result in the last run', [
+            ('', {'result': key}, value) for key, value in sorted(summary['counters'].items())
+        ])
+        metric('run_duration_seconds', 'gauge', 'Wall-clock duration of the last run', [
+            ('', {}, round(summary['elapsed_sec'] or 0, 6))
+        ])
+        metric('last_run_timestamp_seconds', 'gauge', 'Unix time when the last run started', [
+            ('', {}, int(summary['started_at']))
+        ])
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path, prom_path, labels=None, counters=None):
+        """JSON 요약과 Prometheus 텍스트 파일을 원자적으로 기록합니다 (수집기가 쓰다 만 파일을 읽지 않도록)."""
+        summary = self.summary(labels, counters)
+        atomic_write_chunks(json_path, [json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8')])
+        atomic_write_chunks(prom_path, [self.to_prometheus(labels, counters).encode('utf-8')])
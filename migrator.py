@@ -1,57 +1,833 @@
 import os
 import sys
+import threading
 import concurrent.futures
 from abc import ABC, abstractmethod
+from collections import Counter
 from datetime import datetime, timedelta
 
 from utils import load_config
 from client import CorosClient, GarminClient
-from constants import DEFAULT_OUTPUT_DIR
+from ledger import SyncLedger, DONE_STATUSES
+from pipeline import run_pipeline, MemoryBudget
+from token_cache import TokenCache
+from ratelimit import get_limiter
+from checkpoint import CheckpointJournal
+from retry import RetryBudget
+from metrics import Metrics
+from fit import read_fit_metadata, read_fit_metadata_bytes, NoFitFileError
+from store import open_fit_store, MemoryFitStore
+from activity_index import fit_activity_key
+from validation import FitValidator
+from constants import (
+    DEFAULT_OUTPUT_DIR,
+    LEDGER_FILENAME,
+    LEDGER_STATUS_UPLOADED,
+    LEDGER_STATUS_DUPLICATE,
+    LEDGER_STATUS_FAILED,
+    PIPELINE_QUEUE_SIZE,
+    MEMORY_BUDGET_MB,
+    MEMORY_ESTIMATE_BYTES,
+    CHECKPOINT_FILENAME,
+    FIT_STORE_DIRNAME,
+    FIT_STORAGE_FILES,
+    METRICS_DIR_NAME,
+    METRICS_PREFIX,
+    WATCH_INITIAL_DAYS,
+    WATCH_OVERLAP_DAYS,
+    WATCH_MAX_ATTEMPTS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT
+)
+
+# 실패 요약에 표시할 단계 이름
+FAILURE_STAGE_LABELS = {'download': '다운로드', 'validate': '무결성 검사', 'upload': '업로드'}
 
 class BaseMigrator(ABC):
     """데이터 마이그레이션의 공통 로직을 담는 추상 기본 클래스"""
-    def __init__(self, output_dir_name, output_dir=None):
-        self.config = load_config()
-        self.coros_client = CorosClient(self.config.get('COROS_EMAIL'), self.config.get('COROS_PASSWORD'))
-        self.garmin_client = GarminClient(self.config.get('GARMIN_USERNAME'), self.config.get('GARMIN_PASSWORD'))
-        
+    # 원장에 기록되는 마이그레이션 방향 (자식 클래스에서 지정)
+    DIRECTION = None
+    SOURCE_NAME = None
+    DEST_NAME = None
+    # True이면 대상 플랫폼 중복 검사 준비를 기다렸다가 이미 있는 활동은 다운로드 전에 건너뜁니다.
+    DEDUP_BEFORE_DOWNLOAD = False
+
+    def __init__(self, output_dir_name, output_dir=None, storage=None, config=None, in_memory=False, share_with=None):
+        """share_with로 다른 마이그레이터를 넘기면 그 설정, 클라이언트(로그인 세션), 원장, FIT 저장소, 지표를
+        새로 만들지 않고 함께 사용합니다. (양방향 연동)"""
+        if share_with is not None:
+            self._share(output_dir_name, share_with)
+            return
+        # 여러 계정을 한 프로세스에서 실행할 때(batch.py)는 계정별 설정을 직접 넘깁니다.
+        self.config = config if config is not None else load_config()
+        # 실행마다 새로 로그인하지 않도록 토큰을 저장해 두고 재사용합니다.
+        token_cache = TokenCache()
+        # 두 클라이언트가 한 번의 실행 동안 하나의 재시도 예산과 지표를 함께 사용합니다.
+        self.retry_budget = RetryBudget()
+        self.metrics = Metrics()
+        self.coros_client = CorosClient(
+            self.config.get('COROS_EMAIL'), self.config.get('COROS_PASSWORD'),
+            timeout=self._http_timeout(), token_cache=token_cache, retry_budget=self.retry_budget,
+            base_url=self.config.get('COROS_API_URL') or None, metrics=self.metrics
+        )
+        self.garmin_client = GarminClient(
+            self.config.get('GARMIN_USERNAME'), self.config.get('GARMIN_PASSWORD'),
+            token_cache=token_cache, retry_budget=self.retry_budget, metrics=self.metrics
+        )
+
         root_dir = output_dir if output_dir else self.config.get('OUTPUT_DIR', DEFAULT_OUTPUT_DIR)
+        self.root_dir = root_dir
         self.output_dir = os.path.join(root_dir, output_dir_name)
         os.makedirs(self.output_dir, exist_ok=True)
+        self.ledger = SyncLedger(os.path.join(root_dir, LEDGER_FILENAME))
+        # 저장 방식은 인자(--storage) > config.py(FIT_STORAGE) > 파일별 저장 순으로 정합니다.
+        storage = storage or self.config.get('FIT_STORAGE') or FIT_STORAGE_FILES
+        self.store = open_fit_store(os.path.join(root_dir, FIT_STORE_DIRNAME), storage)
+        # --in-memory: 받은 FIT 데이터를 디스크에 쓰지 않고 메모리 한도 안에서 바로 업로드합니다.
+        self.memory_budget = None
+        if in_memory:
+            self.store = MemoryFitStore(self.store)
+            self.memory_budget = MemoryBudget(self._memory_budget_mb() * 1024 * 1024)
+            self._memory_estimate = MEMORY_ESTIMATE_BYTES
+        self._init_run_state()
+
+    def _share(self, output_dir_name, other):
+        """other와 설정/클라이언트/원장/저장소/지표를 함께 쓰도록 초기화합니다."""
+        self.config = other.config
+        self.retry_budget, self.metrics = other.retry_budget, other.metrics
+        self.coros_client, self.garmin_client = other.coros_client, other.garmin_client
+        self.root_dir = other.root_dir
+        self.output_dir = os.path.join(self.root_dir, output_dir_name)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.ledger, self.store, self.memory_budget = other.ledger, other.store, other.memory_budget
+        if self.memory_budget is not None:
+            self._memory_estimate = MEMORY_ESTIMATE_BYTES
+        self._init_run_state()
+
+    def _init_run_state(self):
+        """방향마다 따로 두는 실행 상태(검사기, 통계, 세션 등)를 초기화합니다."""
+        # 업로드 전 FIT 무결성 검사 (프로세스 풀은 처음 검사할 때 만듭니다)
+        self.validator = FitValidator(self.output_dir)
+        self.stats = Counter()
+        self.failures = []
+        self._stats_lock = threading.Lock()
+        self._journal = None
+        self._fit_metadata_cache = {}
+        # 이미 로그인한 플랫폼('source'/'destination'). 세션이 만료되면 각 클라이언트가 다시 로그인합니다.
+        self._sessions = set()
+        # 일괄 실행 시 여러 계정이 함께 쓰는 (다운로드, 업로드) FairPool과 이 실행의 계정 이름
+        self.pools = None
+        self.account_name = None
+        # 양방향 연동(bidirectional.py)에서 반대 방향의 원장 이름. 그 방향으로 보낸 파일은 되돌려 보내지 않습니다.
+        self.reverse_direction = None
+
+    def _http_timeout(self):
+        """config.py의 HTTP_TIMEOUT(초)을 (연결, 응답) 타임아웃으로 변환합니다."""
+        try:
+            read_timeout = float(self.config.get('HTTP_TIMEOUT') or HTTP_READ_TIMEOUT)
+        except ValueError:
+            print(f"[안내] HTTP_TIMEOUT 값이 올바르지 않아 기본값({HTTP_READ_TIMEOUT}초)을 사용합니다.")
+            read_timeout = HTTP_READ_TIMEOUT
+        return (min(HTTP_CONNECT_TIMEOUT, read_timeout), read_timeout)
+
+    def _memory_budget_mb(self):
+        """config.py의 MEMORY_BUDGET_MB 값을 읽습니다."""
+        try:
+            return max(1, int(self.config.get('MEMORY_BUDGET_MB') or MEMORY_BUDGET_MB))
+        except ValueError:
+            print(f"[안내] MEMORY_BUDGET_MB 값이 올바르지 않아 기본값({MEMORY_BUDGET_MB}MB)을 사용합니다.")
+            return MEMORY_BUDGET_MB
+
+    # ----- 자식 클래스에서 구현하는 플랫폼별 단계 -----
+
+    @abstractmethod
+    def _login_source(self):
+        """소스 플랫폼에 로그인합니다."""
+        pass
+
+    @abstractmethod
+    def _login_destination(self):
+        """대상 플랫폼에 로그인합니다."""
+        pass
+
+    @abstractmethod
+    def _list_activities(self, start_date, end_date):
+        """소스 플랫폼에서 기간 내 활동 목록을 조회합니다."""
+        pass
+
+    @abstractmethod
+    def _activity_id(self, activity):
+        """활동의 원본 ID를 문자열로 반환합니다."""
+        pass
+
+    @abstractmethod
+    def _activity_date_label(self, activity):
+        """파일명에 사용할 활동 날짜(YYYYMMDD)를 반환합니다."""
+        pass
+
+    @abstractmethod
+    def _activity_start(self, activity):
+        """활동의 현지 시작 시각(초)을 반환합니다. 알 수 없으면 None."""
+        pass
+
+    @abstractmethod
+    def _download_activity(self, activity, dest_path):
+        """활동 FIT 파일을 dest_path에 저장하고 (바이트 수, SHA-256 해시)를 반환합니다."""
+        pass
+
+    @abstractmethod
+    def _download_activity_data(self, activity):
+        """활동 FIT 파일을 디스크에 쓰지 않고 바이트로 받아 반환합니다. 파일이 없으면 None."""
+        pass
 
     @abstractmethod
-    def _download_activities(self, args):
-        """소스 플랫폼에서 활동을 다운로드합니다. 자식 클래스에서 구현해야 합니다."""
+    def _prepare_duplicate_check(self, date_range):
+        """업로드 전 중복 검사에 필요한 대상 플랫폼 정보를 준비합니다. 기간을 알 수 없으면 date_range가 None입니다."""
         pass
 
     @abstractmethod
-    def _upload_activities(self, fit_files, **kwargs):
-        """대상 플랫폼으로 활동을 업로드합니다. 자식 클래스에서 구현해야 합니다."""
+    def _is_duplicate(self, fit_file, activity):
+        """대상 플랫폼에 이미 존재하는 활동인지 확인합니다. activity나 (다운로드 전이면) fit_file은 없을 수 있습니다."""
         pass
 
+    @abstractmethod
+    def _upload_activity(self, fit_file):
+        """FIT 파일을 대상 플랫폼에 업로드하고 (성공 여부, 메시지)를 반환합니다."""
+        pass
+
+    # ----- 공통 헬퍼 -----
+
+    @staticmethod
+    def _resolve_range(args):
+        """인자(--day/--month/--all)에 해당하는 (시작일, 종료일) datetime을 반환합니다."""
+        if args.day:
+            start = end = datetime.strptime(args.day, '%Y%m%d')
+        elif args.month:
+            year, month = int(args.month[:4]), int(args.month[4:6])
+            start = datetime(year, month, 1)
+            next_month = start.replace(day=28) + timedelta(days=4)
+            end = next_month - timedelta(days=next_month.day)
+        elif args.all:
+            start = datetime(2010, 1, 1)
+            end = datetime.now()
+        else:
+            start = end = datetime.now() - timedelta(days=1)
+        return start, end
+
+    def _ensure_login(self, side):
+        """source/destination 플랫폼에 아직 로그인하지 않았으면 로그인합니다."""
+        if side in self._sessions:
+            return
+        with self.metrics.phase('login'):
+            if side == 'source':
+                self._login_source()
+            else:
+                self._login_destination()
+        self._sessions.add(side)
+
+    def _fit_path(self, activity):
+        """활동의 FIT 파일 경로(YYYYMMDD_activityId.fit)를 반환합니다."""
+        return os.path.join(self.output_dir, f"{self._activity_date_label(activity)}_{self._activity_id(activity)}.fit")
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _record_failure(self, stage, name, error):
+        """재시도 후에도 실패한 항목을 최종 요약용으로 기록합니다."""
+        with self._stats_lock:
+            self.stats[f'{stage}_failed'] += 1
+            self.failures.append((stage, name, str(error)))
+
+    @staticmethod
+    def _source_id_from_path(file_path):
+        """파일명(YYYYMMDD_activityId.fit)에서 원본 활동 ID를 추출합니다."""
+        try:
+            return os.path.basename(file_path).split('_')[1].split('.')[0]
+        except IndexError:
+            return None
+
+    def _file_hash(self, file_path):
+        """파일 내용의 SHA-256 해시를 계산합니다. 압축 보관된 파일도 그대로 읽습니다."""
+        return self.store.hash(file_path)
+
+    def _is_stored_file_intact(self, entry):
+        """원장에 기록된 파일이 디스크에 그대로 남아 있는지 확인합니다."""
+        file_path = entry.get('file_path')
+        if not file_path or not self.store.exists(file_path):
+            return False
+        if entry.get('file_size') is not None and self.store.getsize(file_path) != entry['file_size']:
+            return False
+        return not entry.get('content_hash') or self._file_hash(file_path) == entry['content_hash']
+
+    def _stored_file(self, activity, entry):
+        """다시 다운로드하지 않아도 되는 로컬 파일 경로를 반환합니다. 없으면 None.
+
+        원장에 기록된 파일이 그대로 있으면 그 파일을, 지워졌거나 바뀌었으면 저장소의 객체를
+        다시 링크해 사용합니다. 원장 기록이 없어도 이전 실행에서 받아 둔 완전한 FIT 파일이
+        있으면 저장소에 등록해 재사용합니다.
+        """
+        if entry:
+            content_hash = entry.get('content_hash')
+            if self._is_stored_file_intact(entry):
+                fit_file = entry['file_path']
+                if content_hash:
+                    # 저장 방식이 바뀌었으면(예: 압축 보관으로 전환) 이 시점에 저장소로 옮깁니다.
+                    with self.metrics.phase('store'):
+                        fit_file, _ = self.store.add(fit_file, content_hash)
+                    if fit_file != entry['file_path']:
+                        self._record_download(self._activity_id(activity), fit_file, entry.get('file_size'), content_hash)
+                return fit_file
+            if content_hash:
+                fit_file = self.store.restore(content_hash, entry.get('file_size'), self._fit_path(activity))
+                if fit_file:
+                    self._record_download(self._activity_id(activity), fit_file, entry.get('file_size'), content_hash)
+                return fit_file
+            return None
+        fit_file = self._fit_path(activity)
+        if os.path.exists(fit_file) and read_fit_metadata(fit_file) is not None:
+            file_size, content_hash = os.path.getsize(fit_file), self._file_hash(fit_file)
+            fit_file, _ = self.store.add(fit_file, content_hash)
+            self._record_download(self._activity_id(activity), fit_file, file_size, content_hash)
+            return fit_file
+        return None
+
+    def _filter_with_ledger(self, activities):
+        """원장을 기준으로 처리할 (활동, 재사용할 기존 파일 또는 None)을 차례로 반환합니다.
+
+        activities가 제너레이터여도 목록 조회가 끝나기를 기다리지 않고 바로 흘려보냅니다.
+        """
+        entries = self.ledger.entries(self.DIRECTION)
+        for act in activities:
+            self._count('listed')
+            entry = entries.get(self._activity_id(act))
+            if entry and entry['status'] in DONE_STATUSES:
+                self._count('skipped')
+                continue
+            if self.ledger.is_permanent_failure(entry):
+                self._count('unsupported')
+                continue
+            stored_file = self._stored_file(act, entry)
+            if stored_file:
+                self._count('reused')
+            yield act, stored_file
+
+    def _record_download(self, source_id, file_path, file_size, content_hash):
+        """다운로드한 파일의 크기와 해시를 원장에 기록합니다."""
+        self.ledger.record_download(self.DIRECTION, source_id, content_hash, file_path, file_size)
+
+    def _record_upload_result(self, file_path, status):
+        """업로드 결과(성공/중복/실패)를 원장에 기록합니다."""
+        source_id = self._source_id_from_path(file_path)
+        if source_id is None:
+            return
+        content_hash = self._file_hash(file_path) if self.store.exists(file_path) else None
+        # 메모리에만 있던 데이터는 디스크 경로가 없으므로 경로를 기록하지 않습니다.
+        stored_path = None if self._in_memory(file_path) else file_path
+        self.ledger.mark(self.DIRECTION, source_id, status, content_hash=content_hash, file_path=stored_path)
+
+    def _filter_uploaded_files(self, fit_files):
+        """원장 기준으로 이미 반영된 파일을 업로드 목록에서 제외합니다."""
+        files_to_upload = []
+        for fit_file in fit_files:
+            source_id = self._source_id_from_path(fit_file)
+            if (source_id and self.ledger.is_done(self.DIRECTION, source_id)) or \
+                    (os.path.exists(fit_file) and self.ledger.has_done_hash(self.DIRECTION, self._file_hash(fit_file))):
+                print(f"📒 건너뛰기 (원장에 반영 완료로 기록됨): {os.path.basename(fit_file)}")
+                continue
+            files_to_upload.append(fit_file)
+        return files_to_upload
+
+    def _fit_metadata(self, file_path):
+        """FIT 파일의 메타데이터(시작 시각, 경과 시간 등)를 읽습니다. 같은 파일은 한 번만 읽습니다."""
+        if file_path not in self._fit_metadata_cache:
+            if self.store.is_member(file_path):
+                try:
+                    meta = read_fit_metadata_bytes(self.store.read(file_path))
+                except OSError:
+                    meta = None
+            else:
+                meta = read_fit_metadata(file_path)
+            self._fit_metadata_cache[file_path] = meta
+        return self._fit_metadata_cache[file_path]
+
+    def _files_date_range(self, fit_files):
+        """FIT 파일들의 현지 시작 시각에서 중복 검사에 사용할 (시작일, 종료일)을 구합니다. 알 수 없으면 None."""
+        starts = [key[0] for key in (fit_activity_key(self._fit_metadata(f)) for f in fit_files) if key]
+        if not starts:
+            return None
+        epoch = datetime(1970, 1, 1)
+        # 자정 무렵 활동이 대상 플랫폼에서 다른 날짜로 조회될 수 있어 하루씩 여유를 둡니다.
+        return (epoch + timedelta(seconds=min(starts)) - timedelta(days=1),
+                epoch + timedelta(seconds=max(starts)) + timedelta(days=1))
+
+    def _quarantine(self, fit_file, error):
+        """손상된 FIT 파일을 업로드하지 않고 격리합니다. 원장의 파일 기록을 지워 다음 실행에서 다시 받게 합니다."""
+        filename = os.path.basename(fit_file)
+        self.validator.quarantine(fit_file, error, self.store, self.DIRECTION)
+        self._record_failure('validate', filename, error)
+        source_id = self._source_id_from_path(fit_file)
+        if source_id is not None:
+            self.ledger.record_failure(self.DIRECTION, source_id, clear_file=True)
+        print(f"🚫 손상된 FIT 파일 격리 ({filename}): {error}")
+
+    def _validate_files(self, fit_files):
+        """업로드할 파일들을 프로세스 풀에서 한꺼번에 검사하고, 손상된 파일을 격리한 뒤 정상 파일만 반환합니다."""
+        print(f"🩺 FIT 파일 {len(fit_files)}개의 헤더/크기/CRC를 검사합니다. (작업 프로세스 최대 {self.validator.workers}개)")
+        with self.metrics.phase('validate'):
+            invalid = self.validator.check_many(fit_files, self.store)
+        for fit_file, error in invalid.items():
+            self._quarantine(fit_file, error)
+        return [fit_file for fit_file in fit_files if fit_file not in invalid]
+
+    # ----- 파이프라인 단계 -----
+
+    def _prepare_destination(self, date_range):
+        """대상 플랫폼 로그인과 중복 검사 준비를 수행합니다. 다운로드와 동시에 실행됩니다."""
+        self._ensure_login('destination')
+        with self.metrics.phase('dedup'):
+            self._prepare_duplicate_check(date_range)
+
+    def _exists_on_destination(self, activity, destination_ready):
+        """다운로드 전에 대상 플랫폼에 이미 있는 활동인지 확인하고, 있으면 원장에 중복으로 기록합니다."""
+        if not self.DEDUP_BEFORE_DOWNLOAD or destination_ready is None:
+            return False
+        try:
+            destination_ready.result()
+        except Exception:
+            # 준비 실패는 업로드 단계에서 보고합니다.
+            return False
+        with self.metrics.phase('dedup'):
+            duplicate = self._is_duplicate(None, activity)
+        if duplicate:
+            self._count('duplicate')
+            self._count('download_skipped')
+            self.ledger.mark(self.DIRECTION, self._activity_id(activity), LEDGER_STATUS_DUPLICATE)
+            self._record_checkpoint_upload(activity)
+            print(f"⏭️ 건너뛰기 ({self.DEST_NAME}에 이미 있는 활동, 다운로드 생략): ID {self._activity_id(activity)}")
+        return duplicate
+
+    def _in_memory(self, fit_file):
+        return self.memory_budget is not None and self.store.holds(fit_file)
+
+    def _fetch_to_memory(self, activity):
+        """FIT 데이터를 메모리로 받아 (활동, 가상 경로)를 반환합니다. 메모리 한도에 닿으면 업로드가 끝날 때까지 기다립니다."""
+        fit_file = self._fit_path(activity)
+        reserved = self._memory_estimate
+        self.memory_budget.acquire(reserved)
+        try:
+            with self.metrics.phase('download'):
+                data = self._download_activity_data(activity)
+        except Exception as e:
+            self.memory_budget.release(reserved)
+            self._record_failure('download', f"ID {self._activity_id(activity)}", e)
+            self.ledger.record_failure(self.DIRECTION, self._activity_id(activity),
+                                       permanent=isinstance(e, NoFitFileError))
+            print(f"❌ 다운로드 실패 (ID: {self._activity_id(activity)}): {e}")
+            return None
+        if not data:
+            self.memory_budget.release(reserved)
+            self.ledger.record_failure(self.DIRECTION, self._activity_id(activity))
+            return None
+        self.memory_budget.resize(reserved, len(data))
+        # 다음 예약량은 지금까지 받은 파일 크기의 이동 평균으로 맞춥니다.
+        self._memory_estimate = (self._memory_estimate + len(data)) // 2
+        self.store.hold(fit_file, data)
+        self.metrics.observe_queue('memory_bytes', self.memory_budget.used)
+        self._record_download(self._activity_id(activity), None, len(data), self.store.hash(fit_file))
+        self._count('downloaded')
+        print(f"⬇️ 다운로드 완료 (메모리): {os.path.basename(fit_file)}")
+        return activity, fit_file
+
+    def _fetch(self, item, destination_ready=None, upload=True):
+        """(활동, 기존 파일) 항목을 받아 업로드할 (활동, FIT 파일)을 반환합니다. 실패하거나 건너뛰면 None."""
+        activity, fit_file = item
+        if fit_file:
+            return item
+        if self._exists_on_destination(activity, destination_ready):
+            return None
+        if self.memory_budget is not None and upload:
+            return self._fetch_to_memory(activity)
+        fit_file = self._fit_path(activity)
+        try:
+            with self.metrics.phase('download'):
+                result = self._download_activity(activity, fit_file)
+        except Exception as e:
+            self._record_failure('download', f"ID {self._activity_id(activity)}", e)
+            self.ledger.record_failure(self.DIRECTION, self._activity_id(activity),
+                                       permanent=isinstance(e, NoFitFileError))
+            print(f"❌ 다운로드 실패 (ID: {self._activity_id(activity)}): {e}")
+            return None
+        if not result:
+            self.ledger.record_failure(self.DIRECTION, self._activity_id(activity))
+            return None
+        file_size, content_hash = result
+        # 같은 내용의 파일이 이미 저장소에 있으면 새 파일 대신 기존 파일을 링크합니다.
+        with self.metrics.phase('store'):
+            fit_file, deduplicated = self.store.add(fit_file, content_hash)
+        if deduplicated:
+            self._count('deduplicated')
+        self._record_download(self._activity_id(activity), fit_file, file_size, content_hash)
+        if self._journal:
+            self._journal.record_download(self._activity_id(activity), fit_file)
+        self._count('downloaded')
+        print(f"⬇️ 다운로드 완료: {os.path.basename(fit_file)}")
+        return activity, fit_file
+
+    def _deliver(self, item, destination_ready):
+        """중복 검사를 통과한 FIT 파일을 대상 플랫폼에 업로드합니다."""
+        activity, fit_file = item
+        filename = os.path.basename(fit_file)
+        # 업로드 전용 모드의 파일은 시작 전에 한꺼번에 검사했으므로 다운로드한 파일만 여기서 검사합니다.
+        if activity is not None:
+            with self.metrics.phase('validate'):
+                error = self.validator.check(fit_file, self.store)
+            if error:
+                self._quarantine(fit_file, error)
+                return
+        try:
+            destination_ready.result()
+        except Exception as e:
+            self._record_failure('upload', filename, f"{self.DEST_NAME} 준비 실패 - {e}")
+            print(f"❌ 업로드 실패 ({filename}): {self.DEST_NAME} 준비 실패 - {e}")
+            return
+
+        if self._came_from_destination(fit_file):
+            self._count('returned')
+            self._record_upload_result(fit_file, LEDGER_STATUS_DUPLICATE)
+            self._record_checkpoint_upload(activity)
+            print(f"↩️ 건너뛰기 ({self.DEST_NAME}에서 옮겨 온 활동): {filename}")
+            return
+
+        with self.metrics.phase('dedup'):
+            duplicate = self._is_duplicate(fit_file, activity)
+        if duplicate:
+            self._count('duplicate')
+            self._record_upload_result(fit_file, LEDGER_STATUS_DUPLICATE)
+            self._record_checkpoint_upload(activity)
+            print(f"⏭️ 건너뛰기 (오차범위 내 중복된 활동 발견): {filename}")
+            return
+
+        try:
+            with self.metrics.phase('upload'):
+                success, message = self._upload_activity(fit_file)
+        except Exception as e:
+            success, message = False, e
+        if success:
+            self._count('uploaded')
+            self._record_upload_result(fit_file, LEDGER_STATUS_UPLOADED)
+            self._record_checkpoint_upload(activity)
+            print(f"⬆️ 업로드 성공: {filename}")
+        else:
+            self._record_failure('upload', filename, message)
+            self._record_upload_result(fit_file, LEDGER_STATUS_FAILED)
+            print(f"❌ 업로드 실패 ({filename}): {message}")
+
+    def _deliver_and_release(self, item, destination_ready):
+        """업로드를 마친 뒤 메모리에만 있던 데이터를 비우고 메모리 한도를 돌려줍니다."""
+        try:
+            self._deliver(item, destination_ready)
+        finally:
+            if self._in_memory(item[1]):
+                self.memory_budget.release(self.store.discard(item[1]))
+                self._fit_metadata_cache.pop(item[1], None)
+
+    def _record_pipeline_error(self, stage, item, error):
+        """다운로드/업로드 단계에서 처리하지 못한 예외를 실패로 기록합니다. (검사, 중복 확인 등 도중의 오류 포함)"""
+        activity, fit_file = item
+        if activity is not None:
+            name = f"ID {self._activity_id(activity)}"
+            self.ledger.record_failure(self.DIRECTION, self._activity_id(activity))
+        else:
+            name = os.path.basename(fit_file)
+        label = FAILURE_STAGE_LABELS.get(stage, stage)
+        self._record_failure(stage, name, error)
+        print(f"❌ {label} 실패 ({name}): {error}")
+
+    def _came_from_destination(self, fit_file):
+        """반대 방향으로 이미 보낸 파일과 내용이 같은지 원장 해시로 확인합니다 (양방향 연동의 왕복 업로드 방지)."""
+        if not self.reverse_direction:
+            return False
+        return self.ledger.has_done_hash(self.reverse_direction, self._file_hash(fit_file))
+
+    def _record_checkpoint_upload(self, activity):
+        if self._journal and activity is not None:
+            self._journal.record_upload(self._activity_id(activity))
+
+    def _transfer(self, items, upload=True, date_range=None, prepare=True):
+        """다운로드와 업로드를 제한된 큐로 연결하여 파일이 준비되는 대로 업로드합니다.
+
+        prepare가 False이면 대상 플랫폼 로그인과 중복 검사 준비가 이미 끝난 것으로 보고 생략합니다.
+        """
+        destination = {}
+        prepare_destination = self._prepare_destination if prepare else (lambda date_range: None)
+
+        def start_destination(items):
+            # 처리할 항목이 처음 나타나는 시점에 대상 플랫폼 준비를 시작해 다운로드와 겹치게 합니다.
+            for item in items:
+                if upload and 'ready' not in destination:
+                    destination['ready'] = prep_executor.submit(prepare_destination, date_range)
+                yield item
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as prep_executor:
+            run_pipeline(
+                start_destination(items),
+                produce=lambda item: self._fetch(item, destination.get('ready'), upload),
+                consume=(lambda item: self._deliver_and_release(item, destination['ready'])) if upload else None,
+                # 스레드는 최대 동시 요청 수만큼 두고, 실제 동시 요청 수는 플랫폼별 제한기가 조절합니다.
+                producer_workers=get_limiter(self.SOURCE_NAME).max_concurrency,
+                consumer_workers=get_limiter(self.DEST_NAME).max_concurrency,
+                queue_size=PIPELINE_QUEUE_SIZE,
+                metrics=self.metrics,
+                stages=('download', 'upload'),
+                pools=self.pools,
+                pool_key=self.account_name,
+                on_error=self._record_pipeline_error,
+            )
+
+    # ----- 체크포인트 (중단된 실행 이어하기) -----
+
+    @staticmethod
+    def _checkpoint_args(args):
+        """체크포인트에 저장할 실행 범위 인자를 반환합니다."""
+        return {key: getattr(args, key, None) for key in ('day', 'month', 'all', 'download_only')}
+
+    def _load_checkpoint(self, journal, args):
+        """체크포인트를 읽어 args에 이전 실행 범위를 복원하고 진행 상황을 반환합니다."""
+        state = journal.load()
+        if not state:
+            print("[안내] 이어서 실행할 체크포인트가 없어 새로 실행합니다.")
+            return None
+        for key, value in state['args'].items():
+            setattr(args, key, value)
+        print(f"♻️ 중단된 작업을 이어서 실행합니다. (조회 {len(state['activities'])}개, "
+              f"다운로드 {len(state['downloaded'])}개, 업로드 {len(state['uploaded'])}개 완료)")
+        return state
+
+    def _cleanup_partial_files(self):
+        """중단된 실행이 남긴 다운로드 임시 파일(.part)을 정리합니다."""
+        for name in os.listdir(self.output_dir):
+            if name.startswith('.') and name.endswith('.part'):
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
+
+    def _filter_with_checkpoint(self, items, state):
+        """체크포인트에 완료로 기록된 업로드는 건너뛰고, 받아 둔 파일은 재사용합니다."""
+        for activity, fit_file in items:
+            activity_id = self._activity_id(activity)
+            if activity_id in state['uploaded']:
+                self._count('skipped')
+                continue
+            saved_path = state['downloaded'].get(activity_id)
+            if not fit_file and saved_path and self.store.exists(saved_path):
+                self._count('reused')
+                fit_file = saved_path
+            yield activity, fit_file
+
+    def _print_summary(self):
+        if self.stats['skipped'] or self.stats['reused']:
+            print(f"📒 원장 기준 이미 반영된 활동 {self.stats['skipped']}개 건너뜀, 기존 파일 {self.stats['reused']}개 재사용")
+        if self.stats['unsupported']:
+            print(f"⛔ 다시 시도해도 실패하는 활동(FIT 파일이 없는 원본 등) {self.stats['unsupported']}개는 건너뛰었습니다.")
+        if self.stats['download_skipped']:
+            print(f"⏭️ {self.DEST_NAME}에 이미 있는 활동 {self.stats['download_skipped']}개는 다운로드하지 않았습니다.")
+        if self.stats['returned']:
+            print(f"↩️ {self.DEST_NAME}에서 옮겨 온 활동 {self.stats['returned']}개는 되돌려 보내지 않았습니다.")
+        if self.stats['deduplicated']:
+            print(f"🗃️ 내용이 같은 파일 {self.stats['deduplicated']}개는 저장소의 기존 파일에 연결했습니다.")
+        print(f"📊 다운로드 {self.stats['downloaded']}개 / 업로드 {self.stats['uploaded']}개 / "
+              f"중복 건너뜀 {self.stats['duplicate']}개 / "
+              f"실패 {self.stats['download_failed'] + self.stats['upload_failed'] + self.stats['validate_failed']}개")
+        if self.stats['validate_failed']:
+            print(f"🚫 손상된 FIT 파일 {self.stats['validate_failed']}개를 격리했습니다: {self.validator.report_path}")
+        if self.memory_budget is not None and self.memory_budget.peak:
+            print(f"🧠 메모리 전송 최대 사용량 {self.memory_budget.peak / (1024 * 1024):.1f}MB "
+                  f"(한도 {self.memory_budget.limit / (1024 * 1024):.0f}MB)")
+        if self.retry_budget.used:
+            print(f"🔁 일시적 오류로 재시도 {self.retry_budget.used}회 (한도 {self.retry_budget.total}회)")
+        if self.failures:
+            print(f"❗ 재시도 후에도 실패한 항목 {len(self.failures)}개 (다음 실행 시 다시 시도됩니다):")
+            for stage, name, error in self.failures:
+                print(f"   - [{FAILURE_STAGE_LABELS.get(stage, stage)}] {name}: {error}")
+
+    def _export_metrics(self, direction=None, counters=None):
+        """실행 지표를 JSON 요약과 Prometheus 텍스트 파일(node_exporter textfile collector용)로 저장합니다."""
+        direction = direction or self.DIRECTION
+        counters = self.stats if counters is None else counters
+        summary = self.metrics.summary()
+        if summary['phases']:
+            labels = {'login': '로그인', 'listing': '목록 조회', 'download': '다운로드', 'store': '저장',
+                      'dedup': '중복 검사', 'validate': '무결성 검사', 'upload': '업로드'}
+            phases = ", ".join(f"{labels.get(name, name)} {entry['seconds']:.1f}초"
+                               for name, entry in summary['phases'].items())
+            print(f"⏱️ 단계별 소요 시간(작업 스레드 합계): {phases}")
+        metrics_dir = self.config.get('METRICS_DIR') or os.path.join(self.root_dir, METRICS_DIR_NAME)
+        name, labels = direction, {'direction': direction}
+        if self.account_name:
+            # 여러 계정이 같은 METRICS_DIR을 써도 파일과 시계열이 겹치지 않게 합니다.
+            name, labels = f"{direction}_{self.account_name}", dict(labels, account=self.account_name)
+        try:
+            self.metrics.export(
+                os.path.join(metrics_dir, f"{name}.json"),
+                os.path.join(metrics_dir, f"{METRICS_PREFIX}_{name}.prom"),
+                labels=labels, counters=counters,
+            )
+        except OSError as e:
+            print(f"⚠️ 실행 지표 저장 실패: {e}")
+
+    # ----- 워치 모드 (커서 이후 새 활동만 주기적으로 반영) -----
+
+    def _cursor_key(self, activity):
+        start = self._activity_start(activity)
+        return None if start is None else (start, self._activity_id(activity))
+
+    def _after_cursor(self, activities, cursor, candidates):
+        """커서 이후의 활동만 흘려보내고, 커서 갱신에 쓸 수 있도록 candidates에 모아 둡니다."""
+        for act in activities:
+            key = self._cursor_key(act)
+            if cursor and key and key <= cursor:
+                continue
+            candidates.append(act)
+            yield act
+
+    def _advance_cursor(self, candidates):
+        """시작 시각 순으로 반영 완료된 활동까지 커서를 옮깁니다. 실패한 활동이 있으면 그 앞에서 멈춰 다음 주기에 다시 시도합니다.
+
+        WATCH_MAX_ATTEMPTS번 실패한 활동은 영구 실패로 보고 건너뜁니다. (원장에는 failed로 남아 일반 실행에서 다시 시도할 수 있습니다)
+        FIT 파일이 없는 원본처럼 처음부터 영구 실패로 기록된 활동도 건너뜁니다.
+        """
+        entries = self.ledger.entries(self.DIRECTION)
+        new_cursor = None
+        for key, act in sorted(((self._cursor_key(act), act) for act in candidates if self._cursor_key(act)),
+                               key=lambda pair: pair[0]):
+            entry = entries.get(str(self._activity_id(act)))
+            if self.ledger.is_permanent_failure(entry) or (
+                    entry and entry['status'] == LEDGER_STATUS_FAILED and entry['attempts'] >= WATCH_MAX_ATTEMPTS):
+                print(f"[안내] {entry['attempts']}번 실패한 활동을 건너뛰고 커서를 옮깁니다. (ID: {self._activity_id(act)})")
+            elif not entry or entry['status'] not in DONE_STATUSES:
+                break
+            new_cursor = key
+        if new_cursor:
+            self.ledger.set_cursor(self.DIRECTION, *new_cursor)
+        return new_cursor
+
+    def poll(self):
+        """워치 모드의 한 주기를 실행하고 커서 이후 새로 조회된 활동 수를 반환합니다."""
+        self.metrics.reset()
+        try:
+            return self._poll()
+        finally:
+            self.metrics.finish()
+            self._export_metrics()
+
+    def _poll(self):
+        self.stats.clear()
+        self.failures = []
+        self.retry_budget.reset()
+
+        cursor = self.ledger.get_cursor(self.DIRECTION)
+        end_date = datetime.now()
+        if cursor:
+            # 시계가 늦은 기기나 늦게 동기화된 활동을 위해 커서보다 조금 앞서부터 조회합니다.
+            start_date = datetime(1970, 1, 1) + timedelta(seconds=cursor[0]) - timedelta(days=WATCH_OVERLAP_DAYS)
+        else:
+            start_date = end_date - timedelta(days=WATCH_INITIAL_DAYS)
+        self._ensure_login('source')
+
+        candidates = []
+        listing = self.metrics.timed_iter('listing', self._list_activities(start_date, end_date))
+        self._transfer(self._filter_with_ledger(self._after_cursor(listing, cursor, candidates)),
+                       date_range=(start_date, end_date))
+        self._advance_cursor(candidates)
+
+        pending = self.stats['listed'] - self.stats['skipped'] - self.stats['unsupported']
+        if pending:
+            print(f"✅ 새 {self.SOURCE_NAME} 활동 {pending}개 처리 완료")
+            self._print_summary()
+        return pending
+
     def run(self, args):
         """마이그레이션 프로세스를 실행하는 메인 메서드"""
+        self.metrics.reset()
+        try:
+            self._run(args)
+        finally:
+            self.validator.shutdown()
+            self.metrics.finish()
+            self._export_metrics()
+
+    def _run(self, args):
+        self.stats.clear()
+        self.failures = []
+        self.retry_budget.reset()
+
         # 업로드 전용 모드
         if args.upload_only:
             if not args.file:
                 print("[오류] 업로드 전용 모드에서는 --file 인자가 필수입니다.")
                 return
-            print(f"🚀 {len(args.file)}개 FIT 파일을 업로드합니다.")
-            self._upload_activities(args.file)
+            fit_files = self._filter_uploaded_files(args.file)
+            if not fit_files:
+                print("✅ 업로드할 새로운 활동이 없습니다.")
+                return
+            fit_files = self._validate_files(fit_files)
+            if not fit_files:
+                print("⚠️ 업로드할 수 있는 정상 FIT 파일이 없습니다.")
+                self._print_summary()
+                return
+            print(f"🚀 {len(fit_files)}개 FIT 파일을 업로드합니다.")
+            # 활동 정보가 없으므로 FIT 파일에 기록된 시작 시각으로 중복 검사 기간을 정합니다.
+            self._transfer([(None, fit_file) for fit_file in fit_files], date_range=self._files_date_range(fit_files))
+            self._print_summary()
             return
 
-        # 다운로드 전용 모드
-        if args.download_only:
-            print("⬇️ 활동 다운로드를 시작합니다.")
-            self._download_activities(args)
-            return
+        self._cleanup_partial_files()
+        journal = CheckpointJournal(os.path.join(self.output_dir, CHECKPOINT_FILENAME))
+        resume_state = self._load_checkpoint(journal, args) if getattr(args, 'resume', False) else None
 
-        # 기본 (다운로드 + 업로드) 모드
         print("⬇️ 활동 다운로드를 시작합니다.")
-        fit_files, context = self._download_activities(args)
-        if not fit_files:
+        date_range = self._resolve_range(args)
+        self._ensure_login('source')
+        start_date, end_date = date_range
+
+        if resume_state:
+            journal.resume()
+        else:
+            journal.start(self._checkpoint_args(args))
+        self._journal = journal
+        try:
+            if resume_state and resume_state['listing_done']:
+                print(f"♻️ 저장된 조회 결과 {len(resume_state['activities'])}개를 사용합니다. (목록 조회 생략)")
+                activities = list(resume_state['activities'].values())
+            else:
+                print(f"🔍 {start_date:%Y-%m-%d} ~ {end_date:%Y-%m-%d} {self.SOURCE_NAME} 활동을 조회합니다.")
+                listing = self.metrics.timed_iter('listing', self._list_activities(start_date, end_date))
+                activities = journal.record_listing(listing, self._activity_id)
+            # 목록 조회가 끝나기를 기다리지 않고, 조회되는 대로 다운로드를 시작합니다.
+            items = self._filter_with_ledger(activities)
+            if resume_state:
+                items = self._filter_with_checkpoint(items, resume_state)
+
+            # 다운로드 전용 모드
+            if getattr(args, 'download_only', False):
+                self._transfer(items, upload=False)
+            # 기본 (다운로드 + 업로드) 모드: 다운로드가 끝난 파일부터 바로 업로드합니다.
+            else:
+                self._transfer(items, date_range=date_range)
+        finally:
+            self._journal = None
+            journal.close()
+        # 끝까지 실행되었으므로 체크포인트를 지웁니다. 중간에 예외로 끝나면 남겨 두어 --resume에 사용합니다.
+        journal.finish()
+
+        if not self.stats['listed']:
+            print("⚠️ 해당 기간에 다운로드할 활동이 없습니다.")
+            return
+        if self.stats['listed'] == self.stats['skipped']:
+            print(f"📒 조회된 {self.stats['listed']}개 활동이 모두 원장에 반영 완료로 기록되어 있습니다.")
             print("✅ 처리할 파일이 없어 종료합니다.")
             return
-        
-        print(f"\n⬆️ {len(fit_files)}개 FIT 파일 업로드를 시작합니다.")
-        self._upload_activities(fit_files, **context)
+        print(f"✅ 총 {self.stats['listed']}개 {self.SOURCE_NAME} 활동 처리 완료")
+        self._print_summary()
@@ -0,0 +1,255 @@
+import time
+import queue
+import threading
+import concurrent.futures
+from collections import OrderedDict, deque
+
+# 소비자 스레드에 작업 종료를 알리는 표식
+_DONE = object()
+
+class FairPool:
+    """여러 계정이 함께 쓰는 고정 크기 작업자 풀
+
+    작업을 계정(key)별 대기열에 넣고, 작업자는 대기 중인 계정을 돌아가며 하나씩 꺼내 실행합니다.
+    작업이 많은 계정이 먼저 몰아서 제출해도 다른 계정의 작업이 뒤로 밀리지 않습니다.
+    """
+    def __init__(self, workers, name="pool"):
+        self.workers = workers
+        self._pending = OrderedDict()  # key → deque[(future, func, args)]
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = [threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, func, *args):
+        future = concurrent.futures.Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("풀이 이미 종료되었습니다.")
+            self._pending.setdefault(key, deque()).append((future, func, args))
+            self._cond.notify()
+        return future
+
+    def _next_task(self):
+        """가장 오래 기다린 계정의 작업을 꺼내고, 그 계정을 순서의 맨 뒤로 보냅니다. _cond 잠금 안에서 호출합니다."""
+        key, tasks = next(iter(self._pending.items()))
+        task = tasks.popleft()
+        if tasks:
+            self._pending.move_to_end(key)
+        else:
+            del self._pending[key]
+        return task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._shutdown:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                future, func, args = self._next_task()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True):
+        """대기 중인 작업을 모두 처리한 뒤 작업자를 종료합니다."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+class MemoryBudget:
+    """메모리에 올려 둔 전송 대기 데이터의 총량을 제한합니다.
+
+    한도를 넘게 되면 acquire가 다른 항목이 release될 때까지 기다리므로, 업로드가 밀리면
+    다운로드 작업자가 자연스럽게 멈춥니다. 한도보다 큰 항목 하나는 다른 항목이 없을 때 허용합니다.
+    """
+    def __init__(self, limit_bytes):
+        self.limit = limit_bytes
+        self.used = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        with self._cond:
+            while self.used and self.used + size > self.limit:
+                self._cond.wait()
+            self.used += size
+            self.peak = max(self.peak, self.used)
+
+    def resize(self, old_size, new_size):
+        """예약해 둔 크기를 실제 크기로 바꿉니다. 늘어나는 경우에도 기다리지 않습니다."""
+        with self._cond:
+            self.used += new_size - old_size
+            self.peak = max(self.peak, self.used)
+            if new_size < old_size:
+                self._cond.notify_all()
+
+    def release(self, size):
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+def run_pipeline(items, produce, consume=None, producer_workers=1, consumer_workers=1, queue_size=1,
+                 metrics=None, stages=('produce', 'consume'), pools=None, pool_key=None, on_error=None):
+    """items를 produce로 처리한 결과를 제한된 큐를 거쳐 곧바로 consume으로 넘깁니다.
+
+    produce가 None을 반환한 항목은 소비자에게 전달하지 않습니다. 큐가 가득 차면
+    생산자 스레드가 대기하므로 소비자가 느려도 처리 대기 중인 결과가 무한히 쌓이지 않습니다.
+    consume이 None이면 생산 단계만 실행합니다.
+    metrics를 넘기면 큐 길이와 단계별(stages 이름) 작업자 가동률을 기록합니다.
+    pools로 (생산 FairPool, 소비 FairPool)을 넘기면 자체 스레드 대신 여러 실행이 공유하는 풀에서
+    pool_key 몫으로 실행합니다.
+    produce/consume에서 예외가 나면 on_error(단계 이름, 항목, 예외)를 호출하고 다음 항목을 계속 처리합니다.
+    """
+    if pools is not None:
+        return _run_on_pools(items, produce, consume, pools, pool_key, queue_size, metrics, stages, on_error)
+    work_queue = queue.Queue(maxsize=queue_size) if consume else None
+    started = time.monotonic()
+
+    def busy(stage, func, item):
+        return _timed(metrics, stage, func, item)
+
+    def consumer_loop():
+        while True:
+            result = work_queue.get()
+            if result is _DONE:
+                break
+            try:
+                busy(stages[1], consume, result)
+            except Exception as e:
+                # 한 항목의 예외로 소비자가 멈추면 큐가 막혀 생산자까지 멈추게 됩니다.
+                _report_error(on_error, stages[1], result, e)
+
+    def producer_task(item):
+        try:
+            result = busy(stages[0], produce, item)
+        except Exception as e:
+            _report_error(on_error, stages[0], item, e)
+            return
+        if result is not None and work_queue is not None:
+            if metrics is not None:
+                # 큐가 계속 차 있으면 소비 단계가, 비어 있으면 생산 단계가 병목입니다.
+                metrics.observe_queue(stages[1], work_queue.qsize())
+            work_queue.put(result)
+
+    consumers = []
+    if consume:
+        consumers = [threading.Thread(target=consumer_loop, daemon=True) for _ in range(consumer_workers)]
+        for thread in consumers:
+            thread.start()
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=producer_workers) as executor:
+            futures = [executor.submit(producer_task, item) for item in items]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ 처리 중 예기치 않은 오류: {e}")
+    finally:
+        for _ in consumers:
+            work_queue.put(_DONE)
+        for thread in consumers:
+            thread.join()
+        if metrics is not None:
+            wall = time.monotonic() - started
+            metrics.set_workers(stages[0], producer_workers, wall)
+            if consume:
+                metrics.set_workers(stages[1], consumer_workers, wall)
+
+def _report_error(on_error, stage, item, error):
+    """처리 중 예외를 on_error로 넘깁니다. on_error가 없거나 그 자체가 실패하면 출력만 합니다."""
+    if on_error is not None:
+        try:
+            on_error(stage, item, error)
+            return
+        except Exception as e:
+            print(f"❌ 오류 기록 실패: {e}")
+    print(f"❌ 처리 중 예기치 않은 오류: {error}")
+
+def _timed(metrics, stage, func, item):
+    """func(item)을 실행하고 걸린 시간을 단계 작업 시간으로 기록합니다."""
+    if metrics is None:
+        return func(item)
+    task_started = time.monotonic()
+    try:
+        return func(item)
+    finally:
+        metrics.add_worker_time(stage, time.monotonic() - task_started)
+
+def _run_on_pools(items, produce, consume, pools, pool_key, queue_size, metrics, stages, on_error=None):
+    """공유 풀에서 파이프라인을 실행합니다.
+
+    한 실행이 풀에 맡긴 항목(다운로드 중 + 업로드 대기/중)은 생산 풀 크기 + queue_size + 소비 풀 크기까지만
+    허용합니다. 한도에 닿으면 풀 작업자가 아니라 이 함수를 호출한 실행 스레드가 새 항목 제출을 멈추므로,
+    한 계정의 업로드가 밀려도 다운로드 결과가 무한히 쌓이지 않고 공유 작업자가 그 계정에 묶이지도 않습니다.
+    """
+    producer_pool, consumer_pool = pools
+    started = time.monotonic()
+    limit = producer_pool.workers + queue_size + (consumer_pool.workers if consume else 0)
+    cond = threading.Condition()
+    counts = {'outstanding': 0, 'consuming': 0}
+
+    def done(consumed=False):
+        with cond:
+            counts['outstanding'] -= 1
+            if consumed:
+                counts['consuming'] -= 1
+            cond.notify_all()
+
+    def consume_task(result):
+        try:
+            _timed(metrics, stages[1], consume, result)
+        except Exception as e:
+            _report_error(on_error, stages[1], result, e)
+        finally:
+            done(consumed=True)
+
+    def producer_task(item):
+        try:
+            result = _timed(metrics, stages[0], produce, item)
+        except Exception as e:
+            _report_error(on_error, stages[0], item, e)
+            result = None
+        if result is None or not consume:
+            done()
+            return
+        with cond:
+            if metrics is not None:
+                metrics.observe_queue(stages[1], counts['consuming'])
+            counts['consuming'] += 1
+        try:
+            # 소비 풀에 넘기기만 하고 기다리지 않으므로 생산 작업자는 곧바로 다른 계정의 작업을 맡습니다.
+            consumer_pool.submit(pool_key, consume_task, result)
+        except Exception as e:
+            _report_error(on_error, stages[1], result, e)
+            done(consumed=True)
+
+    for item in items:
+        with cond:
+            while counts['outstanding'] >= limit:
+                cond.wait()
+            counts['outstanding'] += 1
+        try:
+            producer_pool.submit(pool_key, producer_task, item)
+        except BaseException:
+            done()
+            raise
+    with cond:
+        while counts['outstanding']:
+            cond.wait()
+    if metrics is not None:
+        wall = time.monotonic() - started
+        metrics.set_workers(stages[0], producer_pool.workers, wall)
+        if consume:
+            metrics.set_workers(stages[1], consumer_pool.workers, wall)
@@ -5,8 +5,19 @@ block_cipher = None
 
 import sys
 import os
+import subprocess
 from PyInstaller.utils.hooks import collect_submodules
 
+# 시작 속도 점검용 import 시간 보고서 (build/import_profile.txt). 실패해도 빌드는 계속합니다.
+try:
+    subprocess.run(
+        [sys.executable, os.path.join('benchmarks', 'import_profile.py'), '--top', '20',
+         '--output', os.path.join('build', 'import_profile.txt')],
+        check=True, timeout=300,
+    )
+except Exception as e:
+    print(f"[안내] import 시간 보고서를 만들지 못했습니다: {e}")
+
 # 데이터 파일(설정, 예시 등) 포함
 datas = [
     ('config.py', '.'),
@@ -0,0 +1,106 @@
+import time
+import threading
+
+import requests
+
+from constants import RATE_LIMITS, THROTTLE_COOLDOWN_SEC, SLOW_RESPONSE_SEC
+
+def is_overload_error(exc):
+    """서버 과부하/속도 제한을 뜻하는 오류(429, 5xx, 연결 끊김/타임아웃)인지 판별합니다."""
+    if 'TooManyRequests' in type(exc).__name__:
+        return True
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status is not None and (status == 429 or status >= 500)
+
+class AdaptiveLimiter:
+    """토큰 버킷으로 초당 요청 수를 제한하고, AIMD 방식으로 동시 요청 수를 조절합니다.
+
+    응답이 정상이면 동시 요청 한도를 조금씩(가산) 늘리고, 429/5xx나 느린 응답이 오면
+    한도를 절반으로(승산) 줄입니다. 속도 제한 응답 뒤에는 잠시 새 요청을 멈춥니다.
+    """
+    def __init__(self, name, rate, burst, min_concurrency, max_concurrency, initial_concurrency,
+                 slow_threshold=SLOW_RESPONSE_SEC, cooldown=THROTTLE_COOLDOWN_SEC):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.slow_threshold = slow_threshold
+        self.cooldown = cooldown
+        self.limit = float(initial_concurrency)
+        self._in_flight = 0
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def concurrency(self):
+        """현재 동시 요청 한도"""
+        return int(self.limit)
+
+    def _take_token(self):
+        """토큰 버킷에서 토큰 하나를 꺼낼 때까지 기다립니다. _cond 잠금 안에서 호출합니다."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            wait = max(self._paused_until - now, 0.0)
+            if not wait:
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._cond.wait(wait)
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+            try:
+                self._take_token()
+            except BaseException:
+                self._in_flight -= 1
+                self._cond.notify_all()
+                raise
+
+    def release(self, latency, overloaded=False):
+        with self._cond:
+            self._in_flight -= 1
+            if overloaded:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._paused_until = time.monotonic() + self.cooldown
+            elif latency > self.slow_threshold:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            else:
+                # 동시 요청 한도만큼 정상 응답이 오면 한도가 1 늘어납니다.
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        """한도 안에서 func를 호출하고 응답 결과로 한도를 조정합니다."""
+        self.acquire()
+        started = time.monotonic()
+        overloaded = False
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            self.release(time.monotonic() - started, overloaded)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(platform):
+    """플랫폼('coros'/'garmin')별로 프로세스 전체가 공유하는 제한기를 반환합니다."""
+    key = platform.lower()
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveLimiter(key, **RATE_LIMITS[key])
+        return _limiters[key]
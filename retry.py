@@ -0,0 +1,96 @@
+import re
+import time
+import random
+import threading
+
+import requests
+
+from ratelimit import is_overload_error
+from constants import RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_GLOBAL_BUDGET
+
+# garminconnect가 HTTP 오류를 감쌀 때 메시지에 남기는 상태 코드
+# ("API Error 409 - Duplicate Activity", "API client error (404): ...")
+_STATUS_IN_MESSAGE = re.compile(r'API Error (\d{3})|\((\d{3})\)')
+
+def _status_code(exc):
+    """예외가 가리키는 HTTP 상태 코드를 반환합니다. 알 수 없으면 None.
+
+    garminconnect 0.3은 HTTP 오류를 응답 없는 GarminConnectConnectionError로 감싸므로
+    원인 예외(__cause__)의 응답이나 메시지에서 상태 코드를 찾습니다.
+    """
+    for candidate in (exc, exc.__cause__):
+        status = getattr(getattr(candidate, 'response', None), 'status_code', None)
+        if status is not None:
+            return status
+    match = _STATUS_IN_MESSAGE.search(str(exc))
+    return int(match.group(1) or match.group(2)) if match else None
+
+def is_retryable(exc):
+    """다시 시도하면 성공할 수 있는 일시적 오류인지 판별합니다.
+
+    네트워크 끊김/타임아웃, 429, 5xx는 일시적 오류로, 그 밖의 4xx나
+    파일 형식/값 오류 등은 재시도해도 결과가 같은 영구 오류로 분류합니다.
+    """
+    if is_overload_error(exc):
+        return True
+    if isinstance(exc, requests.exceptions.ChunkedEncodingError):
+        return True
+    if type(exc).__name__ != 'GarminConnectConnectionError':
+        return False
+    # garminconnect는 네트워크 오류와 HTTP 오류를 모두 GarminConnectConnectionError로 감싸서 전달합니다.
+    # 상태 코드가 없으면 네트워크 오류로 보고, 429/5xx만 다시 시도합니다. (409 중복 업로드, 400 잘못된 파일 등은 영구 오류)
+    status = _status_code(exc)
+    return status is None or status == 429 or status >= 500
+
+class RetryBudget:
+    """한 번의 실행 전체에서 사용할 수 있는 재시도 횟수의 상한"""
+    def __init__(self, total=RETRY_GLOBAL_BUDGET):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self):
+        with self._lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+    def reset(self):
+        with self._lock:
+            self.used = 0
+
+class RetryPolicy:
+    """호출당 최대 시도 횟수와 지수 백오프(전체 지터) 대기 시간을 정의합니다."""
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """attempt번째 실패 뒤 기다릴 시간(초). 0 ~ min(최대, 기본 * 2^(attempt-1)) 사이에서 무작위로 고릅니다."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+def call_with_retry(func, *args, policy=None, budget=None, description="", before_retry=None, **kwargs):
+    """func를 호출하고, 일시적 오류이면 정책과 전체 예산 안에서 백오프 후 다시 시도합니다.
+
+    영구 오류이거나 시도/예산을 모두 쓰면 마지막 예외를 그대로 발생시킵니다.
+    before_retry는 재시도 직전에 호출됩니다 (예: 업로드 파일 되감기).
+    """
+    policy = policy or RetryPolicy()
+    attempt = 1
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= policy.max_attempts or not is_retryable(e):
+                raise
+            if budget is not None and not budget.try_consume():
+                print(f"⚠️ 전체 재시도 한도를 모두 사용하여 더 이상 재시도하지 않습니다. ({description})")
+                raise
+            delay = policy.delay(attempt)
+            print(f"🔁 재시도 {attempt}/{policy.max_attempts - 1} ({description}): {e} - {delay:.1f}초 후")
+            time.sleep(delay)
+            if before_retry:
+                before_retry()
+            attempt += 1
@@ -0,0 +1,435 @@
+import io
+import os
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import zipfile
+import threading
+
+from constants import FIT_STORAGE_FILES, FIT_STORAGE_ARCHIVE
+
+class FitStore:
+    """FIT 파일을 내용 해시(SHA-256) 이름으로 한 번만 보관하는 저장소
+
+    객체는 `<저장소>/objects/<해시 앞 2자리>/<해시>.fit`에 저장되므로 해시만 알면 바로
+    찾을 수 있습니다. 출력 폴더의 `YYYYMMDD_activityId.fit` 파일은 객체의 하드 링크라
+    같은 내용이 다른 ID/이름으로 여러 번 들어와도 디스크에는 한 벌만 남습니다.
+    하드 링크를 지원하지 않는 파일 시스템에서는 복사본을 만듭니다.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def object_path(self, content_hash):
+        return os.path.join(self.objects_dir, content_hash[:2], f"{content_hash}.fit")
+
+    @staticmethod
+    def _hash_stream(f):
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    # ----- 저장된 파일 읽기 (백엔드와 무관하게 같은 방식으로 사용) -----
+
+    def is_member(self, path):
+        """path가 압축 보관 파일 안의 항목을 가리키는지 확인합니다."""
+        return False
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def getsize(self, path):
+        return os.path.getsize(path)
+
+    def open(self, path):
+        """저장된 FIT 파일을 바이너리 읽기용으로 엽니다."""
+        return open(path, 'rb')
+
+    def read(self, path):
+        with self.open(path) as f:
+            return f.read()
+
+    def hash(self, path):
+        """저장된 FIT 파일 내용의 SHA-256 해시를 계산합니다."""
+        with self.open(path) as f:
+            return self._hash_stream(f)
+
+    # ----- 저장 -----
+
+    def verify(self, content_hash, size=None):
+        """해시에 해당하는 객체가 있고 크기와 내용이 기록과 일치하는지 확인합니다."""
+        path = self.object_path(content_hash)
+        try:
+            if size is not None and os.path.getsize(path) != size:
+                return False
+            return self.hash(path) == content_hash
+        except OSError:
+            return False
+
+    @staticmethod
+    def _same_file(a, b):
+        try:
+            return os.path.samefile(a, b)
+        except OSError:
+            return False
+
+    def _link(self, object_path, file_path):
+        """file_path를 객체의 하드 링크로 원자적으로 교체합니다."""
+        dest_dir = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(dest_dir, exist_ok=True)
+        tmp_path = os.path.join(dest_dir, f".{os.path.basename(file_path)}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            try:
+                os.link(object_path, tmp_path)
+            except OSError:
+                shutil.copyfile(object_path, tmp_path)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def add(self, file_path, content_hash):
+        """다운로드한 파일을 저장소에 등록하고 (이후 사용할 경로, 기존 내용과 중복 여부)를 반환합니다.
+
+        같은 내용의 객체가 이미 있으면 file_path를 그 객체의 링크로 바꿉니다.
+        """
+        object_path = self.object_path(content_hash)
+        with self._lock:
+            if os.path.exists(object_path):
+                if self._same_file(object_path, file_path):
+                    return file_path, False
+                self._link(object_path, file_path)
+                return file_path, True
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            try:
+                os.link(file_path, object_path)
+            except OSError:
+                self._link(file_path, object_path)
+            return file_path, False
+
+    def restore(self, content_hash, size, file_path):
+        """저장된 객체를 검증한 뒤 file_path에서 다시 사용할 수 있게 하고 그 경로를 반환합니다. 없으면 None.
+
+        이미 같은 파일이면 아무것도 쓰지 않습니다.
+        """
+        if not self.verify(content_hash, size):
+            return None
+        object_path = self.object_path(content_hash)
+        with self._lock:
+            if not self._same_file(object_path, file_path):
+                self._link(object_path, file_path)
+        return file_path
+
+    def remove(self, content_hash):
+        """손상된 파일 등 다시 쓰면 안 되는 내용의 객체를 지웁니다. 지운 것이 있으면 True."""
+        with self._lock:
+            try:
+                os.remove(self.object_path(content_hash))
+                return True
+            except OSError:
+                return False
+
+    def close(self):
+        """저장소가 열어 둔 자원을 닫습니다. 파일별 저장 방식은 열어 둔 것이 없습니다."""
+        pass
+
+class ArchiveFitStore(FitStore):
+    """FIT 파일을 월별 압축 보관 파일(`<저장소>/archives/YYYYMM.zip`)에 모아 저장하는 저장소
+
+    수년치 활동도 한 달에 파일 하나로 줄어들어 디스크 사용량과 폴더 조회 비용이 작아집니다.
+    내용 해시 → (보관 파일, 항목 이름) 색인을 SQLite로 유지해 같은 내용은 한 번만 저장합니다.
+    보관된 파일은 `.../archives/202412.zip/20241201_123.fit` 형태의 경로로 가리키며,
+    업로드 등에서는 임시 파일로 풀지 않고 메모리로 바로 읽습니다.
+    """
+    def __init__(self, root):
+        super().__init__(root)
+        self.archives_dir = os.path.join(root, "archives")
+        os.makedirs(self.archives_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "archive_index.db"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive_members (
+                    content_hash TEXT PRIMARY KEY,
+                    archive      TEXT NOT NULL,
+                    member       TEXT NOT NULL,
+                    size         INTEGER NOT NULL
+                )
+            """)
+        for name in os.listdir(self.archives_dir):
+            if name.endswith(".zip"):
+                self._recover(os.path.join(self.archives_dir, name))
+
+    def _split(self, path):
+        """보관 파일 항목 경로를 (보관 파일 경로, 항목 이름)으로 나눕니다. 일반 파일이면 None."""
+        marker = ".zip" + os.sep
+        index = path.rfind(marker)
+        if index < 0:
+            return None
+        return path[:index + 4], path[index + len(marker):]
+
+    def is_member(self, path):
+        return self._split(path) is not None
+
+    def exists(self, path):
+        parts = self._split(path)
+        if parts is None:
+            return super().exists(path)
+        try:
+            with self._lock, zipfile.ZipFile(parts[0]) as zf:
+                zf.getinfo(parts[1])
+            return True
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return False
+
+    def getsize(self, path):
+        parts = self._split(path)
+        if parts is None:
+            return super().getsize(path)
+        try:
+            with self._lock, zipfile.ZipFile(parts[0]) as zf:
+                return zf.getinfo(parts[1]).file_size
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise OSError(f"보관 파일 항목을 읽을 수 없습니다: {path} ({e})")
+
+    def open(self, path):
+        parts = self._split(path)
+        if parts is None:
+            return super().open(path)
+        # FIT 파일은 작으므로 항목 전체를 메모리로 읽습니다. 읽는 동안 CRC도 검사됩니다.
+        try:
+            with self._lock, zipfile.ZipFile(parts[0]) as zf:
+                return io.BytesIO(zf.read(parts[1]))
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise OSError(f"보관 파일 항목을 읽을 수 없습니다: {path} ({e})")
+
+    def _lookup(self, content_hash):
+        row = self._conn.execute(
+            "SELECT archive, member, size FROM archive_members WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return (os.path.join(self.archives_dir, row[0], row[1]), row[2]) if row else (None, None)
+
+    def verify(self, content_hash, size=None):
+        with self._lock:
+            path, stored_size = self._lookup(content_hash)
+        if path is None or (size is not None and stored_size != size):
+            return False
+        try:
+            return self.hash(path) == content_hash
+        except OSError:
+            return False
+
+    def _archive_name(self, file_name):
+        """파일명(YYYYMMDD_...)의 연월로 보관 파일 이름을 정합니다."""
+        prefix = file_name[:6]
+        return f"{prefix}.zip" if prefix.isdigit() else "misc.zip"
+
+    def _recover(self, archive_path):
+        """추가 도중 중단된 보관 파일을 추가 전 상태로 되돌립니다."""
+        journal_path = archive_path + ".journal"
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, 'rb') as f:
+            start_dir = int(f.readline())
+            central_dir = f.read()
+        if start_dir == 0:
+            # 새로 만들던 보관 파일이었으므로 지웁니다.
+            try:
+                os.remove(archive_path)
+            except OSError:
+                pass
+        else:
+            with open(archive_path, 'r+b') as f:
+                f.truncate(start_dir)
+                f.seek(start_dir)
+                f.write(central_dir)
+                f.flush()
+                os.fsync(f.fileno())
+        os.remove(journal_path)
+
+    def _append(self, archive_path, file_path, member):
+        """보관 파일에 항목을 추가합니다.
+
+        zip 추가는 기존 중앙 디렉터리를 덮어쓰므로, 먼저 원래 중앙 디렉터리를 저널에 남겨
+        도중에 중단되어도 _recover로 이전 상태를 복구할 수 있게 합니다.
+        """
+        journal_path = archive_path + ".journal"
+        start_dir, central_dir = 0, b''
+        if os.path.exists(archive_path):
+            with open(archive_path, 'rb') as f:
+                with zipfile.ZipFile(f) as zf:
+                    start_dir = zf.start_dir
+                    if member in zf.NameToInfo:
+                        return False
+                f.seek(start_dir)
+                central_dir = f.read()
+        with open(journal_path, 'wb') as f:
+            f.write(f"{start_dir}\n".encode() + central_dir)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            with zipfile.ZipFile(archive_path, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.write(file_path, member)
+            with open(archive_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        except BaseException:
+            self._recover(archive_path)
+            raise
+        os.remove(journal_path)
+        return True
+
+    def add(self, file_path, content_hash):
+        """파일을 월별 보관 파일로 옮기고 (보관된 항목 경로, 기존 내용과 중복 여부)를 반환합니다.
+
+        같은 내용이 이미 보관되어 있으면 새로 추가하지 않고 기존 항목을 가리킵니다.
+        어느 경우든 출력 폴더의 원본 파일은 지웁니다.
+        """
+        if self.is_member(file_path):
+            return file_path, False
+        file_name = os.path.basename(file_path)
+        with self._lock:
+            stored_path, _ = self._lookup(content_hash)
+            duplicated = stored_path is not None
+            if not duplicated:
+                archive_name = self._archive_name(file_name)
+                member = file_name
+                archive_path = os.path.join(self.archives_dir, archive_name)
+                if not self._append(archive_path, file_path, member):
+                    # 같은 이름의 다른 내용(재다운로드 등)은 해시를 붙여 따로 보관합니다.
+                    member = f"{os.path.splitext(file_name)[0]}.{content_hash[:8]}.fit"
+                    self._append(archive_path, file_path, member)
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO archive_members (content_hash, archive, member, size) VALUES (?, ?, ?, ?)",
+                        (content_hash, archive_name, member, os.path.getsize(file_path))
+                    )
+                stored_path = os.path.join(archive_path, member)
+        os.remove(file_path)
+        # 파일별 저장 방식에서 쓰던 객체가 남아 있으면 보관 파일로 옮겨졌으므로 지웁니다.
+        try:
+            os.remove(self.object_path(content_hash))
+        except OSError:
+            pass
+        return stored_path, duplicated
+
+    def restore(self, content_hash, size, file_path):
+        if not self.verify(content_hash, size):
+            return None
+        with self._lock:
+            return self._lookup(content_hash)[0]
+
+    def _drop_member(self, archive_path, member):
+        """보관 파일에서 항목 하나를 뺀 새 보관 파일을 만든 뒤 원자적으로 교체합니다.
+
+        zip은 항목 삭제를 지원하지 않으므로 나머지 항목을 압축된 그대로 옮겨 씁니다.
+        남은 항목이 없으면 보관 파일을 지웁니다.
+        """
+        tmp_path = archive_path + ".rewrite"
+        try:
+            with zipfile.ZipFile(archive_path) as src:
+                infos = [info for info in src.infolist() if info.filename != member]
+                if len(infos) == len(src.infolist()):
+                    return
+                if infos:
+                    with zipfile.ZipFile(tmp_path, 'w') as dst:
+                        for info in infos:
+                            dst.writestr(info, src.read(info.filename))
+            if not infos:
+                os.remove(archive_path)
+                return
+            with open(tmp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, archive_path)
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise OSError(f"보관 파일에서 항목을 지울 수 없습니다: {archive_path} ({e})")
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def remove(self, content_hash):
+        """손상된 내용의 항목을 보관 파일과 색인에서 지웁니다. 지운 것이 있으면 True."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT archive, member FROM archive_members WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row:
+                self._drop_member(os.path.join(self.archives_dir, row[0]), row[1])
+                with self._conn:
+                    self._conn.execute("DELETE FROM archive_members WHERE content_hash = ?", (content_hash,))
+        # 파일별 저장 방식에서 남은 객체가 있으면 함께 지웁니다.
+        return super().remove(content_hash) or bool(row)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class MemoryFitStore:
+    """전송 중인 FIT 데이터를 메모리에만 두는 저장소 래퍼 (디스크 없이 전송하는 --in-memory 모드)
+
+    hold한 경로는 압축 보관 항목처럼 is_member가 True이고 읽기는 메모리에서 처리하므로,
+    업로드/중복 검사 코드는 파일과 같은 방식으로 사용할 수 있습니다. 그 밖의 경로와
+    저장 동작은 원래 저장소에 그대로 맡깁니다.
+    """
+    def __init__(self, base):
+        self.base = base
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def hold(self, path, data):
+        with self._lock:
+            self._data[path] = data
+
+    def discard(self, path):
+        """업로드가 끝난 데이터를 메모리에서 지우고 그 크기를 반환합니다. 없으면 0."""
+        with self._lock:
+            data = self._data.pop(path, None)
+        return len(data) if data is not None else 0
+
+    def _get(self, path):
+        with self._lock:
+            return self._data.get(path)
+
+    def holds(self, path):
+        """path의 데이터가 메모리에만 있는지 확인합니다."""
+        return self._get(path) is not None
+
+    def is_member(self, path):
+        return self._get(path) is not None or self.base.is_member(path)
+
+    def exists(self, path):
+        return self._get(path) is not None or self.base.exists(path)
+
+    def getsize(self, path):
+        data = self._get(path)
+        return len(data) if data is not None else self.base.getsize(path)
+
+    def open(self, path):
+        data = self._get(path)
+        return io.BytesIO(data) if data is not None else self.base.open(path)
+
+    def read(self, path):
+        data = self._get(path)
+        return data if data is not None else self.base.read(path)
+
+    def hash(self, path):
+        data = self._get(path)
+        return hashlib.sha256(data).hexdigest() if data is not None else self.base.hash(path)
+
+def open_fit_store(root, backend=FIT_STORAGE_FILES):
+    """설정(FIT_STORAGE)에 맞는 FIT 저장소를 만듭니다."""
+    if backend == FIT_STORAGE_ARCHIVE:
+        return ArchiveFitStore(root)
+    if backend != FIT_STORAGE_FILES:
+        print(f"[안내] FIT_STORAGE 값({backend})을 알 수 없어 기본값({FIT_STORAGE_FILES})을 사용합니다.")
+    return FitStore(root)
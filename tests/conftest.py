@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import ratelimit
+from constants import RATE_LIMITS
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """토큰 캐시(~/.coros_garmin_sync)가 실제 홈 폴더에 만들어지지 않게 합니다."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    return home
+
+@pytest.fixture
+def fast_limits(monkeypatch):
+    """프로세스 전역 제한기를 속도 제한 없는 제한기로 바꿉니다. (동시 요청 한도는 그대로)"""
+    limiters = {name: ratelimit.AdaptiveLimiter(name, **dict(RATE_LIMITS[name], rate=1e6, burst=1e6))
+                for name in RATE_LIMITS}
+    monkeypatch.setattr(ratelimit, "_limiters", limiters)
+    return limiters
+
+@pytest.fixture
+def mock_service(fast_limits):
+    """benchmarks/mock_server.py의 모의 COROS/Garmin 서버를 띄우고 (주소, 서버)를 반환합니다."""
+    from mock_server import MockServer, MockDataset
+    server = MockServer(("127.0.0.1", 0), MockDataset(6, payload_kb=2))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", server
+    server.shutdown()
+    server.server_close()
+
+def attach_mock(migrator, url, account="tester"):
+    """마이그레이터의 두 클라이언트를 모의 서버를 쓰는 클라이언트로 바꿉니다."""
+    from client import CorosClient, GarminClient
+    from mock_server import MockGarmin
+    migrator.coros_client = CorosClient(f"{account}@example.com", "pw", base_url=url,
+                                        retry_budget=migrator.retry_budget, metrics=migrator.metrics)
+    migrator.garmin_client = GarminClient(account, "pw", client_factory=MockGarmin.factory(url),
+                                          retry_budget=migrator.retry_budget, metrics=migrator.metrics)
+    return migrator
+
+def run_args(**overrides):
+    """main.py가 만드는 것과 같은 실행 인자"""
+    args = dict(mode='coros2garmin', day=None, month=None, all=True, upload_only=False, download_only=False,
+                file=None, resume=False, storage=None, watch=False, interval=None, batch=None, workers=None,
+                in_memory=False)
+    args.update(overrides)
+    return SimpleNamespace(**args)
@@ -0,0 +1,40 @@
+from calendar import timegm
+
+from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key, fit_activity_key
+
+START = timegm((2024, 1, 1, 6, 0, 0))
+
+def test_activity_keys_use_local_start_and_duration():
+    assert coros_activity_key({"date": "20240101060000", "duration": 1800}) == (START, 1800)
+    assert garmin_activity_key({"startTimeLocal": "2024-01-01 06:00:00", "duration": 1800.7}) == (START, 1800)
+    assert garmin_activity_key({"startTimeInSeconds": START - 9 * 3600, "startTimeOffsetInSeconds": 9 * 3600,
+                                "durationInSeconds": 1800}) == (START, 1800)
+    assert fit_activity_key({"start_time": START - 3600, "utc_offset": 3600, "elapsed": 1800.4}) == (START, 1800)
+
+def test_activity_keys_reject_incomplete_data():
+    assert coros_activity_key({"date": "", "duration": 1800}) is None
+    assert garmin_activity_key({"startTimeLocal": "2024-01-01 06:00:00"}) is None
+    assert fit_activity_key({"start_time": START, "elapsed": 1800}) is None
+    assert fit_activity_key(None) is None
+
+def test_find_within_tolerance_across_buckets():
+    index = ActivityIndex(start_tolerance=60, duration_tolerance=10)
+    index.add(START, 1800, "a")
+    # 버킷 경계를 넘어도 인접 버킷에서 찾습니다.
+    assert index.find(START + 60, 1805)[2] == "a"
+    assert index.find(START - 60, 1791)[2] == "a"
+    assert index.find(START + 61, 1800) is None
+    assert index.find(START, 1810) is None
+
+def test_find_returns_closest_start():
+    index = ActivityIndex(start_tolerance=60, duration_tolerance=10)
+    index.add(START + 50, 1800, "far")
+    index.add(START - 5, 1800, "near")
+    assert index.find(START, 1800)[2] == "near"
+    assert len(index) == 2
+
+def test_build_skips_activities_without_key():
+    acts = [{"date": "20240101060000", "duration": 1800}, {"date": "bad"}]
+    index = ActivityIndex.build(acts, coros_activity_key, start_tolerance=60, duration_tolerance=10)
+    assert len(index) == 1
+    assert index.contains(START + 30, 1795)
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import batch
+from conftest import attach_mock, run_args
+
+def write_accounts(path, accounts):
+    path.write_text(json.dumps(accounts), encoding='utf-8')
+    return str(path)
+
+def account(name, mode=None):
+    entry = {"name": name, "COROS_EMAIL": f"{name}@example.com", "COROS_PASSWORD": "pw",
+             "GARMIN_USERNAME": name, "GARMIN_PASSWORD": "pw"}
+    if mode:
+        entry["mode"] = mode
+    return entry
+
+def test_load_accounts_rejects_duplicate_names(tmp_path):
+    path = write_accounts(tmp_path / "accounts.json", [account("a"), account("a")])
+    with pytest.raises(ValueError):
+        batch.load_accounts(path)
+
+def test_load_accounts_rejects_missing_credentials(tmp_path):
+    entry = account("a")
+    del entry["GARMIN_PASSWORD"]
+    with pytest.raises(ValueError):
+        batch.load_accounts(write_accounts(tmp_path / "accounts.json", [entry]))
+
+def test_two_account_batch_runs_end_to_end(tmp_path, monkeypatch, mock_service):
+    url, server = mock_service
+    original = batch.BatchRunner._create_migrator
+
+    def create_migrator(self, entry, mode):
+        return attach_mock(original(self, entry, mode), url, account=entry['name'])
+
+    monkeypatch.setattr(batch.BatchRunner, "_create_migrator", create_migrator)
+    accounts = batch.load_accounts(write_accounts(
+        tmp_path / "accounts.json", [account("alice"), account("bob", mode="garmin2coros")]))
+    runner = batch.BatchRunner(accounts, "coros2garmin", workers=2)
+    runner.output_root = str(tmp_path / "exports")
+
+    results = runner.run(run_args(mode="coros2garmin", all=True, batch="accounts.json"))
+
+    by_name = {r['account']: r for r in results}
+    assert by_name['alice']['status'] == 'ok', by_name['alice']['error']
+    assert by_name['bob']['status'] == 'ok', by_name['bob']['error']
+    assert by_name['alice']['mode'] == 'coros2garmin' and by_name['bob']['mode'] == 'garmin2coros'
+    assert by_name['alice']['downloaded'] == 6
+    assert by_name['alice']['uploaded'] + by_name['alice']['duplicate'] == 6
+    assert by_name['bob']['uploaded'] + by_name['bob']['duplicate'] == by_name['bob']['listed']
+    # 계정별 원장/파일은 따로 보관되고 결과 보고서가 남습니다.
+    assert (tmp_path / "exports" / "alice" / "sync_ledger.db").exists()
+    assert (tmp_path / "exports" / "bob" / "sync_ledger.db").exists()
+    report = json.loads((tmp_path / "exports" / "batch_report.json").read_text(encoding='utf-8'))
+    assert [r['status'] for r in report['accounts']] == ['ok', 'ok']
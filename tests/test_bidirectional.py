@@ -0,0 +1,76 @@
+import pytest
+
+from bidirectional import BidirectionalSync
+from conftest import attach_mock, run_args
+from constants import LEDGER_STATUS_DUPLICATE
+
+def coros(label_id, start, duration):
+    return {"labelId": label_id, "sportType": 100, "date": start, "duration": duration}
+
+def garmin(activity_id, start, duration):
+    return {"activityId": activity_id, "startTimeLocal": start, "duration": float(duration)}
+
+@pytest.fixture
+def sync(tmp_path):
+    sync = BidirectionalSync(output_dir=str(tmp_path), config={})
+    yield sync
+    sync.close()
+
+def test_join_matches_within_start_and_duration_tolerance(sync):
+    coros_acts = [
+        coros("c1", "20240101060000", 1800),   # 59초 차이 → 같은 활동
+        coros("c2", "20240101120000", 1800),   # 61초 차이 → 다른 활동
+        coros("c3", "20240101180000", 1800),   # 기록 시간 15초 차이 → 다른 활동
+        coros("c4", "20240102060000", 3600),   # Garmin에 없음
+    ]
+    garmin_acts = [
+        garmin(1, "2024-01-01 06:00:59", 1790),
+        garmin(2, "2024-01-01 12:01:01", 1800),
+        garmin(3, "2024-01-01 18:00:00", 1815),
+        garmin(4, "2024-01-01 06:00:10", 1800),  # c1과도 오차범위 안 → 이미 짝이 있는 활동
+    ]
+    missing_on_garmin, missing_on_coros = sync._join(coros_acts, garmin_acts)
+    assert [act["labelId"] for act in missing_on_garmin] == ["c2", "c3", "c4"]
+    assert [act["activityId"] for act in missing_on_coros] == [2, 3]
+    assert sync.paired == 2
+
+    # 짝이 맞은 활동은 양쪽 방향 원장에 중복으로 기록됩니다.
+    assert sync.ledger.get(sync.to_garmin.DIRECTION, "c1")["status"] == LEDGER_STATUS_DUPLICATE
+    assert sync.ledger.get(sync.to_coros.DIRECTION, "4")["status"] == LEDGER_STATUS_DUPLICATE
+    assert sync.ledger.get(sync.to_coros.DIRECTION, "1")["status"] == LEDGER_STATUS_DUPLICATE
+    assert sync.ledger.get(sync.to_garmin.DIRECTION, "c2") is None
+
+def test_bidirectional_run_against_mock_server(sync, mock_service):
+    url, server = mock_service
+    attach_mock(sync.to_garmin, url)
+    sync.to_coros.coros_client = sync.to_garmin.coros_client
+    sync.to_coros.garmin_client = sync.to_garmin.garmin_client
+    sync.run(run_args(mode='bidirectional', month="202401", all=False))
+
+    missing = len(server.dataset.coros) - sync.paired
+    assert sync.paired > 0 and missing > 0
+    assert sync.to_garmin.stats['uploaded'] + sync.to_garmin.stats['duplicate'] == missing
+    assert sync.to_coros.stats['uploaded'] + sync.to_coros.stats['duplicate'] == missing
+    assert not sync.to_garmin.failures and not sync.to_coros.failures
+
+def test_directions_share_one_store_and_ledger(tmp_path, monkeypatch):
+    """두 방향이 원장과 압축 보관 저장소를 하나만 열고, close로 모두 닫아야 합니다."""
+    import sqlite3
+    import store
+    opened = []
+    original = store.ArchiveFitStore.__init__
+
+    def tracking_init(self, root):
+        opened.append(self)
+        original(self, root)
+
+    monkeypatch.setattr(store.ArchiveFitStore, "__init__", tracking_init)
+    sync = BidirectionalSync(output_dir=str(tmp_path), storage="archive", config={})
+    assert len(opened) == 1
+    assert sync.to_coros.store is sync.to_garmin.store is opened[0]
+    assert sync.to_coros.ledger is sync.to_garmin.ledger
+    assert sync.to_coros.garmin_client is sync.to_garmin.garmin_client
+    assert sync.to_coros.output_dir != sync.to_garmin.output_dir
+    sync.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0]._conn.execute("SELECT 1")
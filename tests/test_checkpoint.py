@@ -0,0 +1,61 @@
+import json
+from types import SimpleNamespace
+
+from checkpoint import CheckpointJournal
+from coros_to_garmin import CorosToGarmin
+
+def write_journal(path):
+    journal = CheckpointJournal(str(path))
+    journal.start({"day": None, "month": "202401", "all": False, "download_only": False})
+    acts = [{"labelId": str(i)} for i in range(3)]
+    list(journal.record_listing(iter(acts), lambda act: act["labelId"]))
+    journal.record_download("0", "/out/0.fit")
+    journal.record_download("1", "/out/1.fit")
+    journal.record_upload("0")
+    journal.close()
+    return acts
+
+def test_load_restores_progress_and_ignores_truncated_line(tmp_path):
+    path = tmp_path / ".checkpoint.jsonl"
+    acts = write_journal(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "upload", "id": "1"')  # 기록 도중 끊긴 줄
+    state = CheckpointJournal(str(path)).load()
+    assert state["args"]["month"] == "202401"
+    assert list(state["activities"].values()) == acts
+    assert state["listing_done"]
+    assert state["downloaded"] == {"0": "/out/0.fit", "1": "/out/1.fit"}
+    assert state["uploaded"] == {"0"}
+
+def test_load_without_run_event_or_file(tmp_path):
+    path = tmp_path / ".checkpoint.jsonl"
+    assert CheckpointJournal(str(path)).load() is None
+    path.write_text(json.dumps({"type": "upload", "id": "1"}) + "\n", encoding='utf-8')
+    assert CheckpointJournal(str(path)).load() is None
+
+def test_finish_removes_journal(tmp_path):
+    path = tmp_path / ".checkpoint.jsonl"
+    journal = CheckpointJournal(str(path))
+    journal.start({})
+    journal.finish()
+    assert not path.exists()
+
+def test_resume_skips_uploaded_and_reuses_downloaded_files(tmp_path):
+    migrator = CorosToGarmin(output_dir=str(tmp_path), config={})
+    saved = tmp_path / "1.fit"
+    saved.write_bytes(b"fit")
+    state = {"uploaded": {"0"}, "downloaded": {"1": str(saved), "2": str(tmp_path / "missing.fit")}}
+    items = [({"labelId": str(i)}, None) for i in range(3)]
+    remaining = list(migrator._filter_with_checkpoint(items, state))
+    assert remaining == [({"labelId": "1"}, str(saved)), ({"labelId": "2"}, None)]
+    assert migrator.stats['skipped'] == 1
+    assert migrator.stats['reused'] == 1
+
+def test_load_checkpoint_restores_run_range(tmp_path):
+    migrator = CorosToGarmin(output_dir=str(tmp_path), config={})
+    path = tmp_path / ".checkpoint.jsonl"
+    write_journal(path)
+    args = SimpleNamespace(day="20240105", month=None, all=True, download_only=True, resume=True)
+    state = migrator._load_checkpoint(CheckpointJournal(str(path)), args)
+    assert state["uploaded"] == {"0"}
+    assert (args.day, args.month, args.all, args.download_only) == (None, "202401", False, False)
@@ -0,0 +1,133 @@
+import os
+
+import pytest
+
+from client import CorosClient
+from constants import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+from conftest import attach_mock, run_args
+from coros_to_garmin import CorosToGarmin
+
+def test_session_pool_matches_limiter_concurrency(fast_limits):
+    client = CorosClient("tester@example.com", "pw")
+    expected = fast_limits["coros"].max_concurrency
+    assert client.pool_size == expected
+    for scheme in ("https://", "http://"):
+        assert client.session.get_adapter(scheme + "example.com")._pool_maxsize == expected
+    assert CorosClient("tester@example.com", "pw", pool_size=3).session.get_adapter("https://x")._pool_maxsize == 3
+
+@pytest.mark.parametrize("value, expected", [
+    ("", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)),
+    ("30", (HTTP_CONNECT_TIMEOUT, 30.0)),
+    ("5", (5.0, 5.0)),
+    ("soon", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)),
+])
+def test_http_timeout_from_config(tmp_path, value, expected):
+    migrator = CorosToGarmin(output_dir=str(tmp_path), config={"HTTP_TIMEOUT": value})
+    assert migrator.coros_client.timeout == expected
+
+def test_every_request_reuses_session_with_timeout(mock_service, tmp_path):
+    url, server = mock_service
+    client = CorosClient("tester@example.com", "pw", base_url=url, timeout=(1, 7))
+    timeouts = []
+    request = client.session.request
+
+    def recording_request(method, request_url, **kwargs):
+        timeouts.append(kwargs.get("timeout"))
+        return request(method, request_url, **kwargs)
+
+    client.session.request = recording_request
+    client.login()
+    activity = next(iter(client.iter_activities("20240101", "20241231")))
+    client.download_fit_file(activity["labelId"], activity["sportType"], str(tmp_path / "a.fit"))
+    assert len(timeouts) >= 4
+    assert set(timeouts) == {(1, 7)}
+
+def test_interrupted_stream_leaves_no_partial_file(mock_service, tmp_path):
+    url, server = mock_service
+    client = CorosClient("tester@example.com", "pw", base_url=url)
+    client.login()
+    label_id = server.dataset.coros[0]["labelId"]
+    get = client.session.get
+
+    class Interrupted:
+        def __init__(self, response):
+            self.response = response
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.response.close()
+
+        def raise_for_status(self):
+            self.response.raise_for_status()
+
+        def iter_content(self, chunk_size=1):
+            yield next(self.response.iter_content(chunk_size=256))
+            raise KeyboardInterrupt()
+
+    client.session.get = lambda *args, **kwargs: Interrupted(get(*args, **kwargs))
+    dest = tmp_path / "out" / "a.fit"
+    with pytest.raises(KeyboardInterrupt):
+        client.download_fit_file(label_id, 100, str(dest))
+    assert os.listdir(dest.parent) == []
+
+def test_run_removes_partial_files_left_by_killed_run(mock_service, tmp_path):
+    url, server = mock_service
+    migrator = attach_mock(CorosToGarmin(output_dir=str(tmp_path), config={}), url)
+    # 강제 종료로 지우지 못한 임시 파일만 정리하고, 사용자가 둔 파일은 건드리지 않습니다.
+    output_dir = migrator.output_dir
+    stale = os.path.join(output_dir, ".20240101_500000000.fit.x1y2z3.part")
+    kept = os.path.join(output_dir, "notes.part")
+    for path in (stale, kept):
+        with open(path, 'wb') as f:
+            f.write(b"partial")
+    migrator.run(run_args(month="202401", all=False, download_only=True))
+    assert not os.path.exists(stale) and os.path.exists(kept)
+    assert migrator.stats['downloaded'] == len(server.dataset.coros)
+    assert not [name for name in os.listdir(output_dir) if name.endswith('.part') and name != "notes.part"]
+
+def paged_client(pages, with_total=True, delay=0.0):
+    """pages[i]를 i+1번째 페이지로 돌려주는 클라이언트. 뒤 페이지일수록 먼저 응답합니다."""
+    import time
+    client = CorosClient("tester@example.com", "pw")
+    client.token = "token"
+    requested = []
+
+    def query_page(start_day, end_day, size, page_number):
+        requested.append(page_number)
+        time.sleep(delay * (len(pages) - page_number))
+        data = {"dataList": pages[page_number - 1] if page_number <= len(pages) else []}
+        if with_total:
+            data["totalPage"] = len(pages)
+        return data
+
+    client._query_page = query_page
+    return client, requested
+
+def test_parallel_pages_are_yielded_in_page_order():
+    pages = [[{"labelId": f"{page}-{i}"} for i in range(3)] for page in range(1, 6)]
+    client, requested = paged_client(pages, delay=0.02)
+    activities = list(client.iter_activities("20240101", "20240131", size=3, max_workers=4))
+    assert [act["labelId"] for act in activities] == [act["labelId"] for page in pages for act in page]
+    assert sorted(requested) == [1, 2, 3, 4, 5]
+
+def test_empty_first_page_stops_listing():
+    client, requested = paged_client([[], [{"labelId": "late"}]])
+    assert list(client.iter_activities("20240101", "20240131")) == []
+    assert requested == [1]
+
+def test_pages_without_total_are_read_until_empty():
+    pages = [[{"labelId": "a"}, {"labelId": "b"}], [{"labelId": "c"}]]
+    client, requested = paged_client(pages, with_total=False)
+    assert [act["labelId"] for act in client.iter_activities("20240101", "20240131", size=2)] == ["a", "b", "c"]
+    assert requested == [1, 2, 3]
+
+def test_mock_server_pages_keep_dataset_order(mock_service):
+    url, server = mock_service
+    server.page_size = 1
+    server.latency = 0.01
+    client = CorosClient("tester@example.com", "pw", base_url=url)
+    client.login()
+    activities = client.get_activities("20240101", "20241231")
+    assert [act["labelId"] for act in activities] == [act["labelId"] for act in server.dataset.coros]
@@ -0,0 +1,120 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+from fit import (FitError, NoFitFileError, check_fit_integrity, fit_crc, validate_fit_data, unpack_fit_payload,
+                 parse_fit_metadata, read_fit_metadata, read_fit_metadata_bytes, FIT_EPOCH_OFFSET)
+from mock_server import make_fit_payload
+
+START = 1704067200  # 2024-01-01 00:00:00 UTC
+
+@pytest.fixture
+def fit_bytes():
+    return make_fit_payload(START, 3600, 9 * 3600, 1)
+
+def with_crc(body):
+    return body + struct.pack('<H', fit_crc(body))
+
+def test_crc_matches_reference_vector():
+    # CRC-16/ARC 표준 검사값 (FIT 규격과 같은 다항식 0xA001, 초기값 0)
+    assert fit_crc(b"123456789") == 0xBB3D
+    assert fit_crc(b"") == 0
+
+def test_valid_file_passes(fit_bytes):
+    check_fit_integrity(fit_bytes)
+    assert validate_fit_data(fit_bytes) is None
+
+def test_bad_header_signature_is_rejected(fit_bytes):
+    broken = fit_bytes[:8] + b'.TIF' + fit_bytes[12:]
+    with pytest.raises(FitError):
+        check_fit_integrity(broken)
+
+def test_header_crc_mismatch_is_rejected(fit_bytes):
+    header = bytearray(fit_bytes[:14])
+    struct.pack_into('<H', header, 12, fit_crc(bytes(header[:12])) ^ 0xFFFF)
+    body = bytes(header) + fit_bytes[14:-2]
+    with pytest.raises(FitError, match="헤더 CRC"):
+        check_fit_integrity(with_crc(body))
+
+def test_zero_header_crc_means_not_computed(fit_bytes):
+    assert struct.unpack_from('<H', fit_bytes, 12)[0] == 0
+    check_fit_integrity(fit_bytes)
+
+def test_truncated_data_is_rejected(fit_bytes):
+    assert "잘린" in validate_fit_data(fit_bytes[:len(fit_bytes) // 2])
+    # 데이터는 다 있지만 끝의 CRC 2바이트가 없는 경우
+    assert "CRC" in validate_fit_data(fit_bytes[:-2])
+
+def test_file_crc_mismatch_is_rejected(fit_bytes):
+    corrupted = bytearray(fit_bytes)
+    corrupted[40] ^= 0x01
+    with pytest.raises(FitError, match="CRC"):
+        check_fit_integrity(bytes(corrupted))
+
+def test_chained_files_are_checked_one_by_one(fit_bytes):
+    check_fit_integrity(fit_bytes + fit_bytes)
+    second = bytearray(fit_bytes)
+    second[-1] ^= 0xFF
+    with pytest.raises(FitError):
+        check_fit_integrity(fit_bytes + bytes(second))
+
+def zip_of(**members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def test_unpack_returns_plain_fit_as_is(fit_bytes):
+    assert unpack_fit_payload(fit_bytes) == fit_bytes
+
+def test_unpack_single_fit_zip(fit_bytes):
+    assert unpack_fit_payload(zip_of(**{"123_ACTIVITY.fit": fit_bytes})) == fit_bytes
+
+def test_unpack_multi_fit_zip_picks_activity_file(fit_bytes):
+    # 활동 파일보다 큰 다른 종류(예: 2 = settings)의 FIT 파일이 함께 들어 있어도 활동 파일을 고릅니다.
+    settings = make_fit_payload(START, 3600, 9 * 3600, 4, file_type=2)
+    payload = zip_of(**{"123_SETTINGS.fit": settings, "123_ACTIVITY.fit": fit_bytes})
+    assert unpack_fit_payload(payload) == fit_bytes
+    # 종류를 가릴 수 없으면 가장 큰 파일을 사용하고, 파일을 이어 붙이지 않습니다.
+    larger = make_fit_payload(START, 3600, 9 * 3600, 4)
+    assert unpack_fit_payload(zip_of(**{"a.fit": fit_bytes, "b.fit": larger})) == larger
+
+def test_unpack_zip_without_fit_is_permanent_error():
+    with pytest.raises(NoFitFileError, match="123.gpx"):
+        unpack_fit_payload(zip_of(**{"123.gpx": b"<gpx/>"}))
+
+def test_unpack_corrupt_fit_in_zip_is_not_permanent(fit_bytes):
+    with pytest.raises(FitError) as info:
+        unpack_fit_payload(zip_of(**{"123_ACTIVITY.fit": fit_bytes[:40]}))
+    assert not isinstance(info.value, NoFitFileError)
+
+def test_metadata_from_session_file_id_and_activity(fit_bytes):
+    meta = parse_fit_metadata(fit_bytes)
+    assert meta['start_time'] == START
+    assert meta['elapsed'] == 3600
+    assert meta['utc_offset'] == 9 * 3600
+    assert meta['sport'] == 1
+    assert meta['serial_number'] == 1
+
+def test_metadata_reads_files_and_big_endian_definitions(tmp_path, fit_bytes):
+    path = tmp_path / "a.fit"
+    path.write_bytes(fit_bytes)
+    assert read_fit_metadata(str(path)) == parse_fit_metadata(fit_bytes)
+    # file_id 메시지 하나만 빅 엔디언으로 정의한 파일
+    definition = struct.pack('>BBBHB', 0x40, 0, 1, 0, 1) + struct.pack('>BBB', 4, 4, 0x86)
+    data = definition + struct.pack('>BI', 0, START - FIT_EPOCH_OFFSET)
+    body = struct.pack('<BBHI4s', 12, 0x20, 2132, len(data), b'.FIT') + data
+    meta = read_fit_metadata_bytes(with_crc(body))
+    assert meta['start_time'] == START
+    assert meta['elapsed'] is None
+
+def test_metadata_of_broken_data_is_none(tmp_path, fit_bytes):
+    assert read_fit_metadata_bytes(fit_bytes[:40]) is None
+    assert read_fit_metadata_bytes(b"not a fit file at all") is None
+    short = tmp_path / "short.fit"
+    short.write_bytes(b"abc")
+    assert read_fit_metadata(str(short)) is None
+    assert read_fit_metadata(str(tmp_path / "missing.fit")) is None
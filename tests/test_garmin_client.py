@@ -0,0 +1,164 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import client as client_module
+from client import GarminClient
+
+class LegacyGarmin:
+    """업로드 내부 속성(인증 객체의 post, garmin_connect_upload)이 없는 garminconnect 흉내"""
+    def __init__(self, username, password):
+        self.uploads = []
+
+    def login(self, tokenstore=None):
+        return True
+
+    def upload_activity(self, activity_path):
+        with open(activity_path, 'rb') as f:
+            self.uploads.append((activity_path, f.read()))
+        return {"detailedImportResult": {"successes": [{}]}}
+
+class AuthStore:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, domain, url, files=None, api=False):
+        name, buffer = files["file"]
+        self.posts.append((domain, url, name, buffer.read()))
+        return {"detailedImportResult": {"successes": [{}]}}
+
+class CurrentGarmin(LegacyGarmin):
+    """garminconnect 0.3처럼 client.client.post로 업로드 요청을 보내는 흉내"""
+    garmin_connect_upload = "/upload-service/upload"
+
+    def __init__(self, username, password):
+        super().__init__(username, password)
+        self.client = AuthStore()
+
+def logged_in(factory, fast_limits):
+    client = GarminClient("tester", "pw", client_factory=factory, limiter=fast_limits["garmin"])
+    client.login()
+    return client
+
+def test_upload_activity_data_posts_buffer(fast_limits):
+    client = logged_in(CurrentGarmin, fast_limits)
+    client.upload_activity_data("1_ACTIVITY.fit", b"fit-bytes")
+    assert client.client.client.posts == [("connectapi", "/upload-service/upload", "1_ACTIVITY.fit", b"fit-bytes")]
+    assert client.client.uploads == []
+
+def test_upload_activity_data_falls_back_to_temp_file(fast_limits):
+    client = logged_in(LegacyGarmin, fast_limits)
+    client.upload_activity_data("1_ACTIVITY.fit", b"fit-bytes")
+    [(path, data)] = client.client.uploads
+    assert data == b"fit-bytes"
+    assert path.endswith("1_ACTIVITY.fit")
+    # 업로드가 끝나면 임시 파일은 지워집니다.
+    assert not os.path.exists(path)
+
+def no_garminconnect():
+    raise ImportError("No module named 'garminconnect'")
+
+def test_custom_factory_does_not_need_garminconnect(monkeypatch, fast_limits):
+    monkeypatch.setattr(client_module, "_garminconnect", no_garminconnect)
+    calls = []
+
+    class StubGarmin(LegacyGarmin):
+        def download_activity(self, activity_id, dl_fmt=None):
+            calls.append((activity_id, dl_fmt))
+            raise ValueError("not found")
+
+    client = logged_in(StubGarmin, fast_limits)
+    # garminconnect 예외를 찾으려다 ImportError가 나지 않고 원래 예외가 그대로 전달되어야 합니다.
+    with pytest.raises(ValueError):
+        client.download_activity(1)
+    assert calls == [(1, None)]
+
+def test_default_factory_reports_missing_garminconnect_at_login(monkeypatch, fast_limits):
+    monkeypatch.setattr(client_module, "_garminconnect", no_garminconnect)
+    client = GarminClient("tester", "pw", limiter=fast_limits["garmin"])
+    with pytest.raises(Exception, match="garminconnect"):
+        client.login()
+
+def test_default_factory_resolves_garminconnect_symbols(fast_limits):
+    garminconnect = pytest.importorskip("garminconnect")
+    client = GarminClient("tester", "pw", limiter=fast_limits["garmin"])
+    assert client._auth_errors is garminconnect.GarminConnectAuthenticationError
+    assert client._original_format is garminconnect.Garmin.ActivityDownloadFormat.ORIGINAL
+
+def test_original_without_fit_is_recorded_as_permanent_failure(tmp_path, mock_service):
+    """GPX/TCX 원본처럼 FIT 파일이 없는 활동은 한 번 실패로 기록한 뒤 다음 실행에서 다시 받지 않습니다."""
+    import io
+    import zipfile
+    from conftest import attach_mock, run_args
+    from garmin_to_coros import GarminToCoros
+    url, server = mock_service
+    from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key
+    coros_index = ActivityIndex.build(server.dataset.coros, coros_activity_key)
+    # COROS에 없는 활동이어야 다운로드 전 중복 검사에서 걸러지지 않습니다.
+    gpx_id = next(act["activityId"] for act in server.dataset.garmin
+                  if not coros_index.contains(*garmin_activity_key(act)))
+    migrator = attach_mock(GarminToCoros(output_dir=str(tmp_path), config={}), url)
+    downloads = []
+    original = migrator.garmin_client.client_factory
+
+    class GpxGarmin:
+        def __init__(self, username, password):
+            self.inner = original(username, password)
+
+        def __getattr__(self, name):
+            return getattr(self.inner, name)
+
+        def download_activity(self, activity_id, dl_fmt=None):
+            downloads.append(activity_id)
+            if activity_id == gpx_id:
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, 'w') as archive:
+                    archive.writestr(f"{activity_id}.gpx", b"<gpx/>")
+                return buffer.getvalue()
+            return self.inner.download_activity(activity_id, dl_fmt)
+
+    migrator.garmin_client.client_factory = GpxGarmin
+    migrator.run(run_args(mode='garmin2coros', month="202401", all=False))
+    entry = migrator.ledger.get(migrator.DIRECTION, gpx_id)
+    assert entry['status'] == "failed" and entry['permanent']
+    assert migrator.stats['download_failed'] == 1
+
+    downloads.clear()
+    migrator.run(run_args(mode='garmin2coros', month="202401", all=False))
+    assert gpx_id not in downloads
+    assert migrator.stats['unsupported'] == 1
+    assert migrator.stats['download_failed'] == 0
+
+class ShardedGarmin(LegacyGarmin):
+    """구간 경계의 활동을 양쪽 구간에 모두 돌려주는 흉내 (Garmin은 UTC 기준으로 날짜를 자릅니다.)"""
+    activities = [
+        {"activityId": 1, "startTimeLocal": "2024-01-10 07:00:00"},
+        {"activityId": 2, "startTimeLocal": "2024-01-31 23:30:00"},
+        {"activityId": 3, "startTimeLocal": "2024-02-01 00:30:00"},
+        {"activityId": 4, "startTimeLocal": "2024-03-31 23:59:00"},
+    ]
+    ranges = []
+
+    def get_activities_by_date(self, startdate, enddate=None, activitytype=None):
+        self.ranges.append((startdate, enddate))
+        end = (datetime.strptime(enddate, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        return [act for act in self.activities if startdate <= act["startTimeLocal"][:10] <= end]
+
+def test_sharded_listing_returns_each_activity_once(monkeypatch, fast_limits):
+    monkeypatch.setattr(ShardedGarmin, "ranges", [])
+    client = logged_in(ShardedGarmin, fast_limits)
+    activities = list(client.iter_activities_by_date("2024-01-01", "2024-03-31"))
+    assert sorted(act["activityId"] for act in activities) == [1, 2, 3, 4]
+    assert sorted(ShardedGarmin.ranges) == [
+        ("2024-01-01", "2024-01-31"), ("2024-02-01", "2024-02-29"), ("2024-03-01", "2024-03-31")]
+
+def test_listing_shard_size_depends_on_range(monkeypatch, fast_limits):
+    monkeypatch.setattr(ShardedGarmin, "ranges", [])
+    client = logged_in(ShardedGarmin, fast_limits)
+    list(client.iter_activities_by_date("2024-01-05", "2024-01-20"))
+    assert ShardedGarmin.ranges == [("2024-01-05", "2024-01-20")]
+    ShardedGarmin.ranges.clear()
+    list(client.iter_activities_by_date("2023-01-01", "2024-06-30"))
+    # 1년보다 긴 기간은 분기 단위로 나눕니다.
+    assert len(ShardedGarmin.ranges) == 6
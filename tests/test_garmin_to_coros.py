@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from activity_index import ActivityIndex, coros_activity_key, garmin_activity_key
+from conftest import attach_mock, run_args
+from constants import LEDGER_STATUS_DUPLICATE
+from garmin_to_coros import GarminToCoros
+
+@pytest.fixture
+def migrator(tmp_path, mock_service):
+    url, server = mock_service
+    migrator = attach_mock(GarminToCoros(output_dir=str(tmp_path), config={}), url)
+    migrator.downloads = []
+    download = migrator.garmin_client.download_fit_file
+
+    def recording_download(activity_id, dest_path):
+        migrator.downloads.append(activity_id)
+        return download(activity_id, dest_path)
+
+    migrator.garmin_client.download_fit_file = recording_download
+    yield migrator
+    migrator.ledger.close()
+
+def on_coros(server):
+    index = ActivityIndex.build(server.dataset.coros, coros_activity_key)
+    return {act["activityId"] for act in server.dataset.garmin if index.contains(*garmin_activity_key(act))}
+
+def test_activities_already_on_coros_are_not_downloaded(migrator, mock_service):
+    url, server = mock_service
+    duplicates = on_coros(server)
+    assert 0 < len(duplicates) < len(server.dataset.garmin)
+    migrator.run(run_args(mode='garmin2coros', month="202401", all=False))
+
+    assert migrator.stats['download_skipped'] == len(duplicates)
+    assert migrator.stats['duplicate'] == len(duplicates)
+    assert not duplicates & set(migrator.downloads)
+    assert migrator.stats['downloaded'] == len(server.dataset.garmin) - len(duplicates)
+    assert server.counts.get("coros_upload") == migrator.stats['uploaded'] == migrator.stats['downloaded']
+    for activity_id in duplicates:
+        assert migrator.ledger.get(migrator.DIRECTION, activity_id)['status'] == LEDGER_STATUS_DUPLICATE
+        assert not [name for name in os.listdir(migrator.output_dir) if name.endswith(f"_{activity_id}.fit")]
+
+    # 다음 실행에서는 원장으로 걸러지므로 다시 확인하거나 받지 않습니다.
+    migrator.downloads.clear()
+    migrator.run(run_args(mode='garmin2coros', month="202401", all=False))
+    assert migrator.downloads == []
+    assert migrator.stats['download_skipped'] == 0
+    assert migrator.stats['skipped'] == len(server.dataset.garmin)
+
+def test_failed_duplicate_check_downloads_everything(migrator, mock_service):
+    url, server = mock_service
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("COROS down")
+
+    migrator.coros_client.iter_activities = unavailable
+    migrator.run(run_args(mode='garmin2coros', month="202401", all=False))
+    assert migrator.stats['download_skipped'] == 0
+    assert sorted(migrator.downloads) == sorted(act["activityId"] for act in server.dataset.garmin)
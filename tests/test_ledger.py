@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+from constants import LEDGER_STATUS_DOWNLOADED, LEDGER_STATUS_DUPLICATE, LEDGER_STATUS_FAILED, LEDGER_STATUS_UPLOADED
+from coros_to_garmin import CorosToGarmin
+from ledger import SyncLedger
+
+DIRECTION = "coros2garmin"
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = SyncLedger(str(tmp_path / "sync_ledger.db"))
+    yield ledger
+    ledger.close()
+
+def test_done_statuses(ledger):
+    ledger.record_download(DIRECTION, 1, "h1", "/a.fit", 10)
+    ledger.mark(DIRECTION, 2, LEDGER_STATUS_UPLOADED, content_hash="h2")
+    ledger.mark(DIRECTION, 3, LEDGER_STATUS_DUPLICATE)
+    ledger.mark(DIRECTION, 4, LEDGER_STATUS_FAILED)
+    assert [ledger.is_done(DIRECTION, i) for i in (1, 2, 3, 4, 5)] == [False, True, True, False, False]
+    assert ledger.has_done_hash(DIRECTION, "h2")
+    assert not ledger.has_done_hash(DIRECTION, "h1")
+    assert not ledger.has_done_hash("garmin2coros", "h2")
+
+def test_record_download_keeps_done_status(ledger):
+    ledger.mark(DIRECTION, 1, LEDGER_STATUS_UPLOADED)
+    ledger.record_download(DIRECTION, 1, "h1", "/a.fit", 10)
+    entry = ledger.get(DIRECTION, "1")
+    assert entry['status'] == LEDGER_STATUS_UPLOADED
+    assert (entry['content_hash'], entry['file_path'], entry['file_size']) == ("h1", "/a.fit", 10)
+
+def test_mark_keeps_known_hash_and_path(ledger):
+    ledger.record_download(DIRECTION, 1, "h1", "/a.fit", 10)
+    ledger.mark(DIRECTION, 1, LEDGER_STATUS_UPLOADED)
+    entry = ledger.get(DIRECTION, 1)
+    assert (entry['status'], entry['content_hash'], entry['file_path']) == (LEDGER_STATUS_UPLOADED, "h1", "/a.fit")
+
+def test_failures_are_counted_and_done_entries_untouched(ledger):
+    ledger.record_download(DIRECTION, 1, "h1", "/a.fit", 10)
+    ledger.record_failure(DIRECTION, 1)
+    ledger.mark(DIRECTION, 1, LEDGER_STATUS_FAILED)
+    ledger.record_failure(DIRECTION, 1, clear_file=True)
+    entry = ledger.get(DIRECTION, 1)
+    assert (entry['status'], entry['attempts']) == (LEDGER_STATUS_FAILED, 3)
+    assert (entry['content_hash'], entry['file_path'], entry['file_size']) == (None, None, None)
+
+    ledger.mark(DIRECTION, 2, LEDGER_STATUS_DUPLICATE)
+    ledger.record_failure(DIRECTION, 2, clear_file=True)
+    assert ledger.get(DIRECTION, 2)['status'] == LEDGER_STATUS_DUPLICATE
+
+def test_cursor_round_trip_only_moves_forward(tmp_path):
+    path = str(tmp_path / "sync_ledger.db")
+    ledger = SyncLedger(path)
+    assert ledger.get_cursor(DIRECTION) is None
+    ledger.set_cursor(DIRECTION, 200, "b")
+    ledger.set_cursor(DIRECTION, 100, "z")
+    ledger.set_cursor(DIRECTION, 200, "a")
+    assert ledger.get_cursor(DIRECTION) == (200, "b")
+    ledger.set_cursor(DIRECTION, 200, "c")
+    ledger.close()
+
+    reopened = SyncLedger(path)
+    assert reopened.get_cursor(DIRECTION) == (200, "c")
+    assert reopened.get_cursor("garmin2coros") is None
+    reopened.close()
+
+def test_old_ledger_gets_attempts_column(tmp_path):
+    path = str(tmp_path / "sync_ledger.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE sync_ledger (direction TEXT NOT NULL, source_id TEXT NOT NULL, content_hash TEXT,
+                    file_path TEXT, file_size INTEGER, status TEXT NOT NULL, updated_at TEXT NOT NULL,
+                    PRIMARY KEY (direction, source_id))""")
+    conn.execute("INSERT INTO sync_ledger VALUES (?, '1', NULL, NULL, NULL, ?, '')", (DIRECTION, LEDGER_STATUS_FAILED))
+    conn.commit()
+    conn.close()
+    ledger = SyncLedger(path)
+    ledger.record_failure(DIRECTION, 1)
+    assert ledger.get(DIRECTION, 1)['attempts'] == 1
+    ledger.close()
+
+def test_migrator_filters_done_activities(tmp_path):
+    migrator = CorosToGarmin(output_dir=str(tmp_path), config={})
+    acts = [{"labelId": str(i), "sportType": 100, "date": "20240101060000"} for i in range(4)]
+    migrator.ledger.mark(migrator.DIRECTION, "0", LEDGER_STATUS_UPLOADED)
+    migrator.ledger.mark(migrator.DIRECTION, "1", LEDGER_STATUS_DUPLICATE)
+    migrator.ledger.record_download(migrator.DIRECTION, "2", None, None, None)
+    remaining = list(migrator._filter_with_ledger(acts))
+    assert [act['labelId'] for act, _ in remaining] == ["2", "3"]
+    assert migrator.stats['listed'] == 4
+    assert migrator.stats['skipped'] == 2
+    assert migrator.ledger.get(migrator.DIRECTION, "2")['status'] == LEDGER_STATUS_DOWNLOADED
@@ -0,0 +1,58 @@
+import sys
+
+import pytest
+
+import main
+
+class RecordingMigrator:
+    def __init__(self):
+        self.args = None
+
+    def run(self, args):
+        self.args = args
+
+@pytest.fixture
+def recorded(monkeypatch):
+    migrator = RecordingMigrator()
+    monkeypatch.setattr(main, "create_migrator", lambda args: migrator)
+    return migrator
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    main.main()
+
+def test_download_and_upload_run_has_download_only_flag(monkeypatch, recorded):
+    run_main(monkeypatch, "--mode", "coros2garmin", "-m", "202401")
+    assert recorded.args.download_only is False
+    assert recorded.args.month == "202401"
+
+def test_download_only_flag_is_passed_to_migrator(monkeypatch, recorded):
+    run_main(monkeypatch, "--mode", "garmin2coros", "-d", "20240101", "--download-only", "--in-memory")
+    assert recorded.args.download_only is True
+    # 다운로드만 모드는 파일을 남겨야 하므로 메모리 전송을 끕니다.
+    assert recorded.args.in_memory is False
+
+def test_download_only_conflicts_with_upload_only(monkeypatch, recorded, capsys):
+    run_main(monkeypatch, "--mode", "coros2garmin", "-u", "-f", "a.fit", "--download-only")
+    assert recorded.args is None
+    assert "[오류]" in capsys.readouterr().out
+
+def test_cli_download_run_completes_against_mock_server(monkeypatch, tmp_path, mock_service):
+    """실제 CLI 경로(main → 마이그레이터 run)가 인자 누락 없이 끝까지 실행되는지 확인합니다."""
+    from conftest import attach_mock
+    from coros_to_garmin import CorosToGarmin
+    url, server = mock_service
+    created = []
+
+    def create_migrator(args):
+        migrator = attach_mock(CorosToGarmin(output_dir=str(tmp_path), config={}), url)
+        created.append(migrator)
+        return migrator
+
+    monkeypatch.setattr(main, "create_migrator", create_migrator)
+    run_main(monkeypatch, "--mode", "coros2garmin", "-m", "202401")
+    migrator = created[0]
+    assert migrator.stats['downloaded'] == 6
+    assert not migrator.failures
+    # 정상 종료했으므로 --resume용 체크포인트가 남지 않아야 합니다.
+    assert not (tmp_path / "coros" / ".checkpoint.jsonl").exists()
@@ -0,0 +1,81 @@
+import json
+import os
+
+from metrics import Metrics
+
+def sample_metrics():
+    metrics = Metrics()
+    metrics.started = 1717171717.9
+    metrics.observe_request("coros", "/activity/query", "ok", 0.2, sent=10, received=500)
+    metrics.observe_request("coros", "/activity/query", "503", 3.0, sent=10)
+    metrics.add_phase_time("listing", 1.25)
+    metrics.add_phase_time("download", 0.5)
+    metrics.observe_queue("upload", 2)
+    metrics.observe_queue("upload", 4)
+    metrics.add_worker_time("download", 3.0)
+    metrics.set_workers("download", 2, 2.0)
+    metrics.set_workers("upload", 1, 2.0)
+    metrics.elapsed = 4.1234567
+    return metrics
+
+EXPECTED = '''\
+# HELP coros_garmin_sync_requests_total API requests by endpoint and result
+# TYPE coros_garmin_sync_requests_total counter
+coros_garmin_sync_requests_total{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",status="503"} 1
+coros_garmin_sync_requests_total{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",status="ok"} 1
+# HELP coros_garmin_sync_request_bytes_total Bytes transferred by endpoint
+# TYPE coros_garmin_sync_request_bytes_total counter
+coros_garmin_sync_request_bytes_total{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",flow="sent"} 20
+coros_garmin_sync_request_bytes_total{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",flow="received"} 500
+# HELP coros_garmin_sync_request_duration_seconds API request latency
+# TYPE coros_garmin_sync_request_duration_seconds histogram
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="0.05"} 0
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="0.1"} 0
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="0.25"} 1
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="0.5"} 1
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="1"} 1
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="2.5"} 1
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="5"} 2
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="10"} 2
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="30"} 2
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="60"} 2
+coros_garmin_sync_request_duration_seconds_bucket{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query",le="+Inf"} 2
+coros_garmin_sync_request_duration_seconds_sum{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query"} 3.2
+coros_garmin_sync_request_duration_seconds_count{direction="coros2garmin",account="a\\"b",platform="coros",endpoint="/activity/query"} 2
+# HELP coros_garmin_sync_phase_seconds Time spent in each phase (summed over threads)
+# TYPE coros_garmin_sync_phase_seconds gauge
+coros_garmin_sync_phase_seconds{direction="coros2garmin",account="a\\"b",phase="download"} 0.5
+coros_garmin_sync_phase_seconds{direction="coros2garmin",account="a\\"b",phase="listing"} 1.25
+# HELP coros_garmin_sync_queue_depth_max Maximum pipeline queue depth
+# TYPE coros_garmin_sync_queue_depth_max gauge
+coros_garmin_sync_queue_depth_max{direction="coros2garmin",account="a\\"b",queue="upload"} 4
+# HELP coros_garmin_sync_worker_utilization_ratio Busy time divided by workers x wall time
+# TYPE coros_garmin_sync_worker_utilization_ratio gauge
+coros_garmin_sync_worker_utilization_ratio{direction="coros2garmin",account="a\\"b",stage="download"} 0.75
+coros_garmin_sync_worker_utilization_ratio{direction="coros2garmin",account="a\\"b",stage="upload"} 0.0
+# HELP coros_garmin_sync_activities_total Activities by result in the last run
+# TYPE coros_garmin_sync_activities_total gauge
+coros_garmin_sync_activities_total{direction="coros2garmin",account="a\\"b",result="downloaded"} 3
+coros_garmin_sync_activities_total{direction="coros2garmin",account="a\\"b",result="uploaded"} 2
+# HELP coros_garmin_sync_run_duration_seconds Wall-clock duration of the last run
+# TYPE coros_garmin_sync_run_duration_seconds gauge
+coros_garmin_sync_run_duration_seconds{direction="coros2garmin",account="a\\"b"} 4.123457
+# HELP coros_garmin_sync_last_run_timestamp_seconds Unix time when the last run started
+# TYPE coros_garmin_sync_last_run_timestamp_seconds gauge
+coros_garmin_sync_last_run_timestamp_seconds{direction="coros2garmin",account="a\\"b"} 1717171717
+'''
+
+LABELS = {'direction': 'coros2garmin', 'account': 'a"b'}
+COUNTERS = {'uploaded': 2, 'downloaded': 3}
+
+def test_prometheus_text_format():
+    assert sample_metrics().to_prometheus(LABELS, COUNTERS) == EXPECTED
+
+def test_export_writes_json_and_textfile_atomically(tmp_path):
+    metrics_dir = tmp_path / "metrics"
+    sample_metrics().export(str(metrics_dir / "run.json"), str(metrics_dir / "run.prom"), LABELS, COUNTERS)
+    assert sorted(os.listdir(metrics_dir)) == ["run.json", "run.prom"]
+    assert (metrics_dir / "run.prom").read_text(encoding='utf-8') == EXPECTED
+    summary = json.loads((metrics_dir / "run.json").read_text(encoding='utf-8'))
+    assert summary['labels'] == LABELS and summary['counters'] == COUNTERS
+    assert summary['queues'] == {'upload': {'max': 4, 'mean': 3.0}}
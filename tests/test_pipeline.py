@@ -0,0 +1,219 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import FairPool, MemoryBudget, run_pipeline
+
+def test_results_flow_to_consumer_and_none_is_dropped():
+    consumed = []
+    lock = threading.Lock()
+
+    def consume(result):
+        with lock:
+            consumed.append(result)
+
+    run_pipeline(range(10), lambda n: None if n % 3 == 0 else n * 10, consume,
+                 producer_workers=3, consumer_workers=2, queue_size=2)
+    assert sorted(consumed) == [10, 20, 40, 50, 70, 80]
+
+def test_errors_do_not_stop_the_pipeline(capsys):
+    consumed = []
+
+    def produce(n):
+        if n == 1:
+            raise ValueError("produce failed")
+        return n
+
+    def consume(n):
+        if n == 2:
+            raise ValueError("consume failed")
+        consumed.append(n)
+
+    run_pipeline(range(4), produce, consume)
+    assert consumed == [0, 3]
+    out = capsys.readouterr().out
+    assert "produce failed" in out and "consume failed" in out
+
+def test_errors_are_reported_to_on_error_with_stage_and_item():
+    errors = []
+
+    def produce(n):
+        if n == 1:
+            raise ValueError("produce failed")
+        return n * 10
+
+    def consume(n):
+        if n == 20:
+            raise ValueError("consume failed")
+
+    run_pipeline(range(3), produce, consume, stages=('download', 'upload'),
+                 on_error=lambda stage, item, e: errors.append((stage, item, str(e))))
+    assert sorted(errors) == [('download', 1, "produce failed"), ('upload', 20, "consume failed")]
+
+def test_unexpected_upload_error_is_counted_as_failure(tmp_path, mock_service):
+    """업로드 전 검사 단계의 예기치 않은 오류도 실패 요약과 원장에 남아야 합니다."""
+    from conftest import attach_mock, run_args
+    from constants import LEDGER_STATUS_FAILED
+    from coros_to_garmin import CorosToGarmin
+    url, server = mock_service
+    migrator = attach_mock(CorosToGarmin(output_dir=str(tmp_path), config={}), url)
+
+    def broken_check(fit_file, store):
+        raise RuntimeError("검사 프로세스를 시작할 수 없습니다")
+
+    migrator.validator.check = broken_check
+    migrator.run(run_args(month="202401", all=False))
+    count = len(server.dataset.coros)
+    assert migrator.stats['downloaded'] == count
+    assert migrator.stats['upload_failed'] == count
+    assert [stage for stage, _, _ in migrator.failures] == ['upload'] * count
+    first = server.dataset.coros[0]['labelId']
+    assert migrator.ledger.get(migrator.DIRECTION, first)['status'] == LEDGER_STATUS_FAILED
+
+def test_bounded_queue_applies_backpressure():
+    """소비자가 느리면 처리 대기 중인 결과가 queue_size + 소비자 수를 넘지 않아야 합니다."""
+    produced, consumed, peak = [0], [0], [0]
+    lock = threading.Lock()
+
+    def produce(n):
+        with lock:
+            produced[0] += 1
+            peak[0] = max(peak[0], produced[0] - consumed[0])
+        return n
+
+    def consume(n):
+        time.sleep(0.005)
+        with lock:
+            consumed[0] += 1
+
+    run_pipeline(range(30), produce, consume, producer_workers=1, consumer_workers=1, queue_size=2)
+    assert consumed[0] == 30
+    # 큐(2) + 소비 중(1) + 큐에 넣으려고 기다리는 생산 결과(1)
+    assert peak[0] <= 4
+
+def test_produce_only():
+    seen = []
+    run_pipeline(range(3), seen.append, None, producer_workers=2)
+    assert sorted(seen) == [0, 1, 2]
+
+def test_fair_pool_alternates_between_accounts():
+    """한 계정이 작업을 먼저 몰아서 제출해도 다른 계정의 작업이 번갈아 실행되어야 합니다."""
+    gate = threading.Event()
+    order = []
+    pool = FairPool(1, name="test")
+    # 작업자가 첫 작업에서 멈춰 있는 동안 나머지 작업을 대기열에 쌓습니다.
+    pool.submit("block", gate.wait)
+    futures = [pool.submit("a", order.append, f"a{i}") for i in range(3)]
+    futures += [pool.submit("b", order.append, f"b{i}") for i in range(2)]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    pool.shutdown()
+    assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+def test_fair_pool_propagates_errors_and_rejects_after_shutdown():
+    pool = FairPool(2)
+    future = pool.submit("a", lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit("a", print)
+
+def test_pipeline_on_shared_pools():
+    producer_pool, consumer_pool = FairPool(2), FairPool(1)
+    results = {}
+    lock = threading.Lock()
+
+    def run(key):
+        def consume(value):
+            with lock:
+                results.setdefault(key, []).append(value)
+        run_pipeline(range(5), lambda n: None if n == 0 else n, consume, queue_size=1,
+                     pools=(producer_pool, consumer_pool), pool_key=key)
+
+    threads = [threading.Thread(target=run, args=(key,)) for key in ("alice", "bob")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    producer_pool.shutdown()
+    consumer_pool.shutdown()
+    assert {key: sorted(values) for key, values in results.items()} == {"alice": [1, 2, 3, 4], "bob": [1, 2, 3, 4]}
+
+def test_slow_uploads_do_not_hold_shared_download_workers():
+    """한 계정의 업로드가 막혀 있어도 공유 다운로드 작업자는 다른 계정의 작업을 처리해야 합니다."""
+    producer_pool, consumer_pool = FairPool(2), FairPool(2)
+    release = threading.Event()
+    slow_produced = []
+
+    def slow_produce(n):
+        slow_produced.append(n)
+        return n
+
+    slow = threading.Thread(target=run_pipeline, args=(range(20), slow_produce, lambda n: release.wait()),
+                            kwargs=dict(queue_size=1, pools=(producer_pool, consumer_pool), pool_key="slow"))
+    slow.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(slow_produced) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        fast_done = []
+        # 업로드 작업자가 모두 막혀 있으므로 빠른 계정은 다운로드 단계만 실행합니다.
+        fast = threading.Thread(target=run_pipeline, args=(range(10), fast_done.append, None),
+                                kwargs=dict(pools=(producer_pool, consumer_pool), pool_key="fast"))
+        fast.start()
+        fast.join(timeout=5)
+        assert sorted(fast_done) == list(range(10))
+        # 막힌 계정은 한도(생산 2 + 큐 1 + 소비 2)만큼만 맡기고 더 다운로드하지 않습니다.
+        assert len(slow_produced) <= 5
+    finally:
+        release.set()
+        slow.join(timeout=10)
+        producer_pool.shutdown()
+        consumer_pool.shutdown()
+    assert sorted(slow_produced) == list(range(20))
+
+def test_memory_budget_blocks_until_release():
+    budget = MemoryBudget(100)
+    budget.acquire(60)
+    acquired = threading.Event()
+
+    def second():
+        budget.acquire(60)
+        acquired.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not acquired.wait(0.05)
+    budget.release(60)
+    assert acquired.wait(5)
+    thread.join()
+    assert (budget.used, budget.peak) == (60, 60)
+
+def test_memory_budget_allows_single_oversized_item_and_resizes():
+    budget = MemoryBudget(100)
+    budget.acquire(250)
+    assert budget.used == 250
+    budget.resize(250, 40)
+    assert (budget.used, budget.peak) == (40, 250)
+    budget.acquire(50)
+    budget.resize(50, 80)  # 실제 크기가 예약보다 커도 기다리지 않습니다.
+    assert budget.used == 120
+    budget.release(40)
+    budget.release(80)
+    assert budget.used == 0
+
+def test_in_memory_run_stays_within_budget(tmp_path, mock_service):
+    """메모리 전송 모드로 모의 서버에서 받은 활동을 디스크에 쓰지 않고 업로드합니다."""
+    from conftest import attach_mock, run_args
+    from coros_to_garmin import CorosToGarmin
+    url, server = mock_service
+    migrator = attach_mock(CorosToGarmin(output_dir=str(tmp_path), config={}, in_memory=True), url)
+    migrator.run(run_args(month="202401", all=False, in_memory=True))
+    assert migrator.stats['downloaded'] == len(server.dataset.coros)
+    assert not migrator.failures
+    assert migrator.memory_budget.used == 0
+    assert 0 < migrator.memory_budget.peak <= migrator.memory_budget.limit
+    assert not [name for name in (tmp_path / "coros").iterdir() if name.suffix == ".fit"]
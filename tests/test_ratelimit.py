@@ -0,0 +1,86 @@
+import time
+
+import pytest
+import requests
+
+import ratelimit
+from ratelimit import AdaptiveLimiter, is_overload_error
+
+def make_limiter(**overrides):
+    params = dict(rate=1e6, burst=1e6, min_concurrency=1, max_concurrency=8, initial_concurrency=4,
+                  slow_threshold=10, cooldown=0)
+    params.update(overrides)
+    return AdaptiveLimiter("test", **params)
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+def test_success_increases_limit_additively():
+    limiter = make_limiter()
+    # 동시 요청 한도(4)만큼 정상 응답이 오면 한도가 약 1 늘어납니다.
+    for _ in range(4):
+        limiter.call(lambda: None)
+    assert 4.9 < limiter.limit < 5
+    for _ in range(100):
+        limiter.call(lambda: None)
+    assert limiter.concurrency == 8
+
+def test_overload_halves_limit_and_pauses():
+    limiter = make_limiter(cooldown=60)
+
+    def throttled():
+        raise http_error(429)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        limiter.call(throttled)
+    assert limiter.limit == 2
+    assert limiter._paused_until > time.monotonic() + 30
+    assert limiter._in_flight == 0
+
+def test_slow_response_halves_limit_down_to_minimum():
+    limiter = make_limiter(slow_threshold=0)
+    for _ in range(5):
+        limiter.call(lambda: None)
+    assert limiter.limit == 1
+
+def test_non_overload_error_does_not_shrink_limit():
+    limiter = make_limiter()
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert limiter.limit > 4
+
+@pytest.mark.parametrize("exc, expected", [
+    (http_error(429), True),
+    (http_error(503), True),
+    (http_error(404), False),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ReadTimeout(), True),
+    (type("GarminConnectTooManyRequestsError", (Exception,), {})(), True),
+    (ValueError(), False),
+])
+def test_is_overload_error(exc, expected):
+    assert is_overload_error(exc) is expected
+
+def test_get_limiter_is_shared_per_platform(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    assert ratelimit.get_limiter("COROS") is ratelimit.get_limiter("coros")
+    assert ratelimit.get_limiter("coros") is not ratelimit.get_limiter("garmin")
+
+def test_coros_fit_downloads_go_through_limiter(tmp_path, mock_service, fast_limits):
+    """FIT 파일 URL 요청도 API 요청과 같은 제한기를 거쳐야 합니다."""
+    from client import CorosClient
+    url, server = mock_service
+    client = CorosClient("tester@example.com", "pw", base_url=url)
+    client.login()
+    calls = []
+    call = fast_limits["coros"].call
+    fast_limits["coros"].call = lambda func, *args, **kwargs: calls.append(func.__name__) or call(func, *args, **kwargs)
+    activity = server.dataset.coros[0]
+
+    size, _ = client.download_fit_file(activity["labelId"], activity["sportType"], str(tmp_path / "a.fit"))
+    data = client.download_fit_data(activity["labelId"], activity["sportType"])
+    assert size == len(data)
+    assert calls.count("fetch_file") == 1
+    assert calls.count("fetch_data") == 1
@@ -0,0 +1,95 @@
+import pytest
+import requests
+
+from retry import RetryBudget, RetryPolicy, call_with_retry, is_retryable
+
+NO_WAIT = RetryPolicy(max_attempts=4, base_delay=0, max_delay=0)
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+GarminConnectConnectionError = type("GarminConnectConnectionError", (Exception,), {})
+
+def garmin_error(message, cause=None):
+    """garminconnect 0.3처럼 응답 없이 메시지만 가진 연결 오류를 만듭니다."""
+    exc = GarminConnectConnectionError(message)
+    exc.__cause__ = cause
+    return exc
+
+class Flaky:
+    def __init__(self, *errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+@pytest.mark.parametrize("exc, expected", [
+    (http_error(429), True),
+    (http_error(502), True),
+    (http_error(400), False),
+    (http_error(404), False),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ChunkedEncodingError(), True),
+    (garmin_error("Connection error: Read timed out"), True),
+    (garmin_error("API Error 409 - Duplicate Activity"), False),
+    (garmin_error("API client error (400): Bad Request"), False),
+    (garmin_error("API client error (404): Not Found"), False),
+    (garmin_error("API client error (429): Too Many Requests"), True),
+    (garmin_error("HTTP error: 503 Server Error", cause=http_error(503)), True),
+    (garmin_error("HTTP error", cause=http_error(409)), False),
+    (ValueError("bad fit"), False),
+])
+def test_is_retryable(exc, expected):
+    assert is_retryable(exc) is expected
+
+def test_transient_errors_are_retried_and_rewound():
+    func = Flaky(http_error(503), requests.exceptions.ConnectionError())
+    rewinds = []
+    assert call_with_retry(func, policy=NO_WAIT, before_retry=lambda: rewinds.append(1)) == "ok"
+    assert func.calls == 3
+    assert len(rewinds) == 2
+
+def test_permanent_error_is_raised_immediately():
+    func = Flaky(http_error(404))
+    with pytest.raises(requests.exceptions.HTTPError):
+        call_with_retry(func, policy=NO_WAIT)
+    assert func.calls == 1
+
+def test_gives_up_after_max_attempts():
+    func = Flaky(*[http_error(503)] * 10)
+    with pytest.raises(requests.exceptions.HTTPError):
+        call_with_retry(func, policy=NO_WAIT)
+    assert func.calls == NO_WAIT.max_attempts
+
+def test_shared_budget_is_exhausted_across_calls(capsys):
+    budget = RetryBudget(total=3)
+    first = Flaky(http_error(503), http_error(503))
+    assert call_with_retry(first, policy=NO_WAIT, budget=budget) == "ok"
+    second = Flaky(http_error(503), http_error(503))
+    with pytest.raises(requests.exceptions.HTTPError):
+        call_with_retry(second, policy=NO_WAIT, budget=budget)
+    assert second.calls == 2
+    assert budget.used == 3
+    assert "전체 재시도 한도" in capsys.readouterr().out
+    budget.reset()
+    assert budget.try_consume()
+
+def test_backoff_delay_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    assert all(0 <= policy.delay(1) <= 1 for _ in range(50))
+    assert all(0 <= policy.delay(10) <= 5 for _ in range(50))
+
+def test_garmin_permanent_error_is_not_retried_or_charged_to_budget():
+    budget = RetryBudget(total=5)
+    func = Flaky(garmin_error("API Error 409 - Duplicate Activity"))
+    with pytest.raises(GarminConnectConnectionError):
+        call_with_retry(func, policy=NO_WAIT, budget=budget)
+    assert func.calls == 1
+    assert budget.used == 0
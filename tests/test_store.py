@@ -0,0 +1,125 @@
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from constants import FIT_STORAGE_ARCHIVE
+from store import ArchiveFitStore, FitStore, open_fit_store
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path), hashlib.sha256(data).hexdigest()
+
+@pytest.fixture
+def store(tmp_path):
+    return FitStore(str(tmp_path / "store"))
+
+def test_same_content_is_stored_once(tmp_path, store):
+    first, digest = write(tmp_path / "20240101_1.fit", b"same")
+    assert store.add(first, digest) == (first, False)
+    second, _ = write(tmp_path / "20240102_2.fit", b"same")
+    assert store.add(second, digest) == (second, True)
+    object_path = store.object_path(digest)
+    assert os.path.samefile(object_path, first) and os.path.samefile(object_path, second)
+    # 이미 등록된 파일을 다시 등록해도 중복으로 세지 않습니다.
+    assert store.add(first, digest) == (first, False)
+
+def test_restore_relinks_verified_object(tmp_path, store):
+    path, digest = write(tmp_path / "20240101_1.fit", b"content")
+    store.add(path, digest)
+    os.remove(path)
+    assert store.restore(digest, 7, path) == path
+    assert open(path, 'rb').read() == b"content"
+    assert store.restore(digest, 8, path) is None
+    assert store.restore("0" * 64, None, path) is None
+
+def test_corrupted_object_is_not_restored(tmp_path, store):
+    path, digest = write(tmp_path / "20240101_1.fit", b"content")
+    store.add(path, digest)
+    os.remove(path)
+    with open(store.object_path(digest), 'r+b') as f:
+        f.write(b"C")
+    assert not store.verify(digest)
+    assert store.restore(digest, None, path) is None
+
+def test_remove_object(tmp_path, store):
+    path, digest = write(tmp_path / "20240101_1.fit", b"content")
+    store.add(path, digest)
+    assert store.remove(digest)
+    assert not store.remove(digest)
+    assert store.read(path) == b"content"
+    assert store.hash(path) == digest
+
+def test_unknown_backend_falls_back_to_files(tmp_path, capsys):
+    assert type(open_fit_store(str(tmp_path / "store"), "tape")) is FitStore
+    assert "FIT_STORAGE" in capsys.readouterr().out
+
+@pytest.fixture
+def archive(tmp_path):
+    return open_fit_store(str(tmp_path / "store"), FIT_STORAGE_ARCHIVE)
+
+def test_archive_stores_monthly_members(tmp_path, archive):
+    path, digest = write(tmp_path / "20240101_1.fit", b"january")
+    stored, duplicated = archive.add(path, digest)
+    assert not duplicated and not os.path.exists(path)
+    assert stored == os.path.join(archive.archives_dir, "202401.zip", "20240101_1.fit")
+    assert archive.is_member(stored) and archive.exists(stored)
+    assert archive.read(stored) == b"january"
+    assert archive.getsize(stored) == 7
+    assert archive.restore(digest, 7, path) == stored
+
+    again, _ = write(tmp_path / "20240105_2.fit", b"january")
+    assert archive.add(again, digest) == (stored, True)
+    # 같은 이름의 다른 내용은 해시를 붙인 이름으로 따로 보관합니다.
+    changed, changed_digest = write(tmp_path / "20240101_1.fit", b"re-downloaded")
+    changed_stored, _ = archive.add(changed, changed_digest)
+    assert changed_stored.endswith(f"20240101_1.{changed_digest[:8]}.fit")
+    assert archive.read(changed_stored) == b"re-downloaded"
+    assert archive.read(stored) == b"january"
+
+def test_archive_index_survives_reopen(tmp_path, archive):
+    path, digest = write(tmp_path / "20240101_1.fit", b"january")
+    stored, _ = archive.add(path, digest)
+    reopened = ArchiveFitStore(archive.root)
+    assert reopened.verify(digest, 7)
+    assert reopened.restore(digest, 7, path) == stored
+
+def crash_during_append(archive_path, data):
+    """_append가 저널을 쓴 뒤 중앙 디렉터리를 덮어쓰는 도중 중단된 상태를 만듭니다."""
+    start_dir, central_dir = 0, b""
+    if os.path.exists(archive_path):
+        with open(archive_path, 'rb') as f:
+            start_dir = zipfile.ZipFile(f).start_dir
+            f.seek(start_dir)
+            central_dir = f.read()
+    with open(archive_path + ".journal", 'wb') as f:
+        f.write(f"{start_dir}\n".encode() + central_dir)
+    with open(archive_path, 'ab' if start_dir else 'wb') as f:
+        if start_dir:
+            f.truncate(start_dir)
+        f.write(b"PK\x03\x04" + data[:3])  # 로컬 헤더를 쓰다가 끊긴 항목
+
+def test_recover_restores_archive_after_interrupted_append(tmp_path, archive):
+    path, digest = write(tmp_path / "20240101_1.fit", b"january")
+    stored, _ = archive.add(path, digest)
+    archive_path = os.path.join(archive.archives_dir, "202401.zip")
+    crash_during_append(archive_path, b"second")
+    with pytest.raises(zipfile.BadZipFile):
+        zipfile.ZipFile(archive_path)
+
+    reopened = ArchiveFitStore(archive.root)
+    assert not os.path.exists(archive_path + ".journal")
+    assert zipfile.ZipFile(archive_path).namelist() == ["20240101_1.fit"]
+    assert reopened.read(stored) == b"january"
+    second, second_digest = write(tmp_path / "20240102_2.fit", b"second")
+    second_stored, _ = reopened.add(second, second_digest)
+    assert reopened.read(second_stored) == b"second"
+    assert reopened.read(stored) == b"january"
+
+def test_recover_removes_archive_that_was_being_created(archive):
+    archive_path = os.path.join(archive.archives_dir, "202402.zip")
+    crash_during_append(archive_path, b"new")
+    ArchiveFitStore(archive.root)
+    assert not os.path.exists(archive_path)
+    assert not os.path.exists(archive_path + ".journal")
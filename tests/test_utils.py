@@ -0,0 +1,44 @@
+import hashlib
+import os
+from datetime import datetime
+
+import pytest
+
+from utils import atomic_write_chunks, month_shards
+
+def test_atomic_write_returns_size_and_hash(tmp_path):
+    dest = tmp_path / "sub" / "a.fit"
+    assert atomic_write_chunks(str(dest), [b"ab", b"", b"cd"]) == (4, hashlib.sha256(b"abcd").hexdigest())
+    assert dest.read_bytes() == b"abcd"
+    assert os.listdir(dest.parent) == ["a.fit"]
+
+@pytest.mark.parametrize("error", [ConnectionError, KeyboardInterrupt])
+def test_interrupted_write_leaves_no_partial_file(tmp_path, error):
+    dest = tmp_path / "out" / "a.fit"
+    dest.parent.mkdir()
+    dest.write_bytes(b"previous")
+
+    def chunks():
+        yield b"first"
+        raise error()
+
+    with pytest.raises(error):
+        atomic_write_chunks(str(dest), chunks())
+    # 기존 파일은 그대로 두고 임시(.part) 파일만 지웁니다.
+    assert os.listdir(dest.parent) == ["a.fit"]
+    assert dest.read_bytes() == b"previous"
+
+def shards(start, end, months=1):
+    return [(s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'))
+            for s, e in month_shards(datetime.strptime(start, '%Y-%m-%d'), datetime.strptime(end, '%Y-%m-%d'), months)]
+
+def test_month_shards_follow_calendar_month_boundaries():
+    assert shards("2024-01-15", "2024-03-10") == [
+        ("2024-01-15", "2024-01-31"), ("2024-02-01", "2024-02-29"), ("2024-03-01", "2024-03-10")]
+    assert shards("2023-12-31", "2024-01-01") == [("2023-12-31", "2023-12-31"), ("2024-01-01", "2024-01-01")]
+    assert shards("2024-05-07", "2024-05-07") == [("2024-05-07", "2024-05-07")]
+    assert shards("2024-05-08", "2024-05-07") == []
+
+def test_month_shards_by_quarter_cross_year():
+    assert shards("2023-11-20", "2024-07-01", months=3) == [
+        ("2023-11-20", "2024-01-31"), ("2024-02-01", "2024-04-30"), ("2024-05-01", "2024-07-01")]
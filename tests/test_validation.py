@@ -0,0 +1,96 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from fit import validate_fit_file
+from store import FitStore, ArchiveFitStore
+from validation import FitValidator
+from mock_server import make_fit_payload
+
+def corrupt(data):
+    broken = bytearray(data)
+    broken[len(broken) // 2] ^= 0xFF
+    return bytes(broken)
+
+def store_file(store, out_dir, name, data):
+    path = os.path.join(out_dir, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return store.add(path, store.hash(path))[0]
+
+@pytest.fixture
+def validator(tmp_path):
+    v = FitValidator(str(tmp_path / "coros"), workers=1)
+    yield v
+    v.shutdown()
+
+@pytest.fixture
+def payloads():
+    good = make_fit_payload(1704067200, 1800, 0, 1, serial=1)
+    bad = corrupt(make_fit_payload(1704070800, 1800, 0, 1, serial=2))
+    return good, bad
+
+def test_check_many_reports_only_invalid_files(tmp_path, validator, payloads):
+    store = FitStore(str(tmp_path / ".fitstore"))
+    good, bad = payloads
+    (tmp_path / "good.fit").write_bytes(good)
+    (tmp_path / "bad.fit").write_bytes(bad)
+    files = [str(tmp_path / "good.fit"), str(tmp_path / "bad.fit")]
+    invalid = validator.check_many(files, store)
+    assert list(invalid) == [files[1]]
+    assert validator.check(files[0], store) is None
+
+def test_quarantine_drops_object_from_file_store(tmp_path, validator, payloads):
+    store = FitStore(str(tmp_path / ".fitstore"))
+    out_dir = tmp_path / "coros"
+    out_dir.mkdir()
+    good, bad = payloads
+    good_path = store_file(store, str(out_dir), "20240101_1.fit", good)
+    bad_path = store_file(store, str(out_dir), "20240101_2.fit", bad)
+    bad_hash = store.hash(bad_path)
+    assert os.path.exists(store.object_path(bad_hash))
+
+    dest = validator.quarantine(bad_path, validate_fit_file(bad_path), store, "coros2garmin")
+
+    assert not os.path.exists(bad_path)
+    assert not os.path.exists(store.object_path(bad_hash))
+    assert not store.verify(bad_hash)
+    assert open(dest, 'rb').read() == bad
+    # 정상 파일과 그 객체는 그대로 남습니다.
+    assert store.verify(store.hash(good_path))
+    entry = json.loads(open(validator.report_path, encoding='utf-8').readline())
+    assert entry['file'] == bad_path and entry['quarantined'] == dest and entry['direction'] == "coros2garmin"
+
+def test_quarantine_drops_member_and_index_row_from_archive(tmp_path, validator, payloads):
+    store = ArchiveFitStore(str(tmp_path / ".fitstore"))
+    out_dir = tmp_path / "coros"
+    out_dir.mkdir()
+    good, bad = payloads
+    good_path = store_file(store, str(out_dir), "20240101_1.fit", good)
+    bad_path = store_file(store, str(out_dir), "20240101_2.fit", bad)
+    bad_hash = store.hash(bad_path)
+    assert store.is_member(bad_path) and store.verify(bad_hash)
+
+    dest = validator.quarantine(bad_path, "CRC 오류", store)
+
+    assert open(dest, 'rb').read() == bad
+    assert not store.exists(bad_path)
+    assert not store.verify(bad_hash)
+    assert store.restore(bad_hash, None, bad_path) is None
+    archive_path = os.path.join(store.archives_dir, "202401.zip")
+    with zipfile.ZipFile(archive_path) as zf:
+        assert zf.namelist() == ["20240101_1.fit"]
+    assert store.read(good_path) == good
+    # 같은 내용이 다시 들어오면 새로 보관됩니다.
+    bad_again = store_file(store, str(out_dir), "20240101_2.fit", bad)
+    assert store.read(bad_again) == bad
+
+def test_removing_last_member_deletes_archive(tmp_path, payloads):
+    store = ArchiveFitStore(str(tmp_path / ".fitstore"))
+    out_dir = tmp_path / "coros"
+    out_dir.mkdir()
+    path = store_file(store, str(out_dir), "20240101_2.fit", payloads[1])
+    assert store.remove(store.hash(path))
+    assert not os.path.exists(os.path.join(store.archives_dir, "202401.zip"))
@@ -0,0 +1,54 @@
+from calendar import timegm
+
+from conftest import attach_mock
+from constants import LEDGER_STATUS_FAILED, WATCH_MAX_ATTEMPTS
+from coros_to_garmin import CorosToGarmin
+from watcher import Watcher
+
+FAILING_ID = "500000000"
+
+def test_next_delay_backs_off_and_resets():
+    watcher = Watcher(migrator=None, interval=10, max_interval=35, backoff=2, jitter=0)
+    assert [watcher.next_delay(0) for _ in range(3)] == [20, 35, 35]
+    assert watcher.next_delay(1) == 10
+
+def test_cursor_skips_activity_that_keeps_failing(tmp_path, mock_service):
+    """계속 실패하는 활동이 있어도 WATCH_MAX_ATTEMPTS번 시도한 뒤에는 커서가 그 활동을 지나가야 합니다."""
+    url, server = mock_service
+    migrator = attach_mock(CorosToGarmin(output_dir=str(tmp_path), config={}), url)
+    attempts = []
+    download = migrator._download_activity
+
+    def flaky_download(activity, dest):
+        if activity['labelId'] == FAILING_ID:
+            attempts.append(dest)
+            raise OSError("모의 다운로드 실패")
+        return download(activity, dest)
+
+    migrator._download_activity = flaky_download
+    # 모의 데이터는 2024-01-01부터 시작하므로 그 직전으로 커서를 맞춥니다.
+    migrator.ledger.set_cursor(migrator.DIRECTION, timegm((2024, 1, 1, 0, 0, 0)), "")
+
+    watcher = Watcher(migrator, interval=0.01, max_interval=0.01, jitter=0)
+    watcher.run(max_cycles=WATCH_MAX_ATTEMPTS)
+    entry = migrator.ledger.get(migrator.DIRECTION, FAILING_ID)
+    assert entry['status'] == LEDGER_STATUS_FAILED
+    assert entry['attempts'] == WATCH_MAX_ATTEMPTS
+    cursor = migrator.ledger.get_cursor(migrator.DIRECTION)
+    assert cursor[1] == "500000005"
+
+    # 커서가 지나갔으므로 다음 주기에는 다시 시도하지 않습니다.
+    watcher.run(max_cycles=1)
+    assert len(attempts) == WATCH_MAX_ATTEMPTS
+    assert migrator.ledger.get_cursor(migrator.DIRECTION) == cursor
+
+def test_cursor_waits_for_activity_under_attempt_limit(tmp_path):
+    migrator = CorosToGarmin(output_dir=str(tmp_path), config={})
+    first = {"labelId": FAILING_ID, "sportType": 100, "date": "20240101060000"}
+    second = {"labelId": "500000001", "sportType": 100, "date": "20240101160000"}
+    for _ in range(WATCH_MAX_ATTEMPTS - 1):
+        migrator.ledger.record_failure(migrator.DIRECTION, FAILING_ID)
+    migrator.ledger.mark(migrator.DIRECTION, "500000001", "uploaded")
+    assert migrator._advance_cursor([first, second]) is None
+    migrator.ledger.record_failure(migrator.DIRECTION, FAILING_ID)
+    assert migrator._advance_cursor([first, second])[1] == "500000001"
@@ -0,0 +1,67 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from constants import TOKEN_CACHE_DIR
+
+class TokenCache:
+    """로그인 토큰을 사용자 홈의 캐시 폴더에 보관하여 실행 간에 재사용합니다.
+
+    폴더는 소유자만 접근(0700), 파일은 소유자만 읽기/쓰기(0600) 권한으로 만듭니다.
+    계정 이름은 해시로 바꿔 파일명에 사용하므로 캐시 폴더에 이메일이 노출되지 않습니다.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = os.path.expanduser(cache_dir or TOKEN_CACHE_DIR)
+        self._ensure_private_dir(self.cache_dir)
+
+    @staticmethod
+    def _ensure_private_dir(path):
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        try:
+            os.chmod(path, 0o700)
+        except OSError:
+            pass
+
+    def _key(self, platform, account):
+        digest = hashlib.sha256(f"{platform}:{account or ''}".encode('utf-8')).hexdigest()[:16]
+        return f"{platform}_{digest}"
+
+    def load(self, platform, account):
+        """저장된 토큰 정보를 반환합니다. 없거나 읽을 수 없으면 None."""
+        path = os.path.join(self.cache_dir, self._key(platform, account) + ".json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, platform, account, data):
+        """토큰 정보를 소유자 전용 권한의 파일에 원자적으로 저장합니다."""
+        path = os.path.join(self.cache_dir, self._key(platform, account) + ".json")
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def clear(self, platform, account):
+        """저장된 토큰을 삭제합니다."""
+        path = os.path.join(self.cache_dir, self._key(platform, account) + ".json")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def token_dir(self, platform, account):
+        """여러 토큰 파일을 쓰는 라이브러리(garminconnect)용 전용 폴더 경로를 반환합니다."""
+        path = os.path.join(self.cache_dir, self._key(platform, account))
+        self._ensure_private_dir(path)
+        return path
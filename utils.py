@@ -1,6 +1,9 @@
 import os
 import sys
 import re
+import hashlib
+import tempfile
+from datetime import timedelta
 
 def resource_path(relative_path):
     """ PyInstaller/로컬 환경 모두에서 리소스 파일의 절대 경로를 반환합니다. """
@@ -38,8 +41,53 @@ def load_config(config_path=None):
         config['GARMIN_USERNAME'] = get_val('GARMIN_USERNAME')
         config['GARMIN_PASSWORD'] = get_val('GARMIN_PASSWORD')
         config['OUTPUT_DIR'] = get_val('OUTPUT_DIR') or './exports' # 기본값 설정
+        config['HTTP_TIMEOUT'] = get_val('HTTP_TIMEOUT') # 비어 있으면 기본 타임아웃 사용
+        config['FIT_STORAGE'] = get_val('FIT_STORAGE') # 비어 있으면 파일별 저장
+        config['COROS_API_URL'] = get_val('COROS_API_URL') # 비어 있으면 기본 COROS API 주소
+        config['METRICS_DIR'] = get_val('METRICS_DIR') # 비어 있으면 OUTPUT_DIR/metrics
+        config['WATCH_INTERVAL'] = get_val('WATCH_INTERVAL') # 비어 있으면 기본 확인 주기
+        config['MEMORY_BUDGET_MB'] = get_val('MEMORY_BUDGET_MB') # 비어 있으면 기본 메모리 한도
 
     except Exception as e:
         print(f"[오류] 설정 파일 읽기 실패: {e}")
 
     return config
+
+def month_shards(start, end, months=1):
+    """ [start, end] 기간을 달력 월 경계 기준 months개월 단위 구간 (구간 시작, 구간 끝)으로 나눕니다. """
+    shard_start = start
+    while shard_start <= end:
+        month_index = shard_start.year * 12 + (shard_start.month - 1) + months
+        next_start = shard_start.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+        yield shard_start, min(end, next_start - timedelta(days=1))
+        shard_start = next_start
+
+def atomic_write_chunks(dest_path, chunks):
+    """ 바이트 청크를 임시 파일에 기록한 뒤 완료 시점에 원자적으로 이름을 바꿉니다.
+
+    중간에 실패하면 임시 파일을 지우므로 잘린 파일이 dest_path에 남지 않습니다.
+    기록한 (바이트 수, SHA-256 해시)를 반환합니다.
+    """
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(dest_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(dest_path)}.", suffix=".part", dir=dest_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return size, digest.hexdigest()
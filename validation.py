@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from fit import validate_fit_file, validate_fit_data
+from constants import QUARANTINE_DIRNAME, QUARANTINE_REPORT_FILENAME, VALIDATION_CHUNK_SIZE
+
+class FitValidator:
+    """업로드 전 FIT 파일의 헤더/데이터 크기/CRC를 프로세스 풀에서 검사하고, 손상된 파일을 격리합니다.
+
+    CRC 계산은 CPU를 쓰는 작업이라 스레드 대신 프로세스에 나눠 모든 코어를 사용합니다.
+    압축 보관 파일이나 메모리에만 있는 데이터는 저장소에서 읽은 바이트를 넘겨 검사합니다.
+    손상된 파일은 output_dir/quarantine/로 옮기고 quarantine/report.jsonl에 사유를 남깁니다.
+    """
+    def __init__(self, output_dir, workers=None):
+        self.quarantine_dir = os.path.join(output_dir, QUARANTINE_DIRNAME)
+        self.report_path = os.path.join(self.quarantine_dir, QUARANTINE_REPORT_FILENAME)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        """프로세스 풀을 처음 필요할 때 만듭니다. 만들 수 없는 환경이면 None (현재 프로세스에서 검사)."""
+        with self._lock:
+            if self._executor is None:
+                try:
+                    # 다운로드/업로드 스레드가 도는 중에 fork하지 않도록 모든 플랫폼에서 spawn으로 시작합니다.
+                    self._executor = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+                except (OSError, NotImplementedError, ImportError) as e:
+                    print(f"[안내] 프로세스 풀을 사용할 수 없어 현재 프로세스에서 FIT 파일을 검사합니다: {e}")
+                    self._executor = False
+            return self._executor or None
+
+    @staticmethod
+    def _task(fit_file, store):
+        """(검사 함수, 인자)를 정합니다. 디스크의 파일은 경로만 넘겨 작업 프로세스가 직접 읽습니다.
+
+        저장소에서 읽지 못하면 (None, 오류 메시지)를 반환합니다.
+        """
+        if not store.is_member(fit_file):
+            return validate_fit_file, fit_file
+        try:
+            return validate_fit_data, store.read(fit_file)
+        except OSError as e:
+            return None, f"파일을 읽을 수 없습니다: {e}"
+
+    def _abandon_pool(self, error):
+        """작업 프로세스가 비정상 종료되면 이후 검사는 현재 프로세스에서 실행합니다."""
+        print(f"[안내] FIT 검사 작업 프로세스가 종료되어 현재 프로세스에서 검사합니다: {error}")
+        with self._lock:
+            self._executor = False
+
+    def check(self, fit_file, store):
+        """파일 하나를 검사해 오류 메시지를 반환합니다. 정상이면 None."""
+        func, arg = self._task(fit_file, store)
+        if func is None:
+            return arg
+        pool = self._pool()
+        if pool is not None:
+            try:
+                return pool.submit(func, arg).result()
+            except BrokenProcessPool as e:
+                self._abandon_pool(e)
+        return func(arg)
+
+    def check_many(self, fit_files, store):
+        """여러 파일을 프로세스 풀에서 한꺼번에 검사해 {손상된 파일: 오류 메시지}를 반환합니다."""
+        tasks = [self._task(fit_file, store) for fit_file in fit_files]
+        errors = None
+        pool = self._pool()
+        if pool is not None:
+            try:
+                errors = self._check_on_pool(pool, tasks)
+            except BrokenProcessPool as e:
+                self._abandon_pool(e)
+        if errors is None:
+            errors = [func(arg) if func else arg for func, arg in tasks]
+        return {fit_file: error for fit_file, error in zip(fit_files, errors) if error}
+
+    @staticmethod
+    def _check_on_pool(pool, tasks):
+        # 디스크 파일은 여러 개씩 묶어 보내 프로세스 간 통신 비용을 줄입니다.
+        file_errors = iter(pool.map(validate_fit_file, [arg for func, arg in tasks if func is validate_fit_file],
+                                    chunksize=VALIDATION_CHUNK_SIZE))
+        data_futures = {i: pool.submit(func, arg) for i, (func, arg) in enumerate(tasks) if func is validate_fit_data}
+        errors = []
+        for i, (func, arg) in enumerate(tasks):
+            if func is validate_fit_file:
+                errors.append(next(file_errors))
+            elif func is None:
+                errors.append(arg)
+            else:
+                errors.append(data_futures[i].result())
+        return errors
+
+    def quarantine(self, fit_file, error, store, direction=None):
+        """손상된 파일을 격리 폴더로 옮기고 보고서에 기록한 뒤 격리된 경로를 반환합니다.
+
+        같은 내용이 다시 쓰이지 않도록 저장소의 객체(압축 보관 항목과 색인 포함)도 지웁니다.
+        """
+        name = os.path.basename(fit_file)
+        try:
+            content_hash = store.hash(fit_file)
+        except OSError:
+            content_hash = None
+        stem, ext = os.path.splitext(name)
+        with self._lock:
+            dest = os.path.join(self.quarantine_dir, name)
+            n = 1
+            while os.path.exists(dest):
+                dest = os.path.join(self.quarantine_dir, f"{stem}.{n}{ext}")
+                n += 1
+            try:
+                os.makedirs(self.quarantine_dir, exist_ok=True)
+                if store.is_member(fit_file):
+                    # 압축 보관/메모리의 데이터는 원본을 건드리지 않고 복사본만 남깁니다.
+                    with open(dest, 'wb') as f:
+                        f.write(store.read(fit_file))
+                else:
+                    shutil.move(fit_file, dest)
+                if content_hash:
+                    store.remove(content_hash)
+            except OSError as e:
+                print(f"⚠️ 손상된 파일 격리 실패 ({name}): {e}")
+                dest = None
+            entry = {'time': datetime.now().isoformat(timespec='seconds'), 'direction': direction,
+                     'file': fit_file, 'quarantined': dest, 'error': error}
+            try:
+                with open(self.report_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"⚠️ 격리 보고서 기록 실패: {e}")
+        return dest
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+            self._executor = None
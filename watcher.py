@@ -0,0 +1,63 @@
+import random
+import threading
+from datetime import datetime
+
+from constants import (
+    WATCH_INTERVAL_SEC,
+    WATCH_MAX_INTERVAL_SEC,
+    WATCH_BACKOFF_FACTOR,
+    WATCH_JITTER,
+)
+
+class Watcher:
+    """로그인 상태를 유지한 채 일정 주기로 새 활동만 확인해 반영하는 워치 모드 실행기
+
+    새 활동이 없거나 확인에 실패하면 확인 주기를 WATCH_BACKOFF_FACTOR배씩 최대
+    max_interval까지 늘리고, 새 활동이 나타나면 기본 주기로 되돌립니다.
+    매 주기에는 ±jitter 만큼 무작위 편차를 더합니다.
+    """
+    def __init__(self, migrator, interval=WATCH_INTERVAL_SEC, max_interval=WATCH_MAX_INTERVAL_SEC,
+                 backoff=WATCH_BACKOFF_FACTOR, jitter=WATCH_JITTER):
+        self.migrator = migrator
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.current_interval = interval
+        self._stop = threading.Event()
+
+    def stop(self):
+        """대기 중인 워치 루프를 멈춥니다. 다른 스레드(GUI 등)에서 호출할 수 있습니다."""
+        self._stop.set()
+
+    def next_delay(self, found):
+        """이번 주기의 결과로 다음 확인까지 기다릴 시간(초)을 정합니다."""
+        if found:
+            self.current_interval = self.interval
+        else:
+            self.current_interval = min(self.current_interval * self.backoff, self.max_interval)
+        return self.current_interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run(self, max_cycles=None):
+        """stop()이 호출되거나 max_cycles만큼 확인할 때까지 반복합니다."""
+        print(f"👀 워치 모드를 시작합니다. (확인 주기 {self.interval}초, 새 활동이 없으면 최대 {self.max_interval}초)")
+        cycles = 0
+        while not self._stop.is_set():
+            print(f"🔄 [{datetime.now():%H:%M:%S}] 새 {self.migrator.SOURCE_NAME} 활동을 확인합니다.")
+            try:
+                found = self.migrator.poll()
+            except Exception as e:
+                # 네트워크 장애 등은 다음 주기에 다시 시도하되, 실패가 이어지면 주기를 늘립니다.
+                print(f"❌ 새 활동 확인 실패: {e}")
+                found = 0
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+            delay = self.next_delay(found)
+            if not found:
+                print(f"💤 새 활동이 없습니다. {delay:.0f}초 후 다시 확인합니다.")
+            else:
+                print(f"⏳ {delay:.0f}초 후 다시 확인합니다.")
+            if self._stop.wait(delay):
+                break
+        print("👋 워치 모드를 종료합니다.")